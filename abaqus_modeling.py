@@ -13,6 +13,20 @@ import time
 import os
 import traceback
 import urllib2
+import urllib
+import urlparse
+import httplib
+import socket
+import atexit
+import contextlib
+import multiprocessing
+import array
+import sys
+import gzip
+import shutil
+import tempfile
+import struct
+import zlib
 
 STDOUT_ENCODING = "gbk"
 ORIGIN_WORKDIR = os.path.abspath(os.getcwd())
@@ -114,6 +128,274 @@ class Utils:
         with io.open(jsonFile, "w", encoding=encoding) as f:
             f.write(unicode(json.dumps(item, ensure_ascii=ensure_ascii)))
 
+    CHANNEL_CODEC = "delta-shuffle-zlib"
+
+    @staticmethod
+    def encode_channel(values):
+        """
+        无损压缩一个通道(float64, 小端): 按uint64逐项差分(模2^64), 按字节重排(shuffle)后zlib压缩
+
+        解码见result_reader.decode_channel
+        """
+        count = len(values)
+        integers = struct.unpack("<%dQ" % count, struct.pack("<%dd" % count, *values))
+        deltas = []
+        previous = 0
+        for i in integers:
+            deltas.append((i - previous) & 0xFFFFFFFFFFFFFFFF)
+            previous = i
+        raw = struct.pack("<%dQ" % count, *deltas)
+        return zlib.compress(b"".join(raw[i::8] for i in range(8)), 9)
+
+    @staticmethod
+    def downsample_indices(series, time, tolerance):
+        """
+        误差有界的降采样, 返回保留的序号(各通道共用)
+
+        - 保留首尾、各通道的最大值与最小值, 以及反向幅度超过容许误差的转折点
+        - 其余区段按Douglas-Peucker方法加密: 以time为横坐标线性插值,
+          任一通道的误差超过tolerance * 该通道的极差时, 在(相对)误差最大处分段
+
+        Parameters
+        ---
+        series : list[list[float]]
+            各通道, 长度与time相同
+        time : list[float]
+        tolerance : float
+            相对容许误差
+        """
+        count = len(time)
+        if count <= 2:
+            return list(range(count))
+        keep = set([0, count - 1])
+        bounded = []
+        for values in series:
+            span = max(values) - min(values)
+            if span <= 0:
+                continue
+            limit = tolerance * span
+            bounded.append((values, limit))
+            keep.add(values.index(max(values)))
+            keep.add(values.index(min(values)))
+            # ===转折点(反向幅度超过limit)
+            extreme, direction = 0, 0
+            for i in range(1, count):
+                change = values[i] - values[extreme]
+                if direction == 0:
+                    if abs(change) > limit:
+                        direction = 1 if change > 0 else -1
+                        extreme = i
+                elif change * direction > 0:
+                    extreme = i
+                elif -change * direction > limit:
+                    keep.add(extreme)
+                    direction, extreme = -direction, i
+
+        anchors = sorted(keep)
+        stack = list(zip(anchors[:-1], anchors[1:]))
+        while stack:
+            start, end = stack.pop()
+            if end - start < 2:
+                continue
+            t_start, t_end = time[start], time[end]
+            worst, split = 1.0, None
+            for values, limit in bounded:
+                v_start, v_end = values[start], values[end]
+                for i in range(start + 1, end):
+                    if t_end != t_start:
+                        ratio = (time[i] - t_start) / (t_end - t_start)
+                    else:
+                        ratio = float(i - start) / (end - start)
+                    error = abs(values[i] - v_start - (v_end - v_start) * ratio) / limit
+                    if error > worst:
+                        worst, split = error, i
+            if split is not None:
+                keep.add(split)
+                stack.append((start, split))
+                stack.append((split, end))
+        return sorted(keep)
+
+    @staticmethod
+    def write_channels(data, path_header, path_bin, groups, codec=None, tolerance=None):
+        """
+        按通道写出历程数据: 头文件(json)与通道数据(二进制, float64)
+
+        Parameters
+        ---
+        data : dict
+            odb_extract.json格式的数据
+        path_header, path_bin : str
+            头文件与通道数据的路径
+        groups : Iterable[str]
+            data中需要按通道写出的key(比如"top_referpoint"), 其余key原样写入头文件
+        codec : str, default=None
+            None为原始的float64数组(odb_channels-1),
+            "delta-shuffle-zlib"为逐通道无损压缩(odb_channels-2, 见encode_channel)
+        tolerance : float, default=None
+            降采样的相对容许误差(见downsample_indices), None为不降采样;
+            各组的增量步须相同(time长度相同), 否则不降采样
+
+        Notes
+        ---
+        头文件: {"format": "odb_channels-1", "dtype": "f8", "byteorder": "little"|"big",
+            "channels": {group: {channel: [offset(字节), count]}}, 其余key}
+        odb_channels-2: {"format": "odb_channels-2", "codec": codec, "dtype": "f8", "byteorder": "little",
+            "channels": {group: {channel: [offset(字节), 字节数, count]}},
+            "downsample": None | {"tolerance": float, "count": int, "original_count": int}, 其余key}
+        """
+        header = dict((k, v) for k, v in data.items() if k not in groups)
+        header.update(
+            {
+                "format": "odb_channels-1",
+                "dtype": "f8",
+                "byteorder": sys.byteorder,
+                "channels": {},
+            }
+        )
+        if codec is not None:
+            if codec != Utils.CHANNEL_CODEC:
+                raise ValueError("unsupported codec: %s" % codec)
+            header.update(
+                {"format": "odb_channels-2", "codec": codec, "byteorder": "little"}
+            )
+            header["downsample"] = None
+
+        # ===降采样(各组共用同一组增量步)
+        counts = set(len(data[group].get("time", ())) for group in groups)
+        indices = None
+        if tolerance and len(counts) == 1:
+            count = counts.pop()
+            time = data[groups[0]]["time"]
+            series = [
+                values
+                for group in groups
+                for channel, values in data[group].items()
+                if channel != "time" and len(values) == count
+            ]
+            indices = Utils.downsample_indices(series, time, tolerance)
+            header["downsample"] = {
+                "tolerance": tolerance,
+                "count": len(indices),
+                "original_count": count,
+            }
+
+        offset = 0
+        with open(path_bin, "wb") as f:
+            for group in groups:
+                header["channels"][group] = {}
+                for channel, values in data[group].items():
+                    if (
+                        indices is not None
+                        and len(values) == header["downsample"]["original_count"]
+                    ):
+                        values = [values[i] for i in indices]
+                    if codec is None:
+                        values = array.array("d", values)
+                        values.tofile(f)
+                        header["channels"][group][channel] = [offset, len(values)]
+                        offset += len(values) * values.itemsize
+                    else:
+                        encoded = Utils.encode_channel(values)
+                        f.write(encoded)
+                        header["channels"][group][channel] = [
+                            offset,
+                            len(encoded),
+                            len(values),
+                        ]
+                        offset += len(encoded)
+        # 头文件最后写出, 头文件存在即说明通道数据完整
+        Utils.write_json(header, path_header)
+
+    # 求解文件的扩展名 -> 默认处理(与retention.DEFAULT_ACTIONS一致)
+    RETENTION_ACTIONS = {
+        ".odb": "delete",
+        ".cae": "compress",
+        ".jnl": "keep",
+        ".dat": "compress",
+        ".msg": "compress",
+        ".prt": "delete",
+        ".com": "delete",
+        ".sim": "delete",
+        ".res": "delete",
+        ".mdl": "delete",
+        ".stt": "delete",
+    }
+
+    @staticmethod
+    def keeps_odb(taskname, odb_sample):
+        """按任务名的哈希判断该任务是否被抽中保留odb(与retention.RetentionPolicy.keeps_odb一致)"""
+        if odb_sample is None:
+            return False
+        if isinstance(taskname, unicode):
+            taskname = taskname.encode("utf-8")
+        return (zlib.crc32(taskname) & 0xFFFFFFFF) < odb_sample * 2**32
+
+    @staticmethod
+    def apply_retention(task_folder, taskname, policy):
+        """
+        按保留策略删除或压缩任务文件夹根目录下的求解文件(results/等子文件夹不受影响)
+
+        逐个文件处理, 某个文件出错时记录错误并继续处理其余文件
+
+        Parameters
+        ---
+        task_folder : str
+        taskname : str
+        policy : dict
+            {"actions": {扩展名: "delete" | "compress" | "keep"}, "odb_sample": float | None,
+            "compress_level": int}, 见retention.RetentionPolicy
+
+        Returns
+        ---
+        files : dict
+            已处理的文件, 文件名 -> [处理, 处理前字节数, 处理后字节数]
+        errors : dict
+            出错的文件, 文件名 -> 错误信息
+        """
+        actions = dict(Utils.RETENTION_ACTIONS)
+        for extension, action in policy.get("actions", {}).items():
+            actions[extension.lower()] = action
+        keep_odb = Utils.keeps_odb(taskname, policy.get("odb_sample"))
+        level = policy.get("compress_level", 6)
+        files = {}
+        errors = {}
+        for name in sorted(os.listdir(task_folder)):
+            path = os.path.join(task_folder, name)
+            if not os.path.isfile(path):
+                continue
+            extension = os.path.splitext(name)[1].lower()
+            action = actions.get(extension, "keep")
+            if extension == ".odb" and keep_odb:
+                action = "keep"
+            if action == "keep":
+                continue
+            path_temp = path + ".gz.tmp"
+            try:
+                before = os.path.getsize(path)
+                after = 0
+                if action == "compress":
+                    path_gz = path + ".gz"
+                    with open(path, "rb") as src:
+                        dst = gzip.open(path_temp, "wb", level)
+                        try:
+                            shutil.copyfileobj(src, dst, 1 << 20)
+                        finally:
+                            dst.close()
+                    if os.path.exists(path_gz):
+                        os.remove(path_gz)
+                    os.rename(path_temp, path_gz)
+                    after = os.path.getsize(path_gz)
+                elif action != "delete":
+                    raise ValueError("unknown retention action: %s" % action)
+                os.remove(path)
+            except Exception as e:
+                errors[name] = "%s: %s" % (type(e).__name__, e)
+                if os.path.exists(path_temp):
+                    os.remove(path_temp)
+                continue
+            files[name] = [action, before, after]
+        return files, errors
+
     @staticmethod
     def http_get(url):
         response = urllib2.urlopen(url)
@@ -139,52 +421,274 @@ class Utils:
 
 
 class Log:
+    """
+    结构化日志(JSON-lines)
+
+    每条日志是一行json: {"time", "level", "task", "phase", "msg", ...}
+        - 全局日志写入 logs/<时间>_log.jsonl
+        - 绑定任务(bind_task)后, 日志同时写入任务文件夹下的 task_log.jsonl
+        - 日志先写入缓冲区, 每隔FLUSH_INTERVAL秒、缓冲区超过BUFFER_SIZE条、
+          出现ERROR或阶段(phase)结束时才写入文件
+        - 仅等级不低于STDOUT_LEVEL的日志会输出到stdout
+    """
+
+    LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+    STDOUT_LEVEL = "INFO"
+    FLUSH_INTERVAL = 5.0
+    BUFFER_SIZE = 500
+    TASK_LOG_FILENAME = "task_log.jsonl"
+
     log_folder = os.path.join(ORIGIN_WORKDIR, "logs")
     if not os.path.isdir(log_folder):
         os.makedirs(log_folder)
-    log_path = os.path.join(log_folder, "%s_log.txt" % Utils.format_time(True))
-    log_txt_file = io.open(log_path, "a", encoding="utf-8")
+    log_path = os.path.join(log_folder, "%s_log.jsonl" % Utils.format_time(True))
 
-    @classmethod
-    def log(cla, *args, **kwargs):
+    task = None  # 当前任务名
+    task_log_path = None  # 当前任务的日志路径
+    phases = []  # 当前阶段(栈)
+    buffers = {}  # 日志路径 -> 待写入的行
+    last_flush = time.time()
+
+    @staticmethod
+    def to_unicode(item):
         """
         Notes
         ---
         [Python对中文字符的处理(utf-8/ gbk/ unicode)](https://blog.csdn.net/chixujohnny/article/details/51782826)
         """
-        file_encoding = "utf-8"
-        sysout_encoding = STDOUT_ENCODING
-        kwargs.setdefault("seq", " ")
+        if isinstance(item, unicode):
+            return item
+        if not isinstance(item, str):
+            item = str(item)
+        try:
+            return item.decode("utf-8")
+        except UnicodeDecodeError:
+            return item.decode(STDOUT_ENCODING, "replace")
 
-        def conver_item(item):
-            if isinstance(item, unicode):
-                return item.encode(sysout_encoding)
-            try:
-                return str(item).decode(file_encoding).encode(sysout_encoding)
-            except UnicodeDecodeError:
-                pass
-            try:
-                return str(item).decode(sysout_encoding).encode(sysout_encoding)
-            except UnicodeDecodeError:
-                return repr(str(item))
+    @classmethod
+    def log(cla, *args, **kwargs):
+        """
+        Parameters
+        ---
+        *args
+            日志内容, 以seq连接
+        seq : str, default=" "
+            连接符
+        level : {"DEBUG", "INFO", "WARNING", "ERROR"}, default="INFO"
+            日志等级
+        **kwargs
+            其他写入日志记录的字段(需可json序列化)
+        """
+        seq = kwargs.pop("seq", " ")
+        level = kwargs.pop("level", "INFO")
+        msg = cla.to_unicode(seq).join(map(cla.to_unicode, args))
+
+        record = {
+            "time": time.time(),
+            "level": level,
+            "task": cla.task,
+            "phase": cla.phases[-1] if cla.phases else None,
+            "msg": msg,
+        }
+        record.update(kwargs)
+        line = unicode(json.dumps(record, ensure_ascii=False)) + "\n"
+        cla.buffers.setdefault(cla.log_path, []).append(line)
+        if cla.task_log_path is not None:
+            cla.buffers.setdefault(cla.task_log_path, []).append(line)
+
+        if cla.LEVELS[level] >= cla.LEVELS[cla.STDOUT_LEVEL]:
+            print(
+                ("|||%s|||\n%s" % (Utils.format_time(True), msg)).encode(
+                    STDOUT_ENCODING, "replace"
+                )
+            )
 
-        args = map(conver_item, args)  # 将所有内容转换为「sysout_encoding」编码的字符串
-        fm_str = kwargs["seq"].join(list(args))
-        fm_str = "|||%s|||\n%s" % (Utils.format_time(True), fm_str)
-        print(fm_str)
+        if (
+            cla.LEVELS[level] >= cla.LEVELS["ERROR"]
+            or len(cla.buffers[cla.log_path]) >= cla.BUFFER_SIZE
+            or time.time() - cla.last_flush >= cla.FLUSH_INTERVAL
+        ):
+            cla.flush()
 
-        cla.log_txt_file.write(
-            (fm_str + "\n").decode(sysout_encoding)
-        )  # 将字符串转换为unicode
-        cla.log_txt_file.flush()
+    @classmethod
+    def debug(cla, *args, **kwargs):
+        kwargs["level"] = "DEBUG"
+        cla.log(*args, **kwargs)
+
+    @classmethod
+    def warning(cla, *args, **kwargs):
+        kwargs["level"] = "WARNING"
+        cla.log(*args, **kwargs)
+
+    @classmethod
+    def error(cla, *args, **kwargs):
+        kwargs["level"] = "ERROR"
+        cla.log(*args, **kwargs)
+
+    @classmethod
+    def flush(cla):
+        """将缓冲区写入文件"""
+        for path, lines in cla.buffers.items():
+            if not lines:
+                continue
+            with io.open(path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+            del lines[:]
+        cla.last_flush = time.time()
+
+    @classmethod
+    def bind_task(cla, taskname, task_folder):
+        """之后的日志记录所属任务, 并同时写入任务文件夹下的task_log.jsonl"""
+        cla.flush()
+        cla.task = cla.to_unicode(taskname)
+        cla.task_log_path = os.path.join(task_folder, cla.TASK_LOG_FILENAME)
+
+    @classmethod
+    def unbind_task(cla):
+        cla.flush()
+        cla.task = None
+        cla.task_log_path = None
+
+    @classmethod
+    @contextlib.contextmanager
+    def phase(cla, name):
+        """
+        记录一个阶段的开始与结束(phase_start/phase_end事件)
+
+        Examples
+        ---
+        >>> with Log.phase("modeling"):
+        ...     executor.modeling()
+        """
+        cla.phases.append(name)
+        st_time = time.time()
+        cla.log("Phase> %s start" % name, event="phase_start")
+        status = "success"
+        try:
+            yield
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            cla.log(
+                "Phase> %s end (%.2fs)" % (name, time.time() - st_time),
+                event="phase_end",
+                duration=time.time() - st_time,
+                status=status,
+            )
+            cla.phases.pop()
+            cla.flush()
+
+
+atexit.register(Log.flush)
+
+
+class PhaseTimer:
+    """
+    记录各子阶段的耗时(墙钟时间)与CAE内核进程的峰值内存
+
+    Examples
+    ---
+    >>> timer = PhaseTimer()
+    >>> timer.lap("sketch")  # 开始sketch
+    >>> timer.lap("mesh")  # 结束sketch, 开始mesh
+    >>> timer.stop()  # 结束mesh
+    >>> timer.extract()
+    {"phases": [{"name": "sketch", "duration": ..., "peak_memory": ...}, ...], "total": ...}
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.current = None
+        self.st_time = None
+
+    @staticmethod
+    def peak_memory():
+        """
+        进程的峰值内存(字节), 无法获取时为None
+        """
+        try:
+            import resource
+
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak * 1024  # linux下单位为KB
+        except ImportError:
+            pass
+        try:
+            import ctypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", ctypes.c_ulong),
+                    ("PageFaultCount", ctypes.c_ulong),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+            ctypes.windll.psapi.GetProcessMemoryInfo(
+                ctypes.windll.kernel32.GetCurrentProcess(),
+                ctypes.byref(counters),
+                counters.cb,
+            )
+            return counters.PeakWorkingSetSize
+        except Exception:
+            return None
+
+    def lap(self, name):
+        """结束当前子阶段(若有), 并开始名为name的子阶段"""
+        self.stop()
+        self.current = name
+        self.st_time = time.time()
+
+    def stop(self):
+        """结束当前子阶段"""
+        if self.current is None:
+            return
+        duration = time.time() - self.st_time
+        self.phases.append(
+            {
+                "name": self.current,
+                "duration": duration,
+                "peak_memory": self.peak_memory(),
+            }
+        )
+        Log.debug("PhaseTimer> %s (%.3fs)" % (self.current, duration))
+        self.current = None
+
+    def extract(self):
+        self.stop()
+        return {
+            "phases": self.phases,
+            "total": sum(i["duration"] for i in self.phases),
+        }
 
 
 class TaskExecutor:
+    STATUS_POLL_INTERVAL = 1  # 读取.sta文件的间隔(秒)
+    STA_WAIT_TIMEOUT = 300  # 等待.sta文件出现的最长时间(秒)
+    RESULT_STORAGE = {
+        "codec": Utils.CHANNEL_CODEC,  # 通道数据的压缩方式, None为原始float64
+        "downsample_tolerance": None,  # 降采样的相对容许误差, None为不降采样
+        "write_json": False,  # 是否同时写出odb_extract.json
+    }
+    RETENTION = (
+        None  # 任务参数未设置misc["retention"]时的保留策略(见Utils.apply_retention), None为全部保留
+    )
+
     def __init__(self, taskparams, workdir="."):
         self.taskparams = taskparams
         self.workdir = os.path.abspath(workdir)
         self.modeling_msg = {}
         self.calculating_msg = {}
+        self.extracting_msg = {}
 
         params = self.taskparams
         # ===一级释放
@@ -303,7 +807,11 @@ class TaskExecutor:
         self.performance = {
             "memory": performance_params["memory"],
             "num_cpus": performance_params["num_cpus"],
+            "num_domains": (
+                performance_params.get("num_domains") or performance_params["num_cpus"]
+            ),
             "num_gpus": performance_params["num_gpus"],
+            "auto": performance_params.get("auto", False),
         }
         static_step_params = self.misc["static_step"]
         self.static_step = {
@@ -318,7 +826,11 @@ class TaskExecutor:
             ),
             "continue_damping_factors": static_step_params["continue_damping_factors"],
             "adaptive_damping_ratio": static_step_params["adaptive_damping_ratio"],
+            "restart_frequency": static_step_params.get("restart_frequency", 0),
         }
+        self.result_storage = dict(self.RESULT_STORAGE)
+        self.result_storage.update(self.misc.get("result_storage", {}))
+        self.retention = self.misc.get("retention") or self.RETENTION
 
         # ===路径生成
         self.path_status = os.path.join(self.workdir, "%s.sta" % self.taskname)
@@ -329,7 +841,26 @@ class TaskExecutor:
             os.makedirs(self.path_result)
         self.path_avi = os.path.join(self.path_result, "animation.avi")
         self.path_odb_data_json = os.path.join(self.path_result, "odb_extract.json")
+        self.path_channels_header = os.path.join(self.path_result, "odb_channels.json")
+        self.path_channels_bin = os.path.join(self.path_result, "odb_channels.bin")
         self.path_param_copy_json = os.path.join(self.path_result, "task_params.json")
+        self.path_restart_chain = os.path.join(self.workdir, "restart_chain.json")
+        self.path_msg_json = os.path.join(self.path_result, "task_msg.json")
+        if os.path.isfile(self.path_msg_json):
+            # ===建模、计算、导出可能不在同一次运行中完成
+            task_msg = Utils.load_json(self.path_msg_json)
+            self.modeling_msg = task_msg.get("modeling_msg", {})
+            self.calculating_msg = task_msg.get("calculating_msg", {})
+
+    def save_msg(self):
+        """保存建模、计算信息(results/task_msg.json)"""
+        Utils.write_json(
+            {
+                "modeling_msg": self.modeling_msg,
+                "calculating_msg": self.calculating_msg,
+            },
+            self.path_msg_json,
+        )
 
     @property
     def edge_point(self):
@@ -373,6 +904,8 @@ class TaskExecutor:
         self.extract_odb_data()
 
     def modeling(self):
+        timer = PhaseTimer()
+        timer.lap("init")
         # ===ABAQUS初始化
         Log.log("TaskExecutor> Task running at: ", os.getcwd())
         Log.log("TaskExecutor> Model name is: ", self.taskname)
@@ -383,6 +916,7 @@ class TaskExecutor:
         x_len, y_len, z_len = self.x_len, self.y_len, self.z_len
         gap = self.gap
 
+        timer.lap("sketch")
         # ======创建部件======
         # ===混凝土
         s1 = task_model.ConstrainedSketch(name="__profile__", sheetSize=10000.0)
@@ -437,6 +971,7 @@ class TaskExecutor:
             s.unsetPrimaryObject()
             del task_model.sketches["__profile__"]
 
+        timer.lap("material_section")
         # ======创建材料======
         # ===材料-钢管
         mtl_tubelar = task_model.Material(name="mtl_tubelar")
@@ -561,6 +1096,7 @@ class TaskExecutor:
                 thicknessAssignment=FROM_SECTION,
             )
 
+        timer.lap("assembly")
         # ======装配=======
         a = task_model.rootAssembly
         # ===混凝土
@@ -617,6 +1153,7 @@ class TaskExecutor:
                     vector=tuple(pos),
                 )
                 self.insset_poles += (a1.instances[ins_name],)
+        timer.lap("boolean_merge")
         # ===Merge实例(钢管, 约束拉杆, 中心立杆)
         if self.union_exist:
             a1 = task_model.rootAssembly
@@ -631,6 +1168,7 @@ class TaskExecutor:
                 domain=BOTH,
             )  # 这一步会同时在part里面创建merge_union, 在instances中创建merge_union-1
 
+        timer.lap("step_interaction")
         # ======创建分析步======
         task_model.StaticStep(
             name="Step-1",
@@ -643,6 +1181,14 @@ class TaskExecutor:
             continueDampingFactors=self.static_step["continue_damping_factors"],
             adaptiveDampingRatio=self.static_step["adaptive_damping_ratio"],
         )
+        # ===重启动输出(每隔restart_frequency个增量步写出一次, 仅保留最新一次)
+        if self.static_step["restart_frequency"]:
+            task_model.steps["Step-1"].Restart(
+                frequency=self.static_step["restart_frequency"],
+                numberIntervals=0,
+                overlay=ON,
+                timeMarks=OFF,
+            )
 
         # ======相互作用======
         # ===设置参考点
@@ -844,6 +1390,7 @@ class TaskExecutor:
                 toleranceMethod=BOTH,
             )
 
+        timer.lap("mesh")
         # ======网格======
         # ===设置单元类型-桁架
         if self.union_exist:
@@ -896,6 +1443,7 @@ class TaskExecutor:
             )
         part_concrete.generateMesh()
 
+        timer.lap("output_job")
         # ======历程输出======
         # ===创建集
         a = task_model.rootAssembly
@@ -950,36 +1498,145 @@ class TaskExecutor:
             resultsFormat=ODB,
             multiprocessingMode=DEFAULT,
             numCpus=self.performance["num_cpus"],
-            numDomains=self.performance["num_cpus"],
+            numDomains=self.performance["num_domains"],
             numGPUs=self.performance["num_gpus"],
         )
+        timer.lap("save")
         # ======保存======
         mdb.saveAs(pathName=self.path_cae)
 
         Mdb()
+        self.modeling_msg = {"phase_timing": timer.extract()}
+        self.save_msg()
+
+    @property
+    def restart_chain(self):
+        """
+        作业链: 首个元素为原作业, 之后依次为各次重启动作业
 
-    def calculate(self):
+        Returns
+        ---
+        restart_chain : list[str]
+            作业名
+        """
+        if os.path.isfile(self.path_restart_chain):
+            return [str(i) for i in Utils.load_json(self.path_restart_chain)]
+        return [self.taskname]
+
+    def disk_usage(self):
+        """
+        作业链中各作业的文件(odb、重启动文件等)在工作目录中占用的字节数
+
+        Returns
+        ---
+        usage : dict
+            {"odb": odb的字节数, "work": 全部作业文件的字节数}
+        """
+        jobnames = set(self.restart_chain)
+        usage = {"odb": 0, "work": 0}
+        for name in os.listdir(self.workdir):
+            path = os.path.join(self.workdir, name)
+            stem, extension = os.path.splitext(name)
+            if stem not in jobnames or not os.path.isfile(path):
+                continue
+            size = os.path.getsize(path)
+            usage["work"] += size
+            if extension.lower() == ".odb":
+                usage["odb"] += size
+        return usage
+
+    @staticmethod
+    def last_increment(stafile):
+        """
+        读取.sta文件中分析步1最后一个收敛的增量步
+
+        Returns
+        ---
+        increment : int
+            增量步编号, 没有收敛的增量步时为0
+        """
+        increment = 0
+        if not os.path.isfile(stafile):
+            return increment
+        with io.open(stafile, "rt", encoding="gbk", errors="replace") as f:
+            for line in f:
+                items = line.split()
+                if len(items) < 3 or not all(i.isdigit() for i in items[:3]):
+                    continue  # 表头、cutback("1U")等非收敛行
+                if int(items[0]) == 1:
+                    increment = int(items[1])
+        return increment
+
+    def restart_point(self):
+        """
+        检查被中断的作业能否通过重启动继续计算
+
+        Returns
+        ---
+        restart_point : tuple[str, int] | None
+            (作为重启动来源的作业名, 重启动的增量步), 不能重启动时为None
+        """
+        frequency = self.static_step["restart_frequency"]
+        if not frequency:
+            return None
+        jobname = self.restart_chain[-1]
+        for suffix in ("res", "mdl", "stt", "prt", "odb"):
+            if not os.path.isfile(
+                os.path.join(self.workdir, "%s.%s" % (jobname, suffix))
+            ):
+                return None
+        stafile = os.path.join(self.workdir, "%s.sta" % jobname)
+        increment = self.last_increment(stafile) // frequency * frequency
+        if not increment:
+            return None
+        return jobname, increment
+
+    def calculate(self, history=()):
+        """
+        Parameters
+        ---
+        history : list[dict]
+            历史运行记录(见TaskScheduler.history), 自动调优(performance.auto)时使用
+        """
+        timer = PhaseTimer()
+        timer.lap("open_mdb")
         Mdb()
         openMdb(self.path_cae)
 
         # ======提交======
         # ===作业开始
+        timer.lap("submit")
         st_time = time.time()
+        jobname = self.taskname
         try:
-            mdb.jobs[self.taskname].submit()
+            if self.performance["auto"]:
+                self.performance = PerformanceTuner(history).tune(
+                    self.taskparams, self.performance
+                )
+                mdb.jobs[self.taskname].setValues(
+                    memory=self.performance["memory"],
+                    numCpus=self.performance["num_cpus"],
+                    numDomains=self.performance["num_domains"],
+                    numGPUs=self.performance["num_gpus"],
+                )
+            restart_point = self.restart_point()
+            if restart_point is not None:
+                jobname = self.__create_restart_job(*restart_point)
+            mdb.jobs[jobname].submit()
 
+            timer.lap("solve")
             job_running = True
-            stafile = self.path_status
+            stafile = os.path.join(self.workdir, "%s.sta" % jobname)
             # ===输出status
-            status_output = 300
+            status_output = int(self.STA_WAIT_TIMEOUT / self.STATUS_POLL_INTERVAL)
             while not os.path.isfile(stafile) and status_output:
-                time.sleep(1)
+                time.sleep(self.STATUS_POLL_INTERVAL)
                 status_output -= 1
             if status_output:
                 with io.open(stafile, "rt", encoding="gbk") as f:
                     f.seek(0, 0)
                     while job_running:
-                        time.sleep(1)
+                        time.sleep(self.STATUS_POLL_INTERVAL)
                         status_text = f.read()
                         if not status_text:
                             continue
@@ -993,34 +1650,90 @@ class TaskExecutor:
                                 and time.time() - st_time > self.meta["time_limit"]
                             ):
                                 raise Exception("job time out")
-                            Log.log(
+                            Log.debug(
                                 "TaskExecutor> %s (%.2fs)"
                                 % (line, time.time() - st_time)
                             )
-            mdb.jobs[self.taskname].waitForCompletion()
+            timer.lap("wait_completion")
+            mdb.jobs[jobname].waitForCompletion()
             job_running_time = time.time() - st_time
             Log.log("TaskExecutor> Job running time(s):", job_running_time)
             self.calculating_msg = {
                 "status": "success",
                 "job_running_time": job_running_time,
+                "restart_chain": self.restart_chain,
+                "performance": self.performance,
+                "disk_usage": self.disk_usage(),
             }
         except Exception:
             error = traceback.format_exc()
-            Log.log(error)
-            mdb.jobs[self.taskname].kill()
+            Log.error(error)
+            mdb.jobs[jobname].kill()
             self.calculating_msg = {"status": "error", "msg": str(error)}
 
         Mdb()
+        self.calculating_msg["phase_timing"] = timer.extract()
+        self.save_msg()
         return self.calculating_msg
 
+    def __create_restart_job(self, source_jobname, increment):
+        """
+        以source_jobname的第increment个增量步为起点, 创建重启动作业
+
+        Returns
+        ---
+        jobname : str
+            重启动作业名
+        """
+        restart_chain = self.restart_chain
+        jobname = "%s_restart%d" % (self.taskname, len(restart_chain))
+        Log.log(
+            "TaskExecutor> Resume %s from increment %d as %s"
+            % (source_jobname, increment, jobname)
+        )
+        restart_model = mdb.Model(name=jobname, objectToCopy=mdb.models[self.taskname])
+        restart_model.setValues(
+            restartJob=source_jobname,
+            restartStep="Step-1",
+            restartIncrement=increment,
+        )
+        source_job = mdb.jobs[self.taskname]
+        mdb.Job(
+            name=jobname,
+            model=jobname,
+            type=RESTART,
+            memory=source_job.memory,
+            memoryUnits=PERCENTAGE,
+            getMemoryFromAnalysis=True,
+            explicitPrecision=SINGLE,
+            nodalOutputPrecision=SINGLE,
+            resultsFormat=ODB,
+            multiprocessingMode=DEFAULT,
+            numCpus=source_job.numCpus,
+            numDomains=source_job.numDomains,
+            numGPUs=source_job.numGPUs,
+        )
+        Utils.write_json(restart_chain + [jobname], self.path_restart_chain)
+        return jobname
+
     def extract_odb_data(self):
+        timer = PhaseTimer()
+        timer.lap("open_odb")
         Mdb()
-        odbpath = self.path_odb
-        odb = session.openOdb(name=odbpath)
+        # ===按作业链依次打开odb(重启动作业的odb只包含重启动之后的历程)
+        odbs = []
+        for jobname in self.restart_chain:
+            odbpath = os.path.join(self.workdir, "%s.odb" % jobname)
+            try:
+                odbs.append(session.openOdb(name=odbpath))
+            except Exception:
+                Log.error(traceback.format_exc())
+        odb = odbs[-1]
 
         # ===保存应力应变曲线
+        timer.lap("history")
 
-        def extract_xydata(output_variable_name, index_=1):
+        def extract_xydata(output_variable_name, index_=1, odb=odb):
             xydata = xyPlot.XYDataFromHistory(
                 odb=odb,
                 outputVariableName=output_variable_name,
@@ -1030,51 +1743,71 @@ class TaskExecutor:
             )
             return list(map(lambda x: x[index_], xydata))
 
-        def get_point_data(point_name):
+        def get_point_data(point_name, odb=odb):
             point_data = {}
             point_data["time"] = extract_xydata(
-                "Reaction force: RF1 %s" % point_name, 0
+                "Reaction force: RF1 %s" % point_name, 0, odb
             )
             for i in ("RF1", "RF2", "RF3"):
                 point_data[i] = extract_xydata(
-                    "Reaction force: %s %s" % (i, point_name)
+                    "Reaction force: %s %s" % (i, point_name), odb=odb
                 )
 
             for i in ("RM1", "RM2", "RM3"):
                 point_data[i] = extract_xydata(
-                    "Reaction moment: %s %s" % (i, point_name)
+                    "Reaction moment: %s %s" % (i, point_name), odb=odb
                 )
 
             for i in ("UR1", "UR2", "UR3"):
                 point_data[i] = extract_xydata(
-                    "Rotational displacement: %s %s" % (i, point_name)
+                    "Rotational displacement: %s %s" % (i, point_name), odb=odb
                 )
 
             for i in ("U1", "U2", "U3"):
                 point_data[i] = extract_xydata(
-                    "Spatial displacement: %s %s" % (i, point_name)
+                    "Spatial displacement: %s %s" % (i, point_name), odb=odb
                 )
 
             return point_data
 
+        def get_chain_point_data(point_name):
+            chain_data = {}
+            for odb_ in odbs:
+                point_data = get_point_data(point_name, odb_)
+                if chain_data:
+                    # ===截去与后一段重叠的部分
+                    start = point_data["time"][0] if point_data["time"] else None
+                    keep = len(chain_data["time"])
+                    while (
+                        start is not None
+                        and keep
+                        and (chain_data["time"][keep - 1] >= start)
+                    ):
+                        keep -= 1
+                    for k in chain_data:
+                        chain_data[k] = chain_data[k][:keep] + point_data[k]
+                else:
+                    chain_data = point_data
+            return chain_data
+
         data = {
-            "bottom_referpoint": get_point_data(
+            "bottom_referpoint": get_chain_point_data(
                 "PI: rootAssembly Node 1 in NSET REFERPOINT_SET"
             ),
-            "top_referpoint": get_point_data(
+            "top_referpoint": get_chain_point_data(
                 "PI: rootAssembly Node 2 in NSET REFERPOINT_SET"
             ),
             "modeling_msg": self.modeling_msg,
             "calculating_msg": self.calculating_msg,
+            "extracting_msg": self.extracting_msg,
         }
-        Utils.write_json(
-            data,
-            self.path_odb_data_json,
-        )
+        timer.lap("write_json")
+        self.write_odb_data(data)
         Utils.write_json(self.taskparams, self.path_param_copy_json)
         Log.log("TaskExecutor> Json saved")
 
         # ===保存动画
+        timer.lap("animation")
         session.viewports["Viewport: 1"].odbDisplay.basicOptions.setValues(
             renderShellThickness=ON
         )
@@ -1099,55 +1832,1212 @@ class TaskExecutor:
         Log.log("TaskExecutor> Animation saved")
         Mdb()
 
+        # ===补充导出阶段的耗时(动画完成后才能得到)
+        self.extracting_msg["phase_timing"] = timer.extract()
+        self.write_odb_data(data)
+
+    def close_odbs(self):
+        """关闭session中打开的odb(删除或压缩odb之前)"""
+        for name in list(session.odbs.keys()):
+            session.odbs[name].close()
+
+    def apply_retention(self):
+        """
+        按保留策略(self.retention)处理求解文件, 须在导出完成后调用
+
+        Returns
+        ---
+        files : dict
+            见Utils.apply_retention, 未设置保留策略时为空
+        """
+        if self.retention is None:
+            return {}
+        self.close_odbs()
+        files, errors = Utils.apply_retention(
+            self.workdir, self.taskname, self.retention
+        )
+        reclaimed = sum(before - after for _, before, after in files.values())
+        # 部分文件出错时也记录已处理的文件
+        Log.log(
+            "TaskExecutor> Retention reclaimed %.1f MB from %d files, %d failed"
+            % (reclaimed / 1048576.0, len(files), len(errors)),
+            level="WARNING" if errors else "INFO",
+            event="retention",
+            files=files,
+            errors=errors,
+            reclaimed=reclaimed,
+        )
+        return files
+
+    def write_odb_data(self, data):
+        """
+        写出按通道存储的odb_channels.json/odb_channels.bin(压缩与降采样见result_storage),
+        result_storage["write_json"]为True时同时写出odb_extract.json
+        """
+        storage = self.result_storage
+        if storage["write_json"]:
+            Utils.write_json(data, self.path_odb_data_json)
+        elif os.path.isfile(self.path_odb_data_json):
+            os.remove(self.path_odb_data_json)  # 以免读取到之前导出的结果
+        Utils.write_channels(
+            data,
+            self.path_channels_header,
+            self.path_channels_bin,
+            ("bottom_referpoint", "top_referpoint"),
+            storage["codec"],
+            storage["downsample_tolerance"],
+        )
+
+
+class PerformanceTuner:
+    """
+    根据模型规模与主机空闲资源, 自动选择CPU数量、域数量、GPU与内存占用
+
+    Parameters
+    ---
+    history : list[dict]
+        历史运行记录(见TaskScheduler.history)
+        规模相近的历史任务中, 若记录了两种以上的设置, 则选择单位规模耗时最小的设置
+
+    Notes
+    ---
+    没有可参考的历史记录时:
+        - num_cpus = 单元数量 / ELEMENTS_PER_CPU(不超过主机空闲核数与任务参数中的num_cpus)
+        - num_domains = 单元数量 / ELEMENTS_PER_DOMAIN(不超过MAX_DOMAINS), 与num_cpus无关,
+          再向上取为num_cpus的整数倍(abaqus要求域数量为CPU数量的整数倍)
+        - 单元数量不小于GPU_MIN_ELEMENTS时才使用GPU(不超过任务参数中的num_gpus)
+        - memory不超过主机可用内存百分比
+    """
+
+    ELEMENTS_PER_CPU = 3000
+    ELEMENTS_PER_DOMAIN = 1500
+    MAX_DOMAINS = 32
+    GPU_MIN_ELEMENTS = 30000
+    SIMILAR_FACTOR = 2.0  # 单元数量在该倍数范围内的历史任务视为规模相近
+
+    def __init__(self, history=()):
+        self.history = list(history)
+
+    @staticmethod
+    def host_free_cpus():
+        """主机空闲核数(无法获取负载时为全部核数)"""
+        cpu_count = multiprocessing.cpu_count()
+        load = os.getloadavg()[0] if hasattr(os, "getloadavg") else 0
+        return max(1, int(cpu_count - load))
+
+    @staticmethod
+    def host_available_memory():
+        """主机可用内存百分比(无法获取时为None)"""
+        if os.path.isfile("/proc/meminfo"):
+            meminfo = {}
+            with open("/proc/meminfo") as f:
+                for line in f:
+                    key, value = line.split(":", 1)
+                    meminfo[key] = float(value.split()[0])
+            if "MemAvailable" in meminfo:
+                return 100.0 * meminfo["MemAvailable"] / meminfo["MemTotal"]
+            return None
+        try:
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [
+                    ("dwLength", ctypes.c_ulong),
+                    ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong),
+                    ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong),
+                    ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong),
+                    ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("sullAvailExtendedVirtual", ctypes.c_ulonglong),
+                ]
+
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return 100.0 - status.dwMemoryLoad
+        except Exception:
+            return None
+
+    def learned_setting(self, elements, free_cpus, max_gpus):
+        """
+        从规模相近的历史任务中选择单位规模耗时最小的设置
+
+        Returns
+        ---
+        setting : tuple[int, int, int] | None
+            (num_cpus, num_domains, num_gpus), 历史记录不足时为None
+        """
+        rates = {}
+        for record in self.history:
+            performance = record.get("performance")
+            if not performance:
+                continue
+            if not (
+                1.0 / self.SIMILAR_FACTOR
+                <= float(record["elements"]) / elements
+                <= self.SIMILAR_FACTOR
+            ):
+                continue
+            setting = (
+                performance["num_cpus"],
+                performance.get("num_domains") or performance["num_cpus"],
+                performance["num_gpus"],
+            )
+            if setting[0] > free_cpus or setting[2] > max_gpus:
+                continue
+            rates.setdefault(setting, []).append(
+                record["job_running_time"] / (record["elements"] * record["complexity"])
+            )
+        if len(rates) < 2:
+            return None
+        medians = dict((k, sorted(v)[len(v) // 2]) for k, v in rates.items())
+        return min(medians, key=lambda k: medians[k])
+
+    def heuristic_domains(self, elements, num_cpus):
+        """按模型规模选择域数量, 向上取为num_cpus的整数倍"""
+        num_domains = int(round(float(elements) / self.ELEMENTS_PER_DOMAIN))
+        num_domains = min(max(num_domains, 1), self.MAX_DOMAINS)
+        return int(math.ceil(float(num_domains) / num_cpus)) * num_cpus
+
+    def tune(self, taskparams, performance):
+        """
+        Parameters
+        ---
+        taskparams : dict
+            task_params.json中的task_params
+        performance : dict
+            任务参数中的设置, 其中的num_cpus, num_gpus, memory作为上限
+
+        Returns
+        ---
+        performance : dict
+            调优后的设置
+        """
+        elements = TaskScheduler.count_elements(taskparams)
+        free_cpus = min(self.host_free_cpus(), performance["num_cpus"])
+
+        setting = self.learned_setting(elements, free_cpus, performance["num_gpus"])
+        if setting is None:
+            num_cpus = int(round(float(elements) / self.ELEMENTS_PER_CPU))
+            num_cpus = min(max(num_cpus, 1), free_cpus)
+            num_domains = self.heuristic_domains(elements, num_cpus)
+            num_gpus = (
+                performance["num_gpus"] if elements >= self.GPU_MIN_ELEMENTS else 0
+            )
+            source = "heuristic"
+        else:
+            num_cpus, num_domains, num_gpus = setting
+            source = "history"
+
+        memory = performance["memory"]
+        available_memory = self.host_available_memory()
+        if available_memory is not None:
+            memory = int(max(min(memory, available_memory - 5), 10))
+
+        tuned = dict(performance)
+        tuned.update(
+            {
+                "memory": memory,
+                "num_cpus": num_cpus,
+                "num_domains": num_domains,
+                "num_gpus": num_gpus,
+            }
+        )
+        Log.log(
+            "PerformanceTuner> elements: %d, cpus: %d, domains: %d, gpus: %d, memory: %d%% (%s)"
+            % (elements, num_cpus, num_domains, num_gpus, memory, source)
+        )
+        return tuned
+
+
+class DiskAdmission:
+    """
+    作业启动前的磁盘空间准入控制
+
+    根据模型规模(单元数量)与输出请求(场输出帧数、重启动输出)估计作业在工作目录
+    (odb、重启动文件等)与scratch目录(求解器的临时文件)的磁盘占用,
+    任一磁盘的可用空间不足(须留有RESERVE_BYTES)时推迟该作业, 以免作业写满磁盘,
+    损坏自身及同一磁盘上其他作业的odb
+
+    Parameters
+    ---
+    scratch : str, default=None
+        求解器的scratch目录, 为None时取SCRATCH, 再为None时取环境变量TMPDIR, TEMP, TMP或系统临时目录
+    free_space : Callable[[str], int], default=None
+        返回路径所在磁盘可用字节数的函数(无法获取时返回None), 为None时使用host_free_space;
+        可注入模拟的磁盘配额以便测试
+    history : list[dict]
+        历史运行记录(见TaskScheduler.history)
+        有规模相近且记录了disk_usage的历史任务时, 按其单位单元数量的占用估计工作目录的占用
+
+    Notes
+    ---
+    没有可参考的历史记录时(均为经验值):
+        - 工作目录 = 单元数量 x (场输出帧数 x BYTES_PER_ELEMENT_FRAME + RESTART_BYTES_PER_ELEMENT)
+          场输出默认每个增量步一帧, 帧数取FRAMES与max_num_inc中的较小值;
+          不写出重启动文件(restart_frequency为0)时不计RESTART_BYTES_PER_ELEMENT
+        - scratch = 单元数量 x SCRATCH_BYTES_PER_ELEMENT
+        - 均乘以SAFETY_FACTOR; 工作目录与scratch在同一磁盘时两者相加
+    """
+
+    SCRATCH = None
+    BYTES_PER_ELEMENT_FRAME = 150
+    FRAMES = 200
+    RESTART_BYTES_PER_ELEMENT = 2000
+    SCRATCH_BYTES_PER_ELEMENT = 20000
+    SAFETY_FACTOR = 1.5
+    RESERVE_BYTES = 1 << 30  # 磁盘须保留的可用空间
+    SIMILAR_FACTOR = 2.0  # 单元数量在该倍数范围内的历史任务视为规模相近
+
+    def __init__(self, scratch=None, free_space=None, history=()):
+        self.scratch = scratch
+        self.free_space = free_space or self.host_free_space
+        self.history = list(history)
+
+    @staticmethod
+    def host_free_space(path):
+        """路径所在磁盘的可用字节数(无法获取时为None)"""
+        if hasattr(os, "statvfs"):
+            stat = os.statvfs(path)
+            return stat.f_bavail * stat.f_frsize
+        try:
+            import ctypes
+
+            free_bytes = ctypes.c_ulonglong(0)
+            ctypes.windll.kernel32.GetDiskFreeSpaceExW(
+                ctypes.c_wchar_p(os.path.abspath(path)),
+                ctypes.byref(free_bytes),
+                None,
+                None,
+            )
+            return free_bytes.value
+        except Exception:
+            return None
+
+    @property
+    def scratch_dir(self):
+        scratch = self.scratch or self.SCRATCH
+        if scratch:
+            return scratch
+        for key in ("TMPDIR", "TEMP", "TMP"):
+            if os.environ.get(key):
+                return os.environ[key]
+        return tempfile.gettempdir()
+
+    @staticmethod
+    def same_volume(path_1, path_2):
+        """两个路径是否在同一磁盘(无法判断时视为同一磁盘)"""
+        try:
+            device_1, device_2 = os.stat(path_1).st_dev, os.stat(path_2).st_dev
+        except OSError:
+            return True
+        return device_1 == device_2 or not (device_1 and device_2)
+
+    def estimate(self, taskparams):
+        """
+        估计作业的磁盘占用
+
+        Parameters
+        ---
+        taskparams : dict
+            task_params.json中的task_params(或TaskScheduler.summary)
+
+        Returns
+        ---
+        estimate : dict
+            {"elements": 单元数量, "work": 工作目录的字节数, "scratch": scratch的字节数,
+            "source": "heuristic" | "history"}, 字节数已乘以SAFETY_FACTOR
+        """
+        elements = TaskScheduler.count_elements(taskparams)
+        static_step = taskparams["misc"]["static_step"]
+        rates = sorted(
+            float(record["disk_usage"]["work"]) / record["elements"]
+            for record in self.history
+            if record.get("disk_usage")
+            and 1.0 / self.SIMILAR_FACTOR
+            <= float(record["elements"]) / elements
+            <= self.SIMILAR_FACTOR
+        )
+        if rates:
+            work = rates[len(rates) // 2] * elements
+            source = "history"
+        else:
+            frames = min(self.FRAMES, static_step["max_num_inc"])
+            per_element = frames * self.BYTES_PER_ELEMENT_FRAME
+            if static_step.get("restart_frequency", 0):
+                per_element += self.RESTART_BYTES_PER_ELEMENT
+            work = per_element * elements
+            source = "heuristic"
+        return {
+            "elements": elements,
+            "work": int(work * self.SAFETY_FACTOR),
+            "scratch": int(
+                elements * self.SCRATCH_BYTES_PER_ELEMENT * self.SAFETY_FACTOR
+            ),
+            "source": source,
+        }
+
+    def check(self, taskparams, workdir):
+        """
+        检查工作目录与scratch所在磁盘的可用空间是否足够
+
+        Returns
+        ---
+        result : dict
+            {"admitted": bool, "estimate": 见estimate,
+            "volumes": [{"path", "free": 可用字节数, "required": 所需字节数(含RESERVE_BYTES)}]}
+            无法获取可用空间的磁盘不限制
+        """
+        estimate = self.estimate(taskparams)
+        scratch = self.scratch_dir
+        if self.same_volume(workdir, scratch):
+            requirements = [(workdir, estimate["work"] + estimate["scratch"])]
+        else:
+            requirements = [(workdir, estimate["work"]), (scratch, estimate["scratch"])]
+        volumes = []
+        admitted = True
+        for path, required in requirements:
+            free = self.free_space(path)
+            required += self.RESERVE_BYTES
+            volumes.append({"path": path, "free": free, "required": required})
+            if free is not None and free < required:
+                admitted = False
+        return {"admitted": admitted, "estimate": estimate, "volumes": volumes}
+
+
+class TaskScheduler:
+    """
+    任务队列排序
+
+    根据任务规模(单元数量、拉杆布置复杂度)与历史运行时间估计任务耗时, 并按策略排序
+
+    Parameters
+    ---
+    task_warehouse : str
+        任务仓库路径
+    policy : {"listdir", "sjf", "priority", "deadline"}
+        - listdir: 保持os.listdir的顺序
+        - sjf: 短作业优先(按估计耗时升序)
+        - priority: 按comments中的priority降序(未设置视为0), 同优先级短作业优先
+        - deadline: 按comments中的deadline(时间戳)升序(未设置排在最后), 同截止时间短作业优先
+    """
+
+    POLICIES = ("listdir", "sjf", "priority", "deadline")
+    HISTORY_FILENAME = "runtime_history.json"
+    HISTORY_NEIGHBORS = 5  # 参考单元数量最接近的几个历史任务
+    SUMMARY_KEYS = ("meta", "geometry", "rod_pattern", "misc", "comments")
+
+    def __init__(self, task_warehouse, policy="sjf"):
+        if policy not in self.POLICIES:
+            raise ValueError("%s not a supported policy" % policy)
+        self.task_warehouse = task_warehouse
+        self.policy = policy
+        self.path_history = os.path.join(task_warehouse, self.HISTORY_FILENAME)
+        self.history = self.load_history()
+        self.summaries = {}  # 任务文件夹 -> [task_params.json的(修改时间, 大小), 任务参数摘要]
+
+    def summary(self, task_folder):
+        """
+        排序与准入控制所需的任务参数(task_params中SUMMARY_KEYS的部分, 不含材料表)
+
+        按task_params.json的修改时间与大小缓存, 同一个调度器多次排序(比如守护模式)时,
+        只重新解析新增或修改过的任务
+        """
+        path = os.path.join(task_folder, "task_params.json")
+        stat = os.stat(path)
+        signature = [stat.st_mtime, stat.st_size]
+        cached = self.summaries.get(task_folder)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        taskparams = Utils.load_json(path)["task_params"]
+        summary = dict((k, taskparams.get(k)) for k in self.SUMMARY_KEYS)
+        self.summaries[task_folder] = [signature, summary]
+        return summary
+
+    @staticmethod
+    def count_elements(taskparams):
+        """
+        估计模型的单元数量
+
+        Parameters
+        ---
+        taskparams : dict
+            task_params.json中的task_params
+
+        Returns
+        ---
+        number : int
+            混凝土实体单元、钢管壳单元、拉杆与立杆桁架单元的数量之和
+        """
+        geometry = taskparams["geometry"]
+        rod_pattern = taskparams["rod_pattern"]
+        lens = (geometry["x_len"], geometry["y_len"], geometry["z_len"])
+        concrete = [
+            max(int(round(i / j)), 1)
+            for i, j in zip(lens, geometry["concrete_grid_size"])
+        ]
+        steel = [
+            max(int(round(i / j)), 1) for i, j in zip(lens, geometry["steel_grid_size"])
+        ]
+        number = concrete[0] * concrete[1] * concrete[2]
+        number += 2 * (steel[0] + steel[1]) * steel[2]
+        number += (
+            int(rod_pattern["number_layers"])
+            * len(rod_pattern["pattern_rod"])
+            * max(steel[0], steel[1])
+        )
+        number += len(rod_pattern["pattern_pole"]) * steel[2]
+        return number
+
+    @staticmethod
+    def rod_complexity(taskparams):
+        """拉杆布置复杂度系数(拉杆、立杆越多, Merge与内置约束的开销越大)"""
+        rod_pattern = taskparams["rod_pattern"]
+        number = int(rod_pattern["number_layers"]) * len(rod_pattern["pattern_rod"])
+        number += len(rod_pattern["pattern_pole"])
+        return 1.0 + 0.02 * number
+
+    def load_history(self):
+        if not os.path.isfile(self.path_history):
+            return []
+        try:
+            return Utils.load_json(self.path_history)
+        except ValueError:
+            Log.warning("TaskScheduler> Broken history file: %s" % self.path_history)
+            return []
+
+    def record(self, taskparams, job_running_time, performance=None, disk_usage=None):
+        """记录一个完成计算的任务的运行时间、所用的性能设置及作业文件的磁盘占用"""
+        self.history.append(
+            {
+                "taskname": taskparams["meta"]["taskname"],
+                "elements": self.count_elements(taskparams),
+                "complexity": self.rod_complexity(taskparams),
+                "job_running_time": job_running_time,
+                "performance": performance,
+                "disk_usage": disk_usage,
+            }
+        )
+        Utils.write_json(self.history, self.path_history)
+
+    def estimate_cost(self, taskparams):
+        """
+        估计任务耗时
+
+        Returns
+        ---
+        cost : float
+            有历史记录时, 为参考相近历史任务换算得到的运行时间(秒);
+            否则为「单元数量 x 复杂度系数」(仅可用于比较大小)
+        """
+        elements = self.count_elements(taskparams)
+        complexity = self.rod_complexity(taskparams)
+        weight = elements * complexity
+        if not self.history:
+            return float(weight)
+
+        # ===取单元数量最接近的历史任务, 按「单位规模耗时」换算
+        neighbors = sorted(
+            self.history,
+            key=lambda i: abs(math.log(float(i["elements"]) / elements)),
+        )[: self.HISTORY_NEIGHBORS]
+        rates = sorted(
+            i["job_running_time"] / (i["elements"] * i["complexity"]) for i in neighbors
+        )
+        return rates[len(rates) // 2] * weight
+
+    @staticmethod
+    def parse_deadline(deadline):
+        """deadline可以是时间戳, 也可以是"%Y-%m-%d %H:%M"格式的字符串"""
+        if deadline is None:
+            return float("inf")
+        if isinstance(deadline, (int, float)):
+            return float(deadline)
+        return time.mktime(time.strptime(str(deadline), "%Y-%m-%d %H:%M"))
+
+    def sort(self, task_folder_list):
+        """
+        对任务文件夹排序
+
+        Parameters
+        ---
+        task_folder_list : list[str]
+            任务文件夹路径
+
+        Returns
+        ---
+        task_folder_list : list[str]
+            排序后的任务文件夹路径
+        """
+        if self.policy == "listdir":
+            return list(task_folder_list)
+
+        keys = {}
+        pending = set(task_folder_list)
+        for task_folder in list(self.summaries):
+            if task_folder not in pending:
+                del self.summaries[task_folder]
+        for task_folder in task_folder_list:
+            try:
+                taskparams = self.summary(task_folder)
+                cost = self.estimate_cost(taskparams)
+                comments = taskparams.get("comments") or {}
+            except Exception:
+                Log.error(traceback.format_exc())
+                cost, comments = float("inf"), {}
+
+            if self.policy == "sjf":
+                keys[task_folder] = (cost,)
+            elif self.policy == "priority":
+                try:
+                    priority = float(comments.get("priority", 0))
+                except (TypeError, ValueError):
+                    Log.warning(
+                        "TaskScheduler> Invalid priority of %s: %r"
+                        % (os.path.basename(task_folder), comments.get("priority"))
+                    )
+                    priority = 0.0
+                keys[task_folder] = (-priority, cost)
+            elif self.policy == "deadline":
+                try:
+                    deadline = self.parse_deadline(comments.get("deadline"))
+                except (TypeError, ValueError):
+                    Log.warning(
+                        "TaskScheduler> Invalid deadline of %s: %r"
+                        % (os.path.basename(task_folder), comments.get("deadline"))
+                    )
+                    deadline = float("inf")
+                keys[task_folder] = (deadline, cost)
+            Log.debug(
+                "TaskScheduler> %s cost: %.1f" % (os.path.basename(task_folder), cost)
+            )
+        return sorted(task_folder_list, key=lambda i: keys[i] + (i,))
+
+
+class TaskJournal:
+    """
+    任务仓库的扫描日志, 用于增量扫描
+
+    记录已完成(没有"TODO")的任务文件夹与非任务文件夹, 以及文件夹和task_status.json的修改时间;
+    再次扫描时, 两者均未改变的文件夹不再读取task_status.json
+
+    Parameters
+    ---
+    task_warehouse : str
+        任务仓库路径, 日志保存在任务仓库下的JOURNAL_FILENAME
+
+    Notes
+    ---
+    - 新建、删除文件夹中的文件会改变文件夹的修改时间, 重新写出task_status.json会改变其修改时间,
+      因此重新生成任务(gene_task_folder)或修改任务状态后, 该文件夹会被重新读取
+    - 日志只用于加速, 损坏或删除后会重新完整扫描
+    """
+
+    JOURNAL_FILENAME = "scan_journal.json"
+
+    def __init__(self, task_warehouse):
+        self.path = os.path.join(task_warehouse, self.JOURNAL_FILENAME)
+        self.folders = {}  # 文件夹名 -> [文件夹修改时间, task_status.json修改时间, 状态]
+        if os.path.isfile(self.path):
+            try:
+                self.folders = Utils.load_json(self.path)["folders"]
+            except (ValueError, KeyError):
+                Log.warning("TaskJournal> Broken journal file: %s" % self.path)
+
+    @staticmethod
+    def signature(path):
+        """(文件夹修改时间, task_status.json修改时间), 没有task_status.json时后者为None"""
+        path_taskstatus = os.path.join(path, "task_status.json")
+        return [
+            os.path.getmtime(path),
+            (
+                os.path.getmtime(path_taskstatus)
+                if os.path.isfile(path_taskstatus)
+                else None
+            ),
+        ]
+
+    def is_unchanged(self, name, signature):
+        entry = self.folders.get(name)
+        return entry is not None and entry[:2] == signature
+
+    def mark(self, name, signature, state):
+        """
+        Parameters
+        ---
+        state : {"finished", "nontask"}
+        """
+        self.folders[name] = signature + [state]
+
+    def refresh(self, path):
+        """任务执行后, 若已没有"TODO"则记为已完成"""
+        path_taskstatus = os.path.join(path, "task_status.json")
+        name = os.path.basename(path)
+        if "TODO" in Utils.load_json(path_taskstatus).values():
+            self.folders.pop(name, None)
+        else:
+            self.mark(name, self.signature(path), "finished")
+
+    def prune(self, names):
+        """删除已不存在的文件夹"""
+        names = set(names)
+        for name in list(self.folders):
+            if name not in names:
+                self.folders.pop(name)
+
+    def save(self):
+        Utils.write_json({"folders": self.folders}, self.path)
+
+
+class TaskClient:
+    """
+    任务服务(task_server.py)的客户端, 复用同一个HTTP连接(keep-alive)
+
+    Parameters
+    ---
+    server : str
+        任务服务地址, 比如"http://127.0.0.1:8765"
+    worker : str, default=None
+        本机标识, 为None时使用"主机名-进程号"
+    timeout : float, default=60
+        超时(秒)
+    """
+
+    def __init__(self, server, worker=None, timeout=60):
+        parsed = urlparse.urlparse(server)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.worker = worker or "%s-%d" % (socket.gethostname(), os.getpid())
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, body=None, content_type="application/json"):
+        """发送请求并解析json响应, 连接被服务端关闭时重连一次"""
+        for attempt in (0, 1):
+            if self.connection is None:
+                self.connection = httplib.HTTPConnection(
+                    self.host, self.port, timeout=self.timeout
+                )
+            try:
+                self.connection.request(
+                    method, path, body, {"Content-Type": content_type}
+                )
+                response = self.connection.getresponse()
+                data = response.read()
+            except (httplib.HTTPException, socket.error):
+                self.close()
+                if attempt:
+                    raise
+                continue
+            if response.status >= 400:
+                raise Exception(
+                    "TaskClient> %s %s failed: %d %s"
+                    % (method, path, response.status, data)
+                )
+            return json.loads(data) if data else None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    @staticmethod
+    def quote(text, safe=""):
+        """URL编码(返回str, 避免unicode的URL与二进制请求体拼接出错)"""
+        if isinstance(text, unicode):
+            text = text.encode("utf-8")
+        return urllib.quote(text, safe=safe)
+
+    def lease(self, limit=1):
+        """领取至多limit个任务"""
+        body = json.dumps({"worker": self.worker, "limit": limit})
+        return self.request("POST", "/lease", body)["tasks"]
+
+    def report_status(self, taskname, status):
+        body = json.dumps(status)
+        self.request("PUT", "/tasks/%s/status" % self.quote(taskname), body)
+
+    def report_failure(self, taskname, error):
+        """报告任务执行出错(释放租约), 服务端在失败达到一定次数后不再分配该任务"""
+        body = json.dumps({"worker": self.worker, "error": error})
+        self.request("POST", "/tasks/%s/fail" % self.quote(taskname), body)
+
+    def release(self, taskname):
+        """归还领取的任务(释放租约, 不记为失败), 由服务端重新分配"""
+        body = json.dumps({"worker": self.worker})
+        self.request("POST", "/tasks/%s/release" % self.quote(taskname), body)
+
+    def upload(self, taskname, relpath, path):
+        """上传文件, relpath为results/<文件名>或<文件名>"""
+        with open(path, "rb") as f:
+            data = f.read()
+        self.request(
+            "PUT",
+            "/tasks/%s/files/%s" % (self.quote(taskname), self.quote(relpath, "/")),
+            data,
+            "application/octet-stream",
+        )
+
 
 class TaskHandler:
     TASK_WAREHOUSE = os.path.join(ORIGIN_WORKDIR, "tasks")
+    QUEUE_POLICY = "sjf"  # 任务排序策略, 见TaskScheduler
+    RUN_MODE = "folder"  # 运行模式, "folder"(执行一遍后退出) | "daemon"(守护模式)
+    DAEMON_POLL_INTERVAL = 10  # 守护模式下, 没有任务时扫描任务仓库的间隔(秒)
+    DAEMON_CONTROL_FILENAME = "daemon_control.json"
+    DAEMON_STATUS_FILENAME = "daemon_status.json"
+    TASK_SERVER = "http://127.0.0.1:8765"  # 网络模式的任务服务地址
+    NETWORK_BATCH_SIZE = 4  # 网络模式下每次领取的任务数量
+    NETWORK_UPLOAD_EXCLUDE = ()  # 网络模式下不上传的结果文件, 比如("animation.avi",)
+    DISK_ADMISSION = DiskAdmission()  # 作业启动前的磁盘空间准入控制, None为不检查
+    DISK_WAIT_INTERVAL = 60  # 全部任务因磁盘空间不足被推迟时, 重新检查的间隔(秒)
+    DISK_WAIT_TIMEOUT = 6 * 3600  # 等待磁盘空间的最长时间(秒), 超过后放弃(任务保持TODO)
 
     @classmethod
-    def run_mode_folder(cla, task_warehouse=TASK_WAREHOUSE):
+    def run(cla):
+        """按RUN_MODE运行, RUN_MODE为"network"时从TASK_SERVER领取任务"""
+        if cla.RUN_MODE == "daemon":
+            return cla.run_mode_daemon()
+        if cla.RUN_MODE == "network":
+            return cla.run_mode_network()
+        return cla.run_mode_folder()
+
+    @classmethod
+    def run_mode_network(
+        cla, server=TASK_SERVER, task_warehouse=TASK_WAREHOUSE, batch_size=None
+    ):
+        """
+        网络模式: 从任务服务(task_server.py)按批次领取任务, 在本地任务仓库中执行,
+        再将结果文件(results文件夹与task_log.jsonl)与任务状态上传, 直到服务端没有任务
+
+        磁盘空间不足(见DiskAdmission)的任务立即归还服务端(不记为失败), 可以分配给其他主机;
+        领取的整批任务都被归还时, 每隔DISK_WAIT_INTERVAL秒重新领取,
+        持续DISK_WAIT_TIMEOUT秒仍不能执行时退出
+
+        Parameters
+        ---
+        server : str
+            任务服务地址
+        task_warehouse : str
+            本地任务仓库路径(执行任务的工作目录)
+        batch_size : int, default=None
+            每次领取的任务数量, 为None时使用TaskHandler.NETWORK_BATCH_SIZE
+        """
+        task_warehouse = os.path.abspath(task_warehouse)
+        client = TaskClient(server)
+        try:
+            if not os.path.exists(task_warehouse):
+                os.makedirs(task_warehouse)
+            cla.__run_mode_network(
+                client, task_warehouse, batch_size or cla.NETWORK_BATCH_SIZE
+            )
+        finally:
+            client.close()
+            os.chdir(ORIGIN_WORKDIR)
+        Log.log("Tasks completed!!!!!!!!!")
+
+    @classmethod
+    def __run_mode_network(cla, client, task_warehouse, batch_size):
+        scheduler = TaskScheduler(task_warehouse, cla.QUEUE_POLICY)
+        waiting_since = None
+        while True:
+            tasks = client.lease(batch_size)
+            Log.log("TaskHandler> Leased %d tasks from %s" % (len(tasks), client.host))
+            if not tasks:
+                break
+            task_folders = []
+            for task in tasks:
+                taskname = task["taskname"]
+                task_folder = os.path.join(task_warehouse, taskname)
+                task_folders.append(task_folder)
+                if not os.path.isdir(task_folder):
+                    os.makedirs(task_folder)
+                path_taskstatus = os.path.join(task_folder, "task_status.json")
+                Utils.write_json(
+                    task["raw_task_params"],
+                    os.path.join(task_folder, "task_params.json"),
+                )
+                Utils.write_json(
+                    task["comments"], os.path.join(task_folder, "comments.json")
+                )
+                if not os.path.isfile(path_taskstatus):
+                    # 本地已有的状态(比如中断后重新领取)优先, 以便断点续算
+                    Utils.write_json(task["status"], path_taskstatus)
+
+            def execute(task_folder):
+                taskname = os.path.basename(task_folder)
+                path_taskstatus = os.path.join(task_folder, "task_status.json")
+                error = None
+                try:
+                    # 开始执行前续期租约
+                    client.report_status(taskname, Utils.load_json(path_taskstatus))
+                    cla.__execute_taskfolder(task_folder, scheduler)
+                except Exception:
+                    error = traceback.format_exc()
+                    Log.error(error)
+                try:
+                    if error is None and "TODO" in (
+                        Utils.load_json(path_taskstatus).values()
+                    ):
+                        error = "TaskHandler> Task unfinished after execution"
+                    cla.__upload_taskfolder(client, taskname, task_folder, error)
+                except Exception:
+                    Log.error(traceback.format_exc())
+
+            # 磁盘空间不足的任务立即归还, 以免占用租约等待空间、租约到期后被记为失败
+            deferred = []
+            for task_folder in task_folders:
+                if cla.__admit(task_folder, scheduler):
+                    execute(task_folder)
+                    continue
+                deferred.append(task_folder)
+                try:
+                    client.release(os.path.basename(task_folder))
+                except Exception:
+                    Log.error(traceback.format_exc())
+            if len(deferred) < len(task_folders):
+                waiting_since = None
+                continue
+            if waiting_since is None:
+                waiting_since = time.time()
+            elif time.time() - waiting_since >= cla.DISK_WAIT_TIMEOUT:
+                Log.error(
+                    "TaskHandler> Gave up waiting for disk space, %d tasks released"
+                    % len(deferred),
+                    event="disk_timeout",
+                    task_folders=deferred,
+                )
+                break
+            time.sleep(cla.DISK_WAIT_INTERVAL)
+
+    @classmethod
+    def __upload_taskfolder(cla, client, taskname, task_folder, error=None):
+        """
+        上传结果文件, 最后上传任务状态(服务端以此判断任务完成)
+
+        执行出错(error不为None)时, 以报告失败代替上传任务状态, 以免续期租约后被无限次重新分配
+        """
+        path_result = os.path.join(task_folder, "results")
+        if os.path.isdir(path_result):
+            for filename in sorted(os.listdir(path_result)):
+                path = os.path.join(path_result, filename)
+                if filename in cla.NETWORK_UPLOAD_EXCLUDE or not os.path.isfile(path):
+                    continue
+                client.upload(taskname, "results/%s" % filename, path)
+        path_log = os.path.join(task_folder, Log.TASK_LOG_FILENAME)
+        if os.path.isfile(path_log):
+            Log.flush()
+            client.upload(taskname, Log.TASK_LOG_FILENAME, path_log)
+        if error is not None:
+            client.report_failure(taskname, error)
+            return
+        client.report_status(
+            taskname, Utils.load_json(os.path.join(task_folder, "task_status.json"))
+        )
+
+    @classmethod
+    def run_mode_folder(cla, task_warehouse=TASK_WAREHOUSE, policy=None):
         """
         程序会在指定目录(task_warehouse)自动寻找所有带有task_params.json的文件夹
         这个文件夹中, 会有一个task_status.json标识任务的工作状态。该json文件储存一个字典。
 
+        Parameters
+        ---
+        task_warehouse : str
+            任务仓库路径
+        policy : str, default=None
+            任务排序策略(见TaskScheduler), 为None时使用TaskHandler.QUEUE_POLICY
+
         Notes : task_status.json
         ---
         有modelled, calculated, extracted三个key, 分别代表该任务是否建模, 是否运算完成, 是否导出数据
             - 未开始任务时, 值为"TODO"
             - 不需要执行该项, 值为"SKIP"
             - 完成任务时, 值为完成任务的时间戳
+
+        Notes : comments
+        ---
+        排序策略为priority/deadline时, 读取task_params.json中的任务备注
+        (task_params["comments"], 即AbaqusData.comments)中的
+            - priority : 优先级, 数值越大越先执行
+            - deadline : 截止时间, 时间戳或"%Y-%m-%d %H:%M"格式的字符串
+            无法解析的值视为未设置
         """
         try:
             if not os.path.exists(task_warehouse):
                 os.makedirs(task_warehouse)
-            cla.__run_mode_folder(task_warehouse)
+            cla.__run_mode_folder(
+                task_warehouse, cla.QUEUE_POLICY if policy is None else policy
+            )
         finally:
             os.chdir(ORIGIN_WORKDIR)
         Log.log("Tasks completed!!!!!!!!!")
 
     @classmethod
-    def __run_mode_folder(cla, task_warehouse=TASK_WAREHOUSE):
-        Log.log("TaskHandler> Finding task at %s" % task_warehouse)
+    def __run_mode_folder(cla, task_warehouse=TASK_WAREHOUSE, policy=QUEUE_POLICY):
         # ===查找需要执行的任务
+        journal = TaskJournal(task_warehouse)
+        task_folder_list = cla.__scan_warehouse(task_warehouse, journal)
+
+        # ===任务排序
+        scheduler = TaskScheduler(task_warehouse, policy)
+        task_folder_list = scheduler.sort(task_folder_list)
+
+        # ===开始执行任务
+        def execute(task_folder):
+            try:
+                cla.__execute_taskfolder(task_folder, scheduler)
+            except Exception:
+                error = traceback.format_exc()
+                Log.error(error)
+            try:
+                journal.refresh(task_folder)
+                journal.save()
+            except Exception:
+                Log.error(traceback.format_exc())
+
+        cla.__execute_with_admission(task_folder_list, scheduler, execute)
+
+    @classmethod
+    def __admit(cla, task_folder, scheduler):
+        """
+        任务是否可以开始执行: 尚需计算的任务须通过磁盘空间准入控制(见DiskAdmission)
+
+        检查出错时(比如任务参数不完整)放行, 由执行过程报告错误
+        """
+        admission = cla.DISK_ADMISSION
+        if admission is None:
+            return True
+        try:
+            status = Utils.load_json(os.path.join(task_folder, "task_status.json"))
+            if status.get("calculated") != "TODO":
+                return True
+            admission.history = scheduler.history
+            result = admission.check(scheduler.summary(task_folder), task_folder)
+        except Exception:
+            Log.error(traceback.format_exc())
+            return True
+        if not result["admitted"]:
+            Log.warning(
+                "TaskHandler> Deferred %s: not enough disk space (%s)"
+                % (
+                    os.path.basename(task_folder),
+                    ", ".join(
+                        "%s: %.1f GB free, %.1f GB required"
+                        % (
+                            i["path"],
+                            i["free"] / 1073741824.0,
+                            i["required"] / 1073741824.0,
+                        )
+                        for i in result["volumes"]
+                        if i["free"] is not None
+                    ),
+                ),
+                event="disk_deferred",
+                task_folder=task_folder,
+                **result
+            )
+        return result["admitted"]
+
+    @classmethod
+    def __execute_with_admission(cla, task_folder_list, scheduler, execute):
+        """
+        按顺序执行任务, 磁盘空间不足的任务推迟到其余任务之后重新检查
+
+        全部剩余任务都被推迟时, 每隔DISK_WAIT_INTERVAL秒重新检查(等待其他作业完成、
+        保留策略或人工释放空间), 持续DISK_WAIT_TIMEOUT秒仍不能执行时放弃(任务保持TODO)
+
+        Parameters
+        ---
+        execute : Callable[[str], None]
+            执行一个任务文件夹
+        """
+        pending = list(task_folder_list)
+        waiting_since = None
+        while pending:
+            deferred = []
+            for task_folder in pending:
+                if cla.__admit(task_folder, scheduler):
+                    execute(task_folder)
+                else:
+                    deferred.append(task_folder)
+            if len(deferred) < len(pending):
+                waiting_since = None
+            elif waiting_since is None:
+                waiting_since = time.time()
+            elif time.time() - waiting_since >= cla.DISK_WAIT_TIMEOUT:
+                Log.error(
+                    "TaskHandler> Gave up %d tasks waiting for disk space"
+                    % len(deferred),
+                    event="disk_timeout",
+                    task_folders=deferred,
+                )
+                break
+            if deferred and waiting_since is not None:
+                time.sleep(cla.DISK_WAIT_INTERVAL)
+            pending = deferred
+
+    @classmethod
+    def run_mode_daemon(cla, task_warehouse=TASK_WAREHOUSE, policy=None):
+        """
+        守护模式: 保持CAE内核运行, 持续领取任务仓库中新出现的任务, 只需启动一次CAE
+
+        每执行完一个任务都会重新(增量)扫描任务仓库并排序, 因此新任务会按排序策略插队;
+        没有任务时每隔DAEMON_POLL_INTERVAL秒扫描一次
+
+        Parameters
+        ---
+        task_warehouse : str
+            任务仓库路径
+        policy : str, default=None
+            任务排序策略(见TaskScheduler), 为None时使用TaskHandler.QUEUE_POLICY
+
+        Notes : daemon_control.json
+        ---
+        任务仓库下的控制文件, {"command": "run" | "drain" | "stop"}, 启动时重置为"run"
+            - run : 持续运行
+            - drain : 执行完任务仓库中的任务后退出
+            - stop : 当前任务完成后退出
+
+        Notes : daemon_status.json
+        ---
+        任务仓库下的状态文件
+        {"pid", "state": "idle" | "running" | "waiting_disk" | "stopped", "current_task", "executed", "started", "heartbeat"}
+        """
+        task_warehouse = os.path.abspath(task_warehouse)
+        try:
+            if not os.path.exists(task_warehouse):
+                os.makedirs(task_warehouse)
+            cla.__run_mode_daemon(
+                task_warehouse, cla.QUEUE_POLICY if policy is None else policy
+            )
+        finally:
+            os.chdir(ORIGIN_WORKDIR)
+        Log.log("TaskHandler> Daemon stopped")
+
+    @classmethod
+    def __run_mode_daemon(cla, task_warehouse, policy):
+        path_control = os.path.join(task_warehouse, cla.DAEMON_CONTROL_FILENAME)
+        path_status = os.path.join(task_warehouse, cla.DAEMON_STATUS_FILENAME)
+        Utils.write_json({"command": "run"}, path_control)
+
+        daemon_status = {
+            "pid": os.getpid(),
+            "state": "idle",
+            "current_task": None,
+            "executed": 0,
+            "started": time.time(),
+        }
+
+        def report(**kwargs):
+            daemon_status.update(kwargs)
+            daemon_status["heartbeat"] = time.time()
+            Utils.write_json(daemon_status, path_status)
+
+        def command():
+            try:
+                return Utils.load_json(path_control).get("command", "run")
+            except Exception:
+                return "run"
+
+        journal = TaskJournal(task_warehouse)
+        scheduler = TaskScheduler(task_warehouse, policy)  # 整个会话共用(缓存任务参数摘要)
+        failed = {}  # 出错的任务 -> 出错时的签名, 修改之前不再重试
+        next_scan = 0
+        Log.log("TaskHandler> Daemon started at %s" % task_warehouse)
+        try:
+            while True:
+                current_command = command()
+                if current_command == "stop":
+                    break
+                if time.time() < next_scan:
+                    time.sleep(min(1, next_scan - time.time()))
+                    continue
+
+                task_folder_list = [
+                    i
+                    for i in cla.__scan_warehouse(task_warehouse, journal, False)
+                    if failed.get(i) != journal.signature(i)
+                ]
+                if not task_folder_list:
+                    if current_command == "drain":
+                        break
+                    report(state="idle", current_task=None)
+                    next_scan = time.time() + cla.DAEMON_POLL_INTERVAL
+                    continue
+
+                task_folder = None
+                for i in scheduler.sort(task_folder_list):
+                    if cla.__admit(i, scheduler):
+                        task_folder = i
+                        break
+                if task_folder is None:
+                    # 全部任务因磁盘空间不足被推迟, 等待空间释放
+                    report(state="waiting_disk", current_task=None)
+                    next_scan = time.time() + cla.DAEMON_POLL_INTERVAL
+                    continue
+                report(state="running", current_task=os.path.basename(task_folder))
+                try:
+                    cla.__execute_taskfolder(task_folder, scheduler)
+                except Exception:
+                    Log.error(traceback.format_exc())
+                try:
+                    journal.refresh(task_folder)
+                    journal.save()
+                    if os.path.basename(task_folder) not in journal.folders:
+                        failed[task_folder] = journal.signature(task_folder)
+                except Exception:
+                    Log.error(traceback.format_exc())
+                    failed[task_folder] = journal.signature(task_folder)
+                daemon_status["executed"] += 1
+        finally:
+            report(state="stopped", current_task=None)
+
+    @classmethod
+    def __scan_warehouse(cla, task_warehouse, journal, verbose=True):
+        """
+        (增量)扫描任务仓库, 返回尚有"TODO"的任务文件夹
+
+        Parameters
+        ---
+        journal : TaskJournal
+            扫描日志, 扫描完成后保存
+        verbose : bool, default=True
+            是否逐个输出有变化的文件夹的状态(否则为DEBUG等级)
+        """
+        log = Log.log if verbose else Log.debug
+        log("TaskHandler> Finding task at %s" % task_warehouse)
         task_folder_list = []
-        Log.log("path", "is_task", "modelled", "calculated", "extracted", seq="\t")
-        for path in os.listdir(task_warehouse):
-            path = os.path.join(task_warehouse, path)
+        names = os.listdir(task_warehouse)
+        unchanged = 0
+        log("path", "is_task", "modelled", "calculated", "extracted", seq="\t")
+        for name in names:
+            path = os.path.join(task_warehouse, name)
             if not os.path.isdir(path):
-                Log.log("%s is not folder" % path)
+                Log.debug("%s is not folder" % path)
+                continue
+
+            signature = journal.signature(path)
+            if journal.is_unchanged(name, signature):
+                unchanged += 1
                 continue
 
             path_taskparams = os.path.join(path, "task_params.json")
             path_taskstatus = os.path.join(path, "task_status.json")
             is_task = os.path.exists(path_taskparams)
             if not is_task:
-                Log.log(path, False, "", "", "", seq="\t")
+                log(path, False, "", "", "", seq="\t")
+                journal.mark(name, signature, "nontask")
+                continue
             if not os.path.exists(path_taskstatus):
                 Utils.write_json(
                     {"modelled": "TODO", "calculated": "TODO", "extracted": "TODO"},
                     path_taskstatus,
                 )
             status = Utils.load_json(path_taskstatus)
-            Log.log(
+            log(
                 path,
                 is_task,
                 status["modelled"],
@@ -1155,19 +3045,28 @@ class TaskHandler:
                 status["extracted"],
                 seq="\t",
             )
-            if is_task:
+            if "TODO" in status.values():
                 task_folder_list.append(path)
+            else:
+                journal.mark(name, journal.signature(path), "finished")
+        journal.prune(names)
+        journal.save()
+        log(
+            "TaskHandler> %d folders unchanged since last scan, %d tasks to execute"
+            % (unchanged, len(task_folder_list))
+        )
+        return task_folder_list
 
-        # ===开始执行任务
-        for task_folder in task_folder_list:
-            try:
-                cla.__execute_taskfolder(task_folder)
-            except Exception:
-                error = traceback.format_exc()
-                Log.log(error)
+    @staticmethod
+    def __execute_taskfolder(task_folder, scheduler=None):
+        Log.bind_task(os.path.basename(task_folder), task_folder)
+        try:
+            TaskHandler.__execute_taskfolder_phases(task_folder, scheduler)
+        finally:
+            Log.unbind_task()
 
     @staticmethod
-    def __execute_taskfolder(task_folder):
+    def __execute_taskfolder_phases(task_folder, scheduler=None):
         Log.log("TaskHandler> Attempt to execute task at %s" % task_folder)
         path_taskparams = os.path.join(task_folder, "task_params.json")
         path_taskstatus = os.path.join(task_folder, "task_status.json")
@@ -1178,7 +3077,8 @@ class TaskHandler:
         taskstatus = Utils.load_json(path_taskstatus)
         # 建模
         if taskstatus["modelled"] == "TODO":
-            taskexecutor_instance.modeling()
+            with Log.phase("modeling"):
+                taskexecutor_instance.modeling()
             taskstatus["modelled"] = time.time()
             Utils.write_json(taskstatus, path_taskstatus)
 
@@ -1186,7 +3086,21 @@ class TaskHandler:
         if taskstatus["calculated"] == "TODO" and isinstance(
             taskstatus["modelled"], (int, float)
         ):
-            taskexecutor_instance.calculate()
+            with Log.phase("solving"):
+                calculating_msg = taskexecutor_instance.calculate(
+                    scheduler.history if scheduler is not None else ()
+                )
+            if (
+                scheduler is not None
+                and calculating_msg["status"] == "success"
+                and len(calculating_msg["restart_chain"]) == 1  # 重启动作业的运行时间不完整
+            ):
+                scheduler.record(
+                    taskexecutor_instance.taskparams,
+                    calculating_msg["job_running_time"],
+                    calculating_msg["performance"],
+                    calculating_msg["disk_usage"],
+                )
             taskstatus["calculated"] = time.time()
             Utils.write_json(taskstatus, path_taskstatus)
 
@@ -1194,9 +3108,21 @@ class TaskHandler:
         if taskstatus["extracted"] == "TODO" and isinstance(
             taskstatus["calculated"], (int, float)
         ):
-            taskexecutor_instance.extract_odb_data()
+            with Log.phase("extraction"):
+                taskexecutor_instance.extract_odb_data()
             taskstatus["extracted"] = time.time()
             Utils.write_json(taskstatus, path_taskstatus)
 
+        # 求解文件的保留策略(只处理最终状态的任务)
+        if isinstance(taskstatus["extracted"], (int, float)) and "TODO" not in (
+            taskstatus.values()
+        ):
+            try:
+                with Log.phase("retention"):
+                    taskexecutor_instance.apply_retention()
+            except Exception:
+                Log.error(traceback.format_exc())
+
 
-TaskHandler().run_mode_folder()
+if __name__ == "__main__":
+    TaskHandler().run()
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+abaqus内核的模拟实现(仅用于离线基准测试)
+
+只模拟abaqus_modeling.py用到的接口:
+    - 建模相关的调用全部被Stub吞掉, 只记录边界条件、分析步和作业参数
+    - Job.submit()在后台线程中按设定的时长写出.sta文件, 并在结束时写出伪造的odb(json)
+    - session.openOdb / xyPlot.XYDataFromHistory从伪造的odb中读取历程数据
+
+环境变量
+---
+FAKE_ABAQUS_JOB_SECONDS : float, default=0.2
+    单个作业的模拟运行时长(秒)
+FAKE_ABAQUS_INCREMENTS : int, default=50
+    单个作业的增量步数量
+FAKE_ABAQUS_PEAK_LOAD : float, default=5e6
+    模拟荷载-位移曲线的峰值荷载(N)
+FAKE_ABAQUS_FAIL_TASKS : str, default=""
+    逗号分隔的任务名(作业工作目录的文件夹名), 这些任务的Job.submit()抛出异常
+"""
+import json
+import os
+import threading
+import time
+
+from abaqusConstants import RESTART
+
+__all__ = ["mdb", "session", "Mdb", "openMdb"]
+
+
+def _env(name, default, type_=float):
+    return type_(os.environ.get(name, default))
+
+
+class Stub(object):
+    """吞掉所有调用的占位对象"""
+
+    id = 1
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Stub()
+
+    def __call__(self, *args, **kwargs):
+        return Stub()
+
+    def __getitem__(self, key):
+        return Stub()
+
+    def __setitem__(self, key, value):
+        pass
+
+    def __delitem__(self, key):
+        pass
+
+    def __iter__(self):
+        return iter(())
+
+    def __radd__(self, other):
+        return tuple(other) + (self,)
+
+
+class FakeModel(Stub):
+    def __init__(self, name, record=None):
+        self.name = name
+        self.record = record or {"bcs": {}, "steps": {}, "restart": None}
+        self.steps = _StepRepository(self)
+
+    def DisplacementBC(self, name, **kwargs):
+        self.record["bcs"][name] = dict(
+            (k, v if isinstance(v, (int, float)) else None)
+            for k, v in kwargs.items()
+            if k in ("u1", "u2", "u3", "ur1", "ur2", "ur3")
+        )
+        return Stub()
+
+    def StaticStep(self, name, **kwargs):
+        self.record["steps"][name] = dict(
+            (k, v)
+            for k, v in kwargs.items()
+            if isinstance(v, (int, float, str)) and k != "previous"
+        )
+        return Stub()
+
+    def setValues(self, **kwargs):
+        for k in ("restartJob", "restartStep", "restartIncrement"):
+            if k in kwargs:
+                self.record[k] = str(kwargs[k])
+
+
+class _StepRepository(Stub):
+    def __init__(self, model):
+        self.model = model
+
+    def __getitem__(self, key):
+        return _FakeStep(self.model)
+
+
+class _FakeStep(Stub):
+    def __init__(self, model):
+        self.model = model
+
+    def Restart(self, frequency=0, **kwargs):
+        self.model.record["restart"] = frequency
+
+
+class FakeJob(object):
+    def __init__(self, name, model, kwargs):
+        self.name = name
+        self.model = model
+        self.kwargs = kwargs
+        self.thread = None
+        self.killed = False
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name not in self.kwargs:
+            raise AttributeError(name)
+        return self.kwargs[name]
+
+    def setValues(self, **kwargs):
+        self.kwargs.update(dict((k, str(v)) for k, v in kwargs.items()))
+
+    def submit(self, *args, **kwargs):
+        fail_tasks = os.environ.get("FAKE_ABAQUS_FAIL_TASKS", "").split(",")
+        if os.path.basename(os.getcwd()) in fail_tasks:
+            raise RuntimeError("fake abaqus: job %s failed" % self.name)
+        self.killed = False
+        self.thread = threading.Thread(target=self.__run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def waitForCompletion(self):
+        if self.thread is not None:
+            self.thread.join()
+
+    def kill(self):
+        self.killed = True
+        self.waitForCompletion()
+
+    def __run(self):
+        workdir = os.getcwd()
+        model = mdb.models.get(self.model)
+        record = model.record if model is not None else {"bcs": {}, "restart": 0}
+        increments = _env("FAKE_ABAQUS_INCREMENTS", 50, int)
+        duration = _env("FAKE_ABAQUS_JOB_SECONDS", 0.2)
+        start_inc = 0
+        if self.kwargs.get("type") == RESTART:
+            start_inc = int(float(record.get("restartIncrement", 0) or 0))
+
+        sta_path = os.path.join(workdir, "%s.sta" % self.name)
+        with open(sta_path, "w") as f:  # 内容均为ascii, python2中str可直接写出
+            f.write("Abaqus/Standard (fake)\n SUMMARY OF JOB INFORMATION:\n")
+            f.write(" STEP  INC ATT SEVERE EQUIL TOTAL  TOTAL      STEP\n")
+            f.flush()
+            for inc in range(start_inc + 1, increments + 1):
+                if self.killed:
+                    return
+                time.sleep(duration / increments)
+                t = float(inc) / increments
+                f.write(
+                    "   1 %5d   1     0     3     3  %.4f     %.4f     %.5f\n"
+                    % (inc, t, t, 1.0 / increments)
+                )
+                f.flush()
+                if record.get("restart") and inc % int(record["restart"]) == 0:
+                    self.__write_outputs(workdir, record, start_inc, inc, increments)
+            f.write(" THE ANALYSIS HAS COMPLETED SUCCESSFULLY\n")
+        self.__write_outputs(workdir, record, start_inc, increments, increments)
+
+    def __write_outputs(self, workdir, record, start_inc, inc, increments):
+        for suffix in ("dat", "msg", "prt", "com", "sim"):
+            with open(os.path.join(workdir, "%s.%s" % (self.name, suffix)), "w") as f:
+                f.write("fake %s\n" % suffix)
+        if record.get("restart"):
+            for suffix in ("res", "mdl", "stt"):
+                path = os.path.join(workdir, "%s.%s" % (self.name, suffix))
+                with open(path, "w") as f:
+                    f.write("fake %s\n" % suffix)
+
+        u3 = (record.get("bcs", {}).get("bound_top") or {}).get("u3") or -1.0
+        times = [float(i) / increments for i in range(start_inc + 1, inc + 1)]
+        odb = {"top": _history(times, u3, 1.0), "bottom": _history(times, 0, -1.0)}
+        with open(os.path.join(workdir, "%s.odb" % self.name), "w") as f:
+            json.dump(odb, f)
+
+
+def _history(times, u3, sign):
+    peak = _env("FAKE_ABAQUS_PEAK_LOAD", 5e6)
+    data = dict(
+        (k, []) for k in ("U1 U2 U3 UR1 UR2 UR3 RF1 RF2 RF3 RM1 RM2 RM3").split()
+    )
+    for t in times:
+        x = t / 0.3
+        y = 2 * x - x * x if x <= 1 else x / (0.6 * (x - 1) ** 1.8 + x)
+        for k in data:
+            data[k].append(0.0)
+        data["U3"][-1] = u3 * t
+        data["UR1"][-1] = 0.001 * t if u3 else 0.0
+        data["RF3"][-1] = sign * peak * y
+        data["RF2"][-1] = sign * peak * y * 1e-3
+    return {"time": times, "data": data}
+
+
+class FakeMdb(object):
+    def __init__(self):
+        self.models = {"Model-1": FakeModel("Model-1")}
+        self.jobs = {}
+
+    def Model(self, name, objectToCopy=None, **kwargs):
+        record = None
+        if objectToCopy is not None:
+            record = json.loads(json.dumps(objectToCopy.record))
+        self.models[name] = FakeModel(name, record)
+        return self.models[name]
+
+    def Job(self, name, model, **kwargs):
+        self.jobs[name] = FakeJob(
+            name, model, dict((k, str(v)) for k, v in kwargs.items())
+        )
+        return self.jobs[name]
+
+    def saveAs(self, pathName):
+        with open(pathName, "w") as f:
+            json.dump(
+                {
+                    "models": dict((k, v.record) for k, v in self.models.items()),
+                    "jobs": dict(
+                        (k, [v.model, v.kwargs]) for k, v in self.jobs.items()
+                    ),
+                },
+                f,
+            )
+
+
+mdb = FakeMdb()
+
+
+def Mdb():
+    global mdb
+    mdb.__init__()
+    return mdb
+
+
+def openMdb(pathName):
+    Mdb()
+    with open(pathName, "r") as f:
+        data = json.load(f)
+    for name, record in data["models"].items():
+        mdb.models[name] = FakeModel(name, record)
+    for name, (model, kwargs) in data["jobs"].items():
+        mdb.jobs[name] = FakeJob(name, model, kwargs)
+    return mdb
+
+
+class FakeOdb(object):
+    def __init__(self, path):
+        self.path = path
+        with open(path, "r") as f:
+            self.data = json.load(f)
+
+    def close(self):
+        session.odbs.pop(os.path.abspath(self.path), None)
+
+
+class _XYPlot(object):
+    @staticmethod
+    def XYDataFromHistory(odb, outputVariableName, **kwargs):
+        variable = outputVariableName.split(":")[1].split()[0]
+        point = "bottom" if "Node 1 " in outputVariableName else "top"
+        history = odb.data[point]
+        return tuple(zip(history["time"], history["data"][variable]))
+
+
+class FakeSession(Stub):
+    xyPlot = _XYPlot()
+
+    def __init__(self):
+        self.viewports = Stub()
+        self.imageAnimationOptions = Stub()
+        self.odbs = {}
+
+    def openOdb(self, name, *args, **kwargs):
+        odb = FakeOdb(name)
+        self.odbs[os.path.abspath(name)] = odb
+        return odb
+
+    def writeImageAnimation(self, fileName, **kwargs):
+        with open(fileName, "wb") as f:
+            f.write(b"RIFF")
+
+
+session = FakeSession()
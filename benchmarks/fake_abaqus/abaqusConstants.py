@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""abaqusConstants的模拟实现(仅用于离线基准测试)"""
+
+
+class SymbolicConstant(str):
+    def __repr__(self):
+        return str(self)
+
+
+_NAMES = (
+    "ON OFF UNSET DEFAULT NONE BOTH ANALYSIS RESTART AVI BOTTOM_SURFACE "
+    "BOUNDARY_ONLY CARTESIAN CONTOURS_ON_DEF DEFORMABLE_BODY DELETE EXCLUDE "
+    "FINER FINITE FRACTION FROM_SECTION GFI GRADIENT HARD ISOTROPIC "
+    "MIDDLE_SURFACE NO_IDEALIZATION ODB OMIT PENALTY PERCENTAGE SIMPSON SINGLE "
+    "STANDALONE STANDARD STANDARD_EXPLICIT T3D2 THREE_D TIME_HISTORY UNIFORM "
+    "UNLIMITED STEP_END DISSIPATED_ENERGY_FRACTION"
+).split()
+
+for _name in _NAMES:
+    globals()[_name] = SymbolicConstant(_name)
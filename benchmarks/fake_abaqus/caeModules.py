@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""caeModules的模拟实现(仅用于离线基准测试)"""
+from abaqus import Stub, session
+
+regionToolset = Stub()
+mesh = Stub()
+xyPlot = session.xyPlot
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""driverUtils的模拟实现(仅用于离线基准测试)"""
+
+
+def executeOnCaeStartup():
+    pass
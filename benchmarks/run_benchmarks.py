@@ -0,0 +1,218 @@
+"""
+离线基准测试: 用模拟的abaqus内核(fake_abaqus)测量项目Python部分的吞吐量
+
+python benchmarks/run_benchmarks.py [--scales 10 1000 100000] [--benchmarks ...]
+
+基准测试(每个规模依次执行, 共用同一个临时任务仓库)
+    - extract : AbaqusData.extract
+    - gene_task_folder : AbaqusData.gene_task_folder
+    - task_folder_list : TaskFolderList(任务仓库)
+    - run_mode_folder : TaskHandler.run_mode_folder(在--abaqus-python中运行abaqus_modeling.py)
+    - endpoint_displacement : TaskFolder.get_endpoint_displacement(需要先执行run_mode_folder)
+
+每次运行的结果追加到--output(JSON-lines), 并与上一次运行中相同基准测试、相同规模的结果比较
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).absolute().parents[1]
+sys.path.insert(0, str(ROOT.parent))
+task_item = importlib.import_module(f"{ROOT.name}.task_item")
+result_reader = importlib.import_module(f"{ROOT.name}.result_reader")
+utils = importlib.import_module(f"{ROOT.name}.utils")
+
+BENCHMARKS = (
+    "extract",
+    "gene_task_folder",
+    "task_folder_list",
+    "run_mode_folder",
+    "endpoint_displacement",
+)
+
+
+def gene_abadatas(number: int) -> list:
+    """生成number个参数各不相同的任务"""
+    abadatas = []
+    for i in range(number):
+        params = task_item.AbaqusData.get_ecc_cfst_alpha_template()
+        params["name"] = f"bench_{i}"
+        params["e"] = 0.3 * (i % 7) / 6
+        params["mesh"] = ((9, 9, 10 + 5 * (i % 5)), (9, 9, 10 + 5 * (i % 5)))
+        abadatas.append(task_item.AbaqusData.init_ecc_cfst_alpha(params))
+    return abadatas
+
+
+def bench_scale(scale: int, benchmarks: list, args, workdir: Path) -> list[dict]:
+    """执行一个规模的基准测试"""
+    results = []
+
+    def record(name, seconds, tasks=scale, **extra):
+        results.append(
+            {
+                "benchmark": name,
+                "scale": scale,
+                "seconds": seconds,
+                "per_task": seconds / tasks if tasks else None,
+                **extra,
+            }
+        )
+        print(f"{name:>24s} @ {scale:<7d}: {seconds:.3f}s", flush=True)
+
+    abadatas = gene_abadatas(scale)
+    task_warehouse = workdir / "tasks"
+
+    if "extract" in benchmarks:
+        st_time = time.perf_counter()
+        for abadata in abadatas:
+            abadata.extract()
+        record("extract", time.perf_counter() - st_time)
+
+    # 后续基准测试都需要任务文件夹
+    st_time = time.perf_counter()
+    for abadata in abadatas:
+        abadata.gene_task_folder(task_warehouse)
+    if "gene_task_folder" in benchmarks:
+        record("gene_task_folder", time.perf_counter() - st_time)
+    del abadatas
+
+    if "task_folder_list" in benchmarks:
+        st_time = time.perf_counter()
+        tasks = result_reader.TaskFolderList(task_warehouse)
+        record("task_folder_list", time.perf_counter() - st_time, len(tasks))
+
+    if "run_mode_folder" in benchmarks:
+        path_result = workdir / "run_handler.json"
+        env = dict(
+            os.environ,
+            FAKE_ABAQUS_JOB_SECONDS=str(args.job_seconds),
+            FAKE_ABAQUS_INCREMENTS=str(args.increments),
+        )
+        with open(workdir / "run_handler.log", "wb") as f:
+            subprocess.run(
+                [
+                    *shlex.split(args.abaqus_python),
+                    str(ROOT / "benchmarks" / "run_handler.py"),
+                    str(task_warehouse),
+                    str(path_result),
+                ],
+                env=env,
+                stdout=f,
+                stderr=subprocess.STDOUT,
+                check=True,
+            )
+        handler = utils.JsonFile.load(path_result)
+        record(
+            "run_mode_folder",
+            handler["seconds"],
+            handler["tasks"],
+            job_seconds=args.job_seconds,
+            done_tasks=handler["tasks"],
+        )
+
+    if "endpoint_displacement" in benchmarks:
+        tasks = result_reader.TaskFolderList(task_warehouse).done_tasks
+        if not tasks:
+            print(
+                f"{'endpoint_displacement':>24s} @ {scale:<7d}: skipped (no done task)"
+            )
+        else:
+            st_time = time.perf_counter()
+            for task in tasks:
+                task.get_endpoint_displacement()
+            record("endpoint_displacement", time.perf_counter() - st_time, len(tasks))
+
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def last_run(path_output: Path) -> dict:
+    """读取上一次运行的结果"""
+    if not path_output.exists():
+        return None
+    with open(path_output, "r", encoding="utf-8") as f:
+        lines = [i for i in f if i.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def compare(results: list[dict], previous: dict) -> dict:
+    """与上一次运行比较, ratio为本次耗时/上次耗时"""
+    previous_seconds = {
+        (i["benchmark"], i["scale"]): i["seconds"]
+        for i in (previous or {}).get("results", [])
+    }
+    table = {k: [] for k in ("benchmark", "scale", "seconds", "per_task", "ratio")}
+    for i in results:
+        before = previous_seconds.get((i["benchmark"], i["scale"]))
+        table["benchmark"].append(i["benchmark"])
+        table["scale"].append(i["scale"])
+        table["seconds"].append(f"{i['seconds']:.4g}")
+        table["per_task"].append(f"{i['per_task']:.4g}" if i["per_task"] else "")
+        table["ratio"].append(f"{i['seconds'] / before:.3f}" if before else "")
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument(
+        "--benchmarks", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS)
+    )
+    parser.add_argument(
+        "--abaqus-python",
+        default="python2",
+        help="运行abaqus_modeling.py的解释器(python2.7), 可以包含参数",
+    )
+    parser.add_argument("--job-seconds", type=float, default=0.0, help="单个模拟作业的运行时长(秒)")
+    parser.add_argument("--increments", type=int, default=20, help="单个模拟作业的增量步数量")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=ROOT / "benchmarks" / "results.jsonl",
+        help="结果输出路径(JSON-lines, 追加)",
+    )
+    parser.add_argument("--workdir", type=Path, default=None, help="临时任务仓库的位置")
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+            results += bench_scale(scale, args.benchmarks, args, Path(workdir))
+
+    previous = last_run(args.output)
+    print(utils.gene_markdown_table(compare(results, previous)))
+
+    run = {
+        "time": utils.format_time(with_date=True),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
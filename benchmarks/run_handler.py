@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+用模拟的abaqus内核运行TaskHandler.run_mode_folder(由run_benchmarks.py, run_scenarios.py调用)
+
+python2 run_handler.py <任务仓库> <结果json>
+
+结果json为{"seconds": 运行时间, "tasks": 完成导出的任务数量}
+
+环境变量BENCHMARK_DISK_QUOTA(字节)不为空时, 以模拟的磁盘配额(配额 - 任务仓库已用空间)
+作为工作目录与scratch的可用空间, 测试磁盘空间准入控制(DiskAdmission);
+BENCHMARK_DISK_WAIT(秒, 默认0)为等待磁盘空间的最长时间;
+环境变量BENCHMARK_TASK_SERVER不为空时, 改为运行TaskHandler.run_mode_network,
+从该地址的任务服务领取任务, 在<任务仓库>中执行;
+环境变量BENCHMARK_RUN_MODE为"daemon"时, 改为运行TaskHandler.run_mode_daemon
+(扫描间隔为BENCHMARK_POLL_INTERVAL, 由任务仓库下的daemon_control.json停止)
+"""
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "fake_abaqus"))
+sys.path.insert(0, os.path.dirname(HERE))
+
+task_warehouse, path_result = map(os.path.abspath, sys.argv[1:3])
+os.chdir(os.path.dirname(task_warehouse))  # 日志输出在任务仓库的上级目录
+
+import abaqus_modeling
+
+abaqus_modeling.TaskExecutor.STATUS_POLL_INTERVAL = float(
+    os.environ.get("BENCHMARK_POLL_INTERVAL", 0.01)
+)
+abaqus_modeling.Log.STDOUT_LEVEL = "ERROR"
+
+if os.environ.get("BENCHMARK_DISK_QUOTA"):
+    quota = int(float(os.environ["BENCHMARK_DISK_QUOTA"]))
+
+    def fake_free_space(path):
+        used = 0
+        for root, _, files in os.walk(task_warehouse):
+            used += sum(os.path.getsize(os.path.join(root, i)) for i in files)
+        return quota - used
+
+    abaqus_modeling.TaskHandler.DISK_ADMISSION = abaqus_modeling.DiskAdmission(
+        scratch=task_warehouse, free_space=fake_free_space
+    )
+    abaqus_modeling.TaskHandler.DISK_WAIT_INTERVAL = 0.1
+    abaqus_modeling.TaskHandler.DISK_WAIT_TIMEOUT = float(
+        os.environ.get("BENCHMARK_DISK_WAIT", 0)
+    )
+
+st_time = time.time()
+if os.environ.get("BENCHMARK_RUN_MODE") == "daemon":
+    abaqus_modeling.TaskHandler.DAEMON_POLL_INTERVAL = (
+        abaqus_modeling.TaskExecutor.STATUS_POLL_INTERVAL
+    )
+    abaqus_modeling.TaskHandler().run_mode_daemon(task_warehouse)
+elif os.environ.get("BENCHMARK_TASK_SERVER"):
+    abaqus_modeling.TaskHandler().run_mode_network(
+        os.environ["BENCHMARK_TASK_SERVER"], task_warehouse
+    )
+else:
+    abaqus_modeling.TaskHandler().run_mode_folder(task_warehouse)
+seconds = time.time() - st_time
+
+done = 0
+for name in os.listdir(task_warehouse):
+    path_status = os.path.join(task_warehouse, name, "task_status.json")
+    if os.path.isfile(path_status):
+        with open(path_status, "r") as f:
+            done += isinstance(json.load(f).get("extracted"), (int, float))
+
+with open(path_result, "w") as f:
+    json.dump({"seconds": seconds, "tasks": done}, f)
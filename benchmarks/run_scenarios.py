@@ -0,0 +1,355 @@
+"""
+离线场景测试: 用模拟的abaqus内核(fake_abaqus)检查各运行模式的行为, 有检查不通过时退出码为1
+
+python benchmarks/run_scenarios.py [--scenarios network ...] [--abaqus-python python2]
+
+场景(各自使用独立的临时任务仓库)
+    - network : 在线程中启动TaskServer.make_server(port=0), 用run_handler.py以网络模式领取任务;
+      检查结果文件与任务状态的上传、租约到期后的重新分配、执行出错的任务在max_attempts次后不再分配
+    - network_disk : 以模拟磁盘配额运行网络模式; 检查空间不足的任务立即归还服务端(不持有租约、
+      不记为失败), 以及空间充足时重新领取并完成
+    - disk : 以BENCHMARK_DISK_QUOTA模拟磁盘配额运行run_mode_folder; 检查空间不足时任务被推迟、
+      超过DISK_WAIT_TIMEOUT后放弃, 以及等待期间释放空间(删除任务仓库中的大文件)后任务继续执行
+    - daemon : 以模拟磁盘配额运行run_mode_daemon; 检查空间不足时状态为waiting_disk,
+      释放空间后执行全部任务
+"""
+import argparse
+import importlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from run_benchmarks import ROOT, gene_abadatas
+
+result_reader = importlib.import_module(f"{ROOT.name}.result_reader")
+task_server = importlib.import_module(f"{ROOT.name}.task_server")
+utils = importlib.import_module(f"{ROOT.name}.utils")
+
+SCENARIOS = ("network", "network_disk", "disk", "daemon")
+
+
+class ScenarioFailed(Exception):
+    pass
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        raise ScenarioFailed(message)
+
+
+def gene_warehouse(task_warehouse: Path, number: int) -> Path:
+    for abadata in gene_abadatas(number):
+        abadata.gene_task_folder(task_warehouse)
+    return task_warehouse
+
+
+def gene_ballast(path: Path, size: float):
+    """生成稀疏文件(不占用实际空间), 在模拟的磁盘配额中占用size字节"""
+    with open(path, "wb") as f:
+        f.truncate(int(size))
+
+
+def count_extracted(task_warehouse: Path) -> int:
+    """完成导出的任务数量(与run_handler.py一致)"""
+    done = 0
+    for path in task_warehouse.glob("*/task_status.json"):
+        done += isinstance(utils.JsonFile.load(path).get("extracted"), (int, float))
+    return done
+
+
+def read_events(task_warehouse: Path, event: str) -> list[dict]:
+    """run_handler.py的全局日志(任务仓库上级目录的logs文件夹)中的指定事件"""
+    records = []
+    for path in sorted((task_warehouse.parent / "logs").glob("*.jsonl")):
+        with open(path, "r", encoding="utf-8") as f:
+            records += [json.loads(i) for i in f if i.strip()]
+    return [i for i in records if i.get("event") == event]
+
+
+def wait_until(predicate, timeout: float, message: str):
+    deadline = time.time() + timeout
+    while not predicate():
+        check(time.time() < deadline, message)
+        time.sleep(0.1)
+
+
+def start_handler(args, task_warehouse: Path, **env) -> subprocess.Popen:
+    """在--abaqus-python中后台运行run_handler.py, 输出追加到run_handler.log"""
+    env = dict(
+        os.environ,
+        FAKE_ABAQUS_JOB_SECONDS=str(args.job_seconds),
+        FAKE_ABAQUS_INCREMENTS=str(args.increments),
+        **env,
+    )
+    with open(task_warehouse.parent / "run_handler.log", "ab") as f:
+        return subprocess.Popen(
+            [
+                *shlex.split(args.abaqus_python),
+                str(ROOT / "benchmarks" / "run_handler.py"),
+                str(task_warehouse),
+                str(task_warehouse.parent / "run_handler.json"),
+            ],
+            env=env,
+            stdout=f,
+            stderr=subprocess.STDOUT,
+        )
+
+
+def finish_handler(args, process: subprocess.Popen, task_warehouse: Path) -> dict:
+    """等待run_handler.py结束(超时则终止), 返回其结果{"seconds", "tasks"}"""
+    try:
+        process.wait(args.timeout)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+    return utils.JsonFile.load(task_warehouse.parent / "run_handler.json")
+
+
+def run_handler(args, task_warehouse: Path, **env) -> dict:
+    process = start_handler(args, task_warehouse, **env)
+    return finish_handler(args, process, task_warehouse)
+
+
+def scenario_network(args, workdir: Path):
+    server_warehouse = workdir / "server"
+    worker_warehouse = workdir / "worker"
+    gene_warehouse(server_warehouse, 4)
+    server = task_server.TaskServer(
+        server_warehouse, lease_seconds=args.lease_seconds, max_attempts=2
+    )
+    httpd = server.make_server(port=0)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        # 领取任务后失联的主机: 租约到期前该任务不会被分配给其他主机
+        ghost = server.lease("ghost")[0]["taskname"]
+        expiry = server.leases[ghost][1]
+        broken = next(i for i in sorted(server.pending) if i != ghost)
+        others = sorted(set(server.pending) - {ghost, broken})
+        env = {
+            "BENCHMARK_TASK_SERVER": "http://%s:%d" % httpd.server_address,
+            "FAKE_ABAQUS_FAIL_TASKS": broken,
+        }
+
+        run_handler(args, worker_warehouse, **env)
+        check(
+            time.time() < expiry,
+            f"第一次运行超过了租约时间, 请增大--lease-seconds({args.lease_seconds})",
+        )
+        summary = server.summary()
+        check(summary["done"] == len(others), f"第一次运行后: {summary}")
+        check(summary["failed"] == 1, f"出错的任务应在2次后放弃: {summary}")
+        check(list(server.leases) == [ghost], f"租约: {server.leases}")
+        failures = server.failures(broken)
+        check(
+            len(failures) == 2 and "Traceback" in failures[-1]["error"],
+            f"{broken}的失败记录: {failures}",
+        )
+        check(
+            "TODO" in server.get_status(broken).values(),
+            f"{broken}的状态: {server.get_status(broken)}",
+        )
+
+        # 租约到期后重新分配, 记为一次失败
+        time.sleep(max(0, expiry - time.time()) + 0.1)
+        run_handler(args, worker_warehouse, **env)
+        summary = server.summary()
+        check(summary["done"] == len(others) + 1, f"第二次运行后: {summary}")
+        check(not server.leases, f"租约应全部释放: {server.leases}")
+        failures = server.failures(ghost)
+        check(
+            [(i["worker"], i["error"]) for i in failures]
+            == [("ghost", "lease expired")],
+            f"{ghost}的失败记录: {failures}",
+        )
+        check(server.lease("probe") == [], "放弃的任务不应再被分配")
+
+        # 上传的结果文件与任务状态
+        for taskname in [ghost, *others]:
+            status = server.get_status(taskname)
+            stamps = [status[k] for k in ("modelled", "calculated", "extracted")]
+            check(
+                all(isinstance(i, (int, float)) for i in stamps)
+                and stamps == sorted(stamps),
+                f"{taskname}的状态: {status}",
+            )
+            task = result_reader.TaskFolder(server_warehouse / taskname)
+            path_log = server_warehouse / taskname / "task_log.jsonl"
+            check(
+                path_log.is_file()
+                and (
+                    task.path_odb_extract.is_file()
+                    or task.path_channels_header.is_file()
+                ),
+                f"{taskname}的结果文件未上传",
+            )
+            task.get_endpoint_displacement()  # 上传的结果可以读取
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def scenario_network_disk(args, workdir: Path):
+    server_warehouse = workdir / "server"
+    worker_warehouse = workdir / "worker"
+    gene_warehouse(server_warehouse, 3)
+    # max_attempts=1: 被推迟的任务若记为失败, 将不再分配
+    server = task_server.TaskServer(
+        server_warehouse, lease_seconds=args.lease_seconds, max_attempts=1
+    )
+    httpd = server.make_server(port=0)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    env = {"BENCHMARK_TASK_SERVER": "http://%s:%d" % httpd.server_address}
+    try:
+        # 配额低于DiskAdmission.RESERVE_BYTES, 全部任务被归还, 等待1s后退出
+        result = run_handler(
+            args,
+            worker_warehouse,
+            BENCHMARK_DISK_QUOTA="5e8",
+            BENCHMARK_DISK_WAIT="1.0",
+            **env,
+        )
+        check(result["tasks"] == 0, f"配额不足时不应执行任务: {result}")
+        summary = server.summary()
+        check(
+            summary["pending"] == 3 and summary["leased"] == 0,
+            f"被推迟的任务应立即归还: {summary}, 租约: {server.leases}",
+        )
+        failures = {i: server.failures(i) for i in server.pending}
+        check(not any(failures.values()), f"归还不应记为失败: {failures}")
+        timeouts = read_events(worker_warehouse, "disk_timeout")
+        check(len(timeouts) == 1, f"disk_timeout事件: {timeouts}")
+
+        # 空间充足时重新领取并完成全部任务
+        run_handler(args, worker_warehouse, **env)
+        summary = server.summary()
+        check(summary["done"] == 3 and not summary["failed"], f"第二次运行后: {summary}")
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def scenario_disk(args, workdir: Path):
+    # 配额低于DiskAdmission.RESERVE_BYTES(1GiB), 全部任务被推迟, 等待DISK_WAIT_TIMEOUT后放弃
+    tasks = gene_warehouse(workdir / "low" / "tasks", 3)
+    wait = 1.0
+    result = run_handler(
+        args, tasks, BENCHMARK_DISK_QUOTA="5e8", BENCHMARK_DISK_WAIT=str(wait)
+    )
+    check(result["tasks"] == 0, f"配额不足时不应执行任务: {result}")
+    check(result["seconds"] >= wait, f"应等待{wait}s后放弃: {result}")
+    deferred = {i["task_folder"] for i in read_events(tasks, "disk_deferred")}
+    check(len(deferred) == 3, f"被推迟的任务: {deferred}")
+    timeouts = read_events(tasks, "disk_timeout")
+    check(
+        len(timeouts) == 1 and len(timeouts[0]["task_folders"]) == 3,
+        f"disk_timeout事件: {timeouts}",
+    )
+
+    # 任务仓库中的大文件占满配额, 任务被推迟后删除该文件, 等待期间任务继续执行
+    tasks = gene_warehouse(workdir / "freed" / "tasks", 3)
+    ballast = tasks / "ballast.bin"
+    gene_ballast(ballast, 1e12 - 5e8)
+    process = start_handler(
+        args, tasks, BENCHMARK_DISK_QUOTA="1e12", BENCHMARK_DISK_WAIT="120"
+    )
+    try:
+        # disk_deferred为WARNING, 日志最迟在Log.FLUSH_INTERVAL后写出
+        wait_until(lambda: read_events(tasks, "disk_deferred"), 60, "空间不足时任务未被推迟")
+        check(count_extracted(tasks) == 0, "空间不足时不应执行任务")
+        ballast.unlink()
+        result = finish_handler(args, process, tasks)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    check(result["tasks"] == 3, f"释放空间后应执行全部任务: {result}")
+    check(not read_events(tasks, "disk_timeout"), "释放空间后不应放弃任务")
+
+
+def scenario_daemon(args, workdir: Path):
+    tasks = gene_warehouse(workdir / "tasks", 2)
+    ballast = tasks / "ballast.bin"
+    gene_ballast(ballast, 1e12 - 5e8)
+    path_status = tasks / "daemon_status.json"
+
+    def daemon_status() -> dict:
+        try:
+            return utils.JsonFile.load(path_status)
+        except (OSError, ValueError):  # 尚未写出或正在写入
+            return {}
+
+    process = start_handler(
+        args, tasks, BENCHMARK_RUN_MODE="daemon", BENCHMARK_DISK_QUOTA="1e12"
+    )
+    try:
+        wait_until(
+            lambda: daemon_status().get("state") == "waiting_disk",
+            60,
+            f"守护模式未进入waiting_disk状态: {daemon_status()}",
+        )
+        check(count_extracted(tasks) == 0, "空间不足时不应执行任务")
+        ballast.unlink()
+        wait_until(lambda: count_extracted(tasks) == 2, 60, "释放空间后应执行全部任务")
+        utils.JsonFile.write({"command": "drain"}, tasks / "daemon_control.json")
+        finish_handler(args, process, tasks)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    status = daemon_status()
+    check(
+        status.get("state") == "stopped" and status.get("executed") == 2,
+        f"守护模式的状态: {status}",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument(
+        "--abaqus-python",
+        default="python2",
+        help="运行abaqus_modeling.py的解释器(python2.7), 可以包含参数",
+    )
+    parser.add_argument("--job-seconds", type=float, default=0.0, help="单个模拟作业的运行时长(秒)")
+    parser.add_argument("--increments", type=int, default=20, help="单个模拟作业的增量步数量")
+    parser.add_argument(
+        "--lease-seconds", type=float, default=10.0, help="network场景中任务服务的租约时长(秒)"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=600, help="单次运行run_handler.py的最长时间(秒)"
+    )
+    parser.add_argument("--workdir", type=Path, default=None, help="临时任务仓库的位置")
+    args = parser.parse_args()
+
+    failed = 0
+    for name in args.scenarios:
+        st_time = time.perf_counter()
+        with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+            try:
+                globals()[f"scenario_{name}"](args, Path(workdir))
+            except ScenarioFailed as e:
+                failed += 1
+                print(f"{name:>12s}: FAILED, {e}", flush=True)
+                continue
+            except Exception:
+                failed += 1
+                print(f"{name:>12s}: ERROR", flush=True)
+                traceback.print_exc()
+                continue
+        print(f"{name:>12s}: ok ({time.perf_counter() - st_time:.1f}s)", flush=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
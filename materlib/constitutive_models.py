@@ -1,5 +1,5 @@
 import math
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import Callable, Union
 
 import numpy as np
@@ -259,3 +259,300 @@ class SteelTubelarConstitutiveModels:
             ),
         )
         return sigma
+
+
+# ===本构模型注册表
+CONSTITUTIVE_LAWS: dict[str, dict[str, type]] = {"concrete": {}, "steel": {}}
+
+CONCRETE_INPUTS = tuple(
+    i.name for i in fields(ConcreteConstitutiveModels) if i.name != "sqrt"
+)  # 混凝土本构模型的输入, 与ConcreteConstitutiveModels的参数相同
+STEEL_INPUTS = ("steel_yield", "steel_ultimate", "elastic_modulus")  # 钢材本构模型的输入
+
+
+def register_law(name: str) -> Callable[[type], type]:
+    """注册本构模型(类装饰器), 按类的KIND分类"""
+
+    def decorator(cla: type) -> type:
+        cla.NAME = name
+        CONSTITUTIVE_LAWS[cla.KIND][name] = cla
+        return cla
+
+    return decorator
+
+
+def get_law(kind: str, name: str) -> type:
+    """
+    按名称获取已注册的本构模型
+
+    Parameters
+    ---
+    kind : {"concrete", "steel"}
+        材料类别
+    name : str
+        本构模型名称, 见CONSTITUTIVE_LAWS
+    """
+    if name not in CONSTITUTIVE_LAWS.get(kind, {}):
+        raise ValueError(
+            f"未注册的{kind}本构模型: {name}, 可选: {list(CONSTITUTIVE_LAWS.get(kind, {}))}"
+        )
+    return CONSTITUTIVE_LAWS[kind][name]
+
+
+class ConstitutiveLaw:
+    """
+    本构模型的公共接口: 参数为数组(每个元素为一组参数), 对多组参数批量计算
+
+    子类定义KIND与INPUTS, 实现_parameters(由输入计算模型参数), _stress与_breakpoints;
+    用register_law注册后即可在AbaqusData.material_models中按名称选用
+
+    Parameters
+    ---
+    **inputs : float | np.ndarray
+        INPUTS中的各项, 标量或一维数组(广播为相同长度)
+
+    Note
+    ---
+    单位N、mm
+        MPa = N/mm^2
+    """
+
+    KIND: str = ""
+    NAME: str = ""
+    INPUTS: tuple[str, ...] = ()
+
+    def __init__(self, **inputs) -> None:
+        missing = [i for i in self.INPUTS if i not in inputs]
+        if missing:
+            raise ValueError(f"{self.__class__.__name__}缺少输入: {missing}")
+        arrays = np.broadcast_arrays(
+            *[np.atleast_1d(np.asarray(inputs[i], dtype=float)) for i in self.INPUTS]
+        )
+        self.inputs = {k: np.array(v) for k, v in zip(self.INPUTS, arrays)}
+        self.number = len(arrays[0])
+        self.params = self._parameters(**self.inputs)
+
+    def __len__(self) -> int:
+        return self.number
+
+    def _parameters(self, **inputs) -> dict[str, np.ndarray]:
+        """由输入计算模型参数"""
+        return inputs
+
+    def _stress(self, strain: np.ndarray, **params) -> np.ndarray:
+        """params已变形为可与strain广播的形状"""
+        raise NotImplementedError
+
+    def _breakpoints(self, **params) -> list[np.ndarray]:
+        raise NotImplementedError
+
+    def evaluate(self, strain: np.ndarray) -> np.ndarray:
+        """
+        批量计算应力
+
+        Parameters
+        ---
+        strain : np.ndarray
+            应变矩阵, 第0维与各组参数一一对应, 形状为(参数组数, ...);
+            标量或一维数组为各组共用的应变序列
+
+        Returns
+        ---
+        sigma : np.ndarray
+            应力, 形状为(参数组数, ...)
+        """
+        strain = np.asarray(strain, dtype=float)
+        if strain.ndim <= 1:
+            strain = np.broadcast_to(strain, (self.number,) + strain.shape)
+        elif strain.shape[0] != self.number:
+            raise ValueError(f"strain的第0维({strain.shape[0]})应等于参数组数({self.number})")
+        shape = (self.number,) + (1,) * (strain.ndim - 1)
+        return self._stress(
+            strain, **{k: v.reshape(shape) for k, v in self.params.items()}
+        )
+
+    def breakpoints(self) -> np.ndarray:
+        """
+        解析的分段点(应变), 形状为(参数组数, 分段点数)
+
+        混凝土为峰值应变; 钢材为各折线的转折点(第0个为屈服应变)
+        """
+        return np.stack(self._breakpoints(**self.params), axis=1)
+
+
+class ConcreteLaw(ConstitutiveLaw):
+    """混凝土本构模型(受压为正, 不计受拉)"""
+
+    KIND = "concrete"
+    INPUTS = CONCRETE_INPUTS
+
+
+class SteelLaw(ConstitutiveLaw):
+    """钢材本构模型(拉压对称)"""
+
+    KIND = "steel"
+    INPUTS = STEEL_INPUTS
+
+    def evaluate(self, strain: np.ndarray) -> np.ndarray:
+        strain = np.asarray(strain, dtype=float)
+        return np.copysign(super().evaluate(np.abs(strain)), strain)
+
+    def _parameters(self, steel_yield, steel_ultimate, elastic_modulus):
+        return {
+            "steel_yield": steel_yield,
+            "steel_ultimate": steel_ultimate,
+            "elastic_modulus": elastic_modulus,
+            "epsilon_yield": steel_yield / elastic_modulus,
+        }
+
+
+def _confined_curve(strain, epsilon_0, sigma_0, beta_0):
+    """y = 2x - x^2 (x <= 1), y = x / (beta_0 * (x - 1)^eta + x) (x > 1), eta = 1.6 + 1.5/x"""
+    x = np.maximum(strain / epsilon_0, 0)
+    over = x > 1
+    power = np.power(
+        x - 1, 1.6 + 1.5 / np.maximum(x, 1), where=over, out=np.zeros(x.shape)
+    )
+    descending = x / (beta_0 * power + np.maximum(x, 1e-12))
+    return sigma_0 * np.where(over, descending, 2 * x - x * x)
+
+
+@register_law("liu2013")
+class Liu2013Concrete(ConcreteLaw):
+    """刘鸿亮(2013), 计入钢管约束xi与约束拉杆约束zeta, 同ConcreteConstitutiveModels"""
+
+    def _parameters(self, **inputs):
+        model = ConcreteConstitutiveModels(**inputs, sqrt=np.sqrt)
+        return {
+            "epsilon_0": model.epsilon_0,
+            "sigma_0": model.sigma_0,
+            "beta_0": model.beta_0,
+        }
+
+    def _stress(self, strain, epsilon_0, sigma_0, beta_0):
+        return _confined_curve(strain, epsilon_0, sigma_0, beta_0)
+
+    def _breakpoints(self, epsilon_0, **params):
+        return [epsilon_0]
+
+
+@register_law("han2007")
+class Han2007Concrete(ConcreteLaw):
+    """
+    韩林海(2007)矩形钢管混凝土的核心混凝土模型, 仅计入钢管约束xi(不计约束拉杆)
+        参考文献: 韩林海, 2007. 钢管混凝土结构: 理论与实践[M]. 2版. 北京: 科学出版社.
+    """
+
+    def _parameters(self, **inputs):
+        model = ConcreteConstitutiveModels(**inputs, sqrt=np.sqrt)
+        f_c, xi = model.concrete_core_strength, model.xi
+        return {
+            "epsilon_0": (1300 + 12.5 * f_c) / 10**6
+            + (1330 + 760 * (f_c / 24 - 1)) * xi**0.2 / 10**6,
+            "sigma_0": f_c * (1 + (-0.0135 * xi**2 + 0.1 * xi) * (24 / f_c) ** 0.45),
+            "beta_0": f_c**0.1 / (1.2 * np.sqrt(1 + xi)),
+        }
+
+    def _stress(self, strain, epsilon_0, sigma_0, beta_0):
+        return _confined_curve(strain, epsilon_0, sigma_0, beta_0)
+
+    def _breakpoints(self, epsilon_0, **params):
+        return [epsilon_0]
+
+
+@register_law("gb50010")
+class GB50010Concrete(ConcreteLaw):
+    """
+    GB 50010-2010附录C的单轴受压曲线(无约束), 强度代表值取f_ck, 弹性模量同ConcreteConstitutiveModels
+    """
+
+    def _parameters(self, **inputs):
+        model = ConcreteConstitutiveModels(**inputs, sqrt=np.sqrt)
+        f_c = model.concrete_axial_strength
+        epsilon_c = (700 + 172 * np.sqrt(f_c)) / 10**6
+        stiffness = model.elasticity_concrete * epsilon_c
+        return {
+            "epsilon_c": epsilon_c,
+            "f_c": f_c,
+            "alpha_c": np.maximum(0.157 * f_c**0.785 - 0.905, 0),
+            "n": stiffness / (stiffness - f_c),
+        }
+
+    def _stress(self, strain, epsilon_c, f_c, alpha_c, n):
+        x = np.maximum(strain / epsilon_c, 0)
+        over = x > 1
+        ascending = n * x / (n - 1 + np.minimum(x, 1) ** n)
+        descending = x / (alpha_c * (x - 1) ** 2 + np.maximum(x, 1e-12))
+        return f_c * np.where(over, descending, ascending)
+
+    def _breakpoints(self, epsilon_c, **params):
+        return [epsilon_c]
+
+
+@register_law("quad_linear")
+class QuadLinearSteel(SteelLaw):
+    """简化四折线二次流塑模型, 同SteelTubelarConstitutiveModels"""
+
+    def _stress(
+        self, strain, steel_yield, steel_ultimate, elastic_modulus, epsilon_yield
+    ):
+        hardening = np.clip(strain - 10 * epsilon_yield, 0, 90 * epsilon_yield) / (
+            90 * epsilon_yield
+        )
+        return (
+            np.minimum(elastic_modulus * strain, steel_yield)
+            + (steel_ultimate - steel_yield) * hardening
+        )
+
+    def _breakpoints(self, epsilon_yield, **params):
+        return [epsilon_yield, 10 * epsilon_yield, 100 * epsilon_yield]
+
+
+@register_law("bilinear")
+class BilinearSteel(SteelLaw):
+    """二折线模型(强化段模量E/100), 同PullrollConstitutiveModels"""
+
+    def _stress(self, strain, steel_yield, elastic_modulus, epsilon_yield, **params):
+        return (
+            np.minimum(elastic_modulus * strain, steel_yield)
+            + np.maximum(strain - epsilon_yield, 0) * elastic_modulus / 100
+        )
+
+    def _breakpoints(self, epsilon_yield, **params):
+        return [epsilon_yield]
+
+
+@register_law("elastic_plastic")
+class ElasticPlasticSteel(SteelLaw):
+    """理想弹塑性模型"""
+
+    def _stress(self, strain, steel_yield, elastic_modulus, **params):
+        return np.minimum(elastic_modulus * strain, steel_yield)
+
+    def _breakpoints(self, epsilon_yield, **params):
+        return [epsilon_yield]
+
+
+def compare_laws(
+    kind: str, names: list[str], inputs: dict[str, np.ndarray], strain: np.ndarray
+) -> dict[str, np.ndarray]:
+    """
+    对同一批参数比较多个本构模型, 每个模型一次批量计算
+
+    Parameters
+    ---
+    kind : {"concrete", "steel"}
+        材料类别
+    names : list[str]
+        本构模型名称
+    inputs : dict[str, np.ndarray]
+        模型输入(见CONCRETE_INPUTS, STEEL_INPUTS), 如AbaqusData.constitutive_inputs的批量形式
+    strain : np.ndarray
+        应变矩阵(见ConstitutiveLaw.evaluate)
+
+    Returns
+    ---
+    sigma : dict[str, np.ndarray]
+        本构模型名称 -> 应力
+    """
+    return {i: get_law(kind, i)(**inputs).evaluate(strain) for i in names}
@@ -1,16 +1,783 @@
-from .utils import JsonFile
+from .utils import JsonFile, scan_task_folders
 from pathlib import Path
-from typing import Union, Iterable, Literal, Sequence, overload, Callable
+from typing import Union, Iterable, Literal, Sequence, overload, Callable, Mapping
 import numpy as np
+import json
 import math
+import os
+import sys
+import threading
+import warnings
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+def read_log_records(path: Union[str, Path]) -> list[dict]:
+    """
+    读取abaqus_modeling.py输出的结构化日志(JSON-lines)
+
+    Parameters
+    ---
+    path : str | Path
+        日志路径(logs/*_log.jsonl或任务文件夹下的task_log.jsonl)
+
+    Returns
+    ---
+    records : list[dict]
+        日志记录(无法解析的行会被跳过, 比如进程中断时写了一半的行)
+    """
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def log_timeline(records: Iterable[dict]) -> dict[str, list[dict]]:
+    """
+    将日志记录整理为各任务的阶段时间线
+
+    Parameters
+    ---
+    records : Iterable[dict]
+        日志记录(见read_log_records)
+
+    Returns
+    ---
+    timeline : dict[str, list[dict]]
+        任务名 -> 阶段列表, 阶段为
+        {"phase": str, "start": float, "end": float | None, "duration": float | None, "status": str}
+        未结束的阶段(比如进程被中断)的end, duration为None, status为"interrupted"
+    """
+    timeline: dict[str, list[dict]] = {}
+    opened: dict[tuple, dict] = {}
+    for record in records:
+        event = record.get("event")
+        key = (record.get("task"), record.get("phase"))
+        if event == "phase_start":
+            phase = {
+                "phase": record["phase"],
+                "start": record["time"],
+                "end": None,
+                "duration": None,
+                "status": "interrupted",
+            }
+            timeline.setdefault(record.get("task"), []).append(phase)
+            opened[key] = phase
+        elif event == "phase_end" and key in opened:
+            phase = opened.pop(key)
+            phase["end"] = record["time"]
+            phase["duration"] = record.get("duration", phase["end"] - phase["start"])
+            phase["status"] = record.get("status", "success")
+    return timeline
+
+
+CHANNEL_CODEC = "delta-shuffle-zlib"
+
+
+def encode_channel(values: Sequence[float]) -> bytes:
+    """
+    无损压缩一个通道(与abaqus_modeling.py中的Utils.encode_channel相同):
+    float64(小端)按uint64逐项差分(模2^64), 按字节重排(shuffle)后zlib压缩
+    """
+    integers = np.ascontiguousarray(values, dtype="<f8").view("<u8")
+    deltas = np.diff(integers, prepend=np.uint64(0)).astype("<u8")
+    return zlib.compress(deltas.view(np.uint8).reshape(-1, 8).T.tobytes(), 9)
+
+
+def decode_channel(data: bytes, count: int) -> np.ndarray:
+    """encode_channel的逆运算"""
+    shuffled = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+    deltas = shuffled.reshape(8, count).T.copy().view("<u8").ravel()
+    return np.cumsum(deltas, dtype="<u8").view("<f8")
+
+
+class ResultChannels(Mapping):
+    """
+    按通道惰性读取的历程数据(odb_channels.json + odb_channels.bin)
+
+    只读取头文件, 通道数据在访问时才读取, 结构与odb_extract.json相同
+    - odb_channels-1: 原始float64数组, 以内存映射的方式读取
+    - odb_channels-2: 逐通道无损压缩(见encode_channel), 读取时解码,
+      可能已降采样(header["downsample"], 见abaqus_modeling.py中的Utils.downsample_indices)
+
+    Examples
+    ---
+    >>> channels = ResultChannels("results/odb_channels.json", "results/odb_channels.bin")
+    >>> channels["top_referpoint"]["RF3"]  # 只读取这一个通道
+    memmap([...])
+    >>> channels.header["calculating_msg"]
+    {...}
+    """
+
+    GROUPS = ("bottom_referpoint", "top_referpoint")
+    HEADER_KEYS = ("format", "codec", "dtype", "byteorder", "channels", "downsample")
+
+    def __init__(self, path_header: Union[str, Path], path_bin: Union[str, Path]):
+        self.path_header = Path(path_header)
+        self.path_bin = Path(path_bin)
+        self.header: dict = JsonFile.load(self.path_header)
+        self.dtype = np.dtype(self.header["dtype"]).newbyteorder(
+            "<" if self.header["byteorder"] == "little" else ">"
+        )
+        self.__decoded: dict[tuple[str, str], np.ndarray] = {}
+
+    def __getitem__(self, group: str) -> Mapping[str, np.ndarray]:
+        if group not in self.header["channels"]:
+            raise KeyError(group)
+        return _ChannelGroup(self, group)
+
+    def __iter__(self):
+        return iter(self.header["channels"])
+
+    def __len__(self) -> int:
+        return len(self.header["channels"])
+
+    def array(self, group: str, channel: str) -> np.ndarray:
+        """读取一个通道(odb_channels-1为只读的内存映射, odb_channels-2为解码后的数组)"""
+        if self.header["format"] == "odb_channels-1":
+            offset, count = self.header["channels"][group][channel]
+            if not count:
+                return np.empty(0, dtype=self.dtype)
+            return np.memmap(
+                self.path_bin, dtype=self.dtype, mode="r", offset=offset, shape=(count,)
+            )
+
+        key = (group, channel)
+        if key not in self.__decoded:
+            offset, size, count = self.header["channels"][group][channel]
+            with open(self.path_bin, "rb") as f:
+                f.seek(offset)
+                values = decode_channel(f.read(size), count)
+            values.flags.writeable = False
+            self.__decoded[key] = values
+        return self.__decoded[key]
+
+    def to_dict(self) -> dict:
+        """转换为odb_extract.json格式的数据(通道为list)"""
+        data = {k: v for k, v in self.header.items() if k not in self.HEADER_KEYS}
+        for group in self:
+            data[group] = {k: v.tolist() for k, v in self[group].items()}
+        return data
+
+    @classmethod
+    def convert(
+        cla,
+        odb_extract: dict,
+        path_header: Union[str, Path],
+        path_bin: Union[str, Path],
+        codec: str = CHANNEL_CODEC,
+    ):
+        """
+        将odb_extract.json格式的数据转换为按通道存储的格式(用于旧的计算结果)
+
+        Parameters
+        ---
+        codec : str, default="delta-shuffle-zlib"
+            None为原始float64数组(odb_channels-1)
+        """
+        header = {k: v for k, v in odb_extract.items() if k not in cla.GROUPS}
+        if codec is None:
+            header.update(
+                format="odb_channels-1",
+                dtype="f8",
+                byteorder=sys.byteorder,
+                channels={},
+            )
+        elif codec == CHANNEL_CODEC:
+            header.update(
+                format="odb_channels-2",
+                codec=codec,
+                dtype="f8",
+                byteorder="little",
+                channels={},
+                downsample=None,
+            )
+        else:
+            raise ValueError(f"unsupported codec: {codec}")
+        offset = 0
+        with open(path_bin, "wb") as f:
+            for group in cla.GROUPS:
+                header["channels"][group] = {}
+                for channel, values in odb_extract[group].items():
+                    if codec is None:
+                        values = np.asarray(values, dtype="f8")
+                        f.write(values.tobytes())
+                        header["channels"][group][channel] = [offset, len(values)]
+                        offset += values.nbytes
+                    else:
+                        encoded = encode_channel(values)
+                        f.write(encoded)
+                        header["channels"][group][channel] = [
+                            offset,
+                            len(encoded),
+                            len(values),
+                        ]
+                        offset += len(encoded)
+        JsonFile.write(header, path_header)
+        return cla(path_header, path_bin)
+
+
+def load_odb_extract(path_header: Union[str, Path]) -> dict:
+    """读取按通道存储的计算结果, 转换为odb_extract.json格式的数据(通道数据位于同一文件夹)"""
+    path_header = Path(path_header)
+    return ResultChannels(
+        path_header, path_header.with_name("odb_channels.bin")
+    ).to_dict()
+
+
+class _ChannelGroup(Mapping):
+    """ResultChannels中一个参考点的各通道"""
+
+    def __init__(self, channels: ResultChannels, group: str):
+        self.channels = channels
+        self.group = group
+
+    def __getitem__(self, channel: str) -> np.ndarray:
+        if channel not in self.channels.header["channels"][self.group]:
+            raise KeyError(channel)
+        return self.channels.array(self.group, channel)
+
+    def __iter__(self):
+        return iter(self.channels.header["channels"][self.group])
+
+    def __len__(self) -> int:
+        return len(self.channels.header["channels"][self.group])
+
+
+FEATURE_KEYS = (
+    "ultimate_load",  # 极限荷载N_u(N)
+    "peak_displacement",  # 峰值荷载对应的轴向位移(mm)
+    "initial_stiffness",  # 初始刚度, 上升段0.4N_u处的割线刚度(N/mm)
+    "yield_displacement",  # 屈服位移, 上升段0.75N_u处位移/0.75(mm)
+    "displacement_85",  # 下降段荷载降至0.85N_u时的位移(mm), 未降至时为None
+    "ductility_index",  # 延性系数displacement_85/yield_displacement
+    "eccentricity",  # 加载点相对截面形心的偏心距(mm)
+    "peak_moment",  # 偏压构件的最大端弯矩N*e(N*mm), 轴压构件为None
+    "peak_moment_curvature",  # 最大端弯矩对应的平均曲率(1/mm)
+)
+
+
+def first_crossing_rows(
+    x: np.ndarray, y: np.ndarray, target: np.ndarray, mask: np.ndarray
+) -> np.ndarray:
+    """
+    逐行(向量化)求y首次越过target时线性插值得到的x, 只考虑mask为True的连续区段
+
+    区段首点的y与target的相对大小决定越过的方向, 首点已越过时为首点的x
+
+    Parameters
+    ---
+    x, y : np.ndarray
+        形状为(行数, 点数)
+    target : np.ndarray
+        形状为(行数,)
+    mask : np.ndarray
+        形状为(行数, 点数), 每行为一个连续区段
+
+    Returns
+    ---
+    crossing : np.ndarray
+        形状为(行数,), 不越过(或区段为空)时为nan
+    """
+    rows = np.arange(len(x))
+    start = np.argmax(mask, axis=1)
+    first = y[rows, start]
+    with np.errstate(invalid="ignore"):
+        above = np.where(
+            (first < target)[:, None], y >= target[:, None], y <= target[:, None]
+        )
+    above &= mask
+    found = above.any(axis=1)
+    i = np.argmax(above, axis=1)
+    previous = np.maximum(i - 1, start)
+    x0, x1, y0, y1 = x[rows, previous], x[rows, i], y[rows, previous], y[rows, i]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing = np.where(i == start, x1, x0 + (target - y0) * (x1 - x0) / (y1 - y0))
+    return np.where(found, crossing, np.nan)
+
+
+def batch_curve_features(
+    top_referpoints: Sequence[dict],
+    bottom_referpoints: Sequence[dict],
+    eccentricities: Sequence[float],
+    lengths: Sequence[float],
+) -> list[dict]:
+    """
+    批量提取荷载-位移曲线与弯矩-曲率曲线的特征(定义见curve_features)
+
+    各任务的历程数据以nan补齐为(任务数, 最大增量步数)的数组, 一次向量化计算
+
+    Returns
+    ---
+    features : list[dict]
+        与输入一一对应, key见FEATURE_KEYS, 无法计算的值为None
+    """
+    count = len(top_referpoints)
+    lengths = np.asarray(lengths, dtype=float)
+    sizes = np.array(
+        [
+            min(len(t["RF3"]), len(b["U3"]))
+            for t, b in zip(top_referpoints, bottom_referpoints)
+        ],
+        dtype=int,
+    ).reshape(count)
+    width = max(int(sizes.max()) if count else 0, 1)
+    columns = np.arange(width)
+    valid = columns < sizes[:, None]
+
+    def padded(referpoints: Sequence[dict], key: str) -> np.ndarray:
+        array = np.full((count, width), np.nan)
+        array[valid] = np.concatenate(
+            [
+                np.asarray(r[key][:size], dtype=float)
+                for r, size in zip(referpoints, sizes)
+            ]
+            or [np.empty(0)]
+        )
+        return array
+
+    load = np.abs(padded(top_referpoints, "RF3"))
+    displacement = np.abs(
+        padded(top_referpoints, "U3") - padded(bottom_referpoints, "U3")
+    )
+    rows = np.arange(count)
+    peak = np.argmax(np.where(valid, load, -np.inf), axis=1)
+    ultimate_load = load[rows, peak]
+    peak_displacement = displacement[rows, peak]
+    positive = ultimate_load > 0
+
+    # ===上升段
+    ascending = valid & (columns <= peak[:, None])
+    displacement_40 = first_crossing_rows(
+        displacement, load, 0.4 * ultimate_load, ascending
+    )
+    displacement_75 = first_crossing_rows(
+        displacement, load, 0.75 * ultimate_load, ascending
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        initial_stiffness = 0.4 * ultimate_load / displacement_40
+    yield_displacement = displacement_75 / 0.75
+
+    # ===下降段
+    descending = valid & (columns >= peak[:, None])
+    displacement_85 = first_crossing_rows(
+        displacement, load, 0.85 * ultimate_load, descending
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ductility_index = displacement_85 / yield_displacement
+
+    # ===弯矩-曲率
+    eccentricities = [float(i) for i in eccentricities]
+    bending = np.array([bool(i) for i in eccentricities], dtype=bool).reshape(count)
+    peak_moment = ultimate_load * np.asarray(eccentricities, dtype=float).reshape(count)
+    if bending.any():
+        rotation = np.hypot(
+            *(
+                padded(top_referpoints, k) - padded(bottom_referpoints, k)
+                for k in ("UR1", "UR2")
+            )
+        )
+        peak_moment_curvature = rotation[rows, peak] / lengths.reshape(count)
+    else:
+        peak_moment_curvature = np.full(count, np.nan)
+
+    def value(array: np.ndarray, row: int, truthy: bool = False):
+        item = float(array[row])
+        if math.isnan(item) or (truthy and not item):
+            return None
+        return item
+
+    results = []
+    for row in range(count):
+        features = dict.fromkeys(FEATURE_KEYS)
+        features["eccentricity"] = eccentricities[row]
+        results.append(features)
+        if sizes[row] == 0:
+            continue
+        features["ultimate_load"] = float(ultimate_load[row])
+        features["peak_displacement"] = float(peak_displacement[row])
+        if not positive[row]:
+            continue
+        # first_crossing_rows的结果为nan(不越过)或0(首点已越过)时, 不计算由其导出的特征
+        if value(displacement_40, row, True) is not None:
+            features["initial_stiffness"] = value(initial_stiffness, row)
+        if value(displacement_75, row, True) is not None:
+            features["yield_displacement"] = value(yield_displacement, row)
+        features["displacement_85"] = value(displacement_85, row)
+        if features["displacement_85"] and features["yield_displacement"]:
+            features["ductility_index"] = value(ductility_index, row)
+        if bending[row]:
+            features["peak_moment"] = float(peak_moment[row])
+            features["peak_moment_curvature"] = value(peak_moment_curvature, row)
+    return results
+
+
+def curve_features(
+    top_referpoint: dict,
+    bottom_referpoint: dict,
+    eccentricity: float = 0,
+    length: float = 1,
+) -> dict:
+    """
+    从参考点的历程数据中提取荷载-位移曲线与弯矩-曲率曲线的特征
+
+    Parameters
+    ---
+    top_referpoint, bottom_referpoint : dict
+        odb_extract.json中的参考点历程数据
+    eccentricity : float, default=0
+        加载点相对截面形心的偏心距(mm)
+    length : float, default=1
+        构件长度(mm), 用于由端部转角计算平均曲率
+
+    Returns
+    ---
+    features : dict
+        key见FEATURE_KEYS, 无法计算的值为None
+        荷载取顶部参考点|RF3|, 位移取两端参考点的相对轴向位移|U3_top - U3_bottom|
+
+    See Also
+    ---
+    batch_curve_features : 多个任务一次向量化计算
+    """
+    return batch_curve_features(
+        [top_referpoint], [bottom_referpoint], [eccentricity], [length]
+    )[0]
+
+
+CURVE_QUANTITIES = {
+    # 名称 -> f(top, bottom, eccentricity, length), top, bottom为参考点的各通道
+    "time": lambda top, bottom, e, length: top["time"],
+    "load": lambda top, bottom, e, length: np.abs(top["RF3"]),
+    "shortening": lambda top, bottom, e, length: np.abs(top["U3"] - bottom["U3"]),
+    "rotation": lambda top, bottom, e, length: np.hypot(
+        top["UR1"] - bottom["UR1"], top["UR2"] - bottom["UR2"]
+    ),
+    "curvature": lambda top, bottom, e, length: np.hypot(
+        top["UR1"] - bottom["UR1"], top["UR2"] - bottom["UR2"]
+    )
+    / length,
+    "moment": lambda top, bottom, e, length: np.abs(top["RF3"]) * e,
+}
+
+
+def curve_quantity(
+    channels: Mapping[str, Mapping[str, np.ndarray]],
+    name: str,
+    eccentricity: float = 0,
+    length: float = 1,
+) -> np.ndarray:
+    """
+    由参考点的历程数据计算曲线的量
+
+    Parameters
+    ---
+    channels : Mapping
+        odb_extract格式的数据(或ResultChannels)
+    name : str
+        CURVE_QUANTITIES中的名称(与curve_features的定义一致),
+        或"参考点.通道"(如"top_referpoint.UR1")
+    eccentricity, length : float
+        偏心距与构件长度(mm), 用于moment与curvature
+    """
+    if "." in name:
+        group, channel = name.split(".", 1)
+        return np.asarray(channels[group][channel], dtype=float)
+    top, bottom = channels["top_referpoint"], channels["bottom_referpoint"]
+    n = min(len(top["time"]), len(bottom["time"]))
+    top = {k: np.asarray(v[:n], dtype=float) for k, v in top.items()}
+    bottom = {k: np.asarray(v[:n], dtype=float) for k, v in bottom.items()}
+    return CURVE_QUANTITIES[name](top, bottom, eccentricity, length)
+
+
+def monotone_branch(
+    x: np.ndarray, y: np.ndarray, branch: Literal["envelope", "first"] = "envelope"
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    取x严格递增的部分, 用于插值
+
+    Parameters
+    ---
+    branch : {"envelope", "first"}, default="envelope"
+        - "envelope" : 只保留x超过之前所有点的点, 跳过回退段(如卸载、snap-back)
+        - "first" : 截断于x第一次回退处
+        x重复的点只保留第一个, 非有限值被忽略
+    """
+    n = min(len(x), len(y))
+    x, y = np.asarray(x[:n], dtype=float), np.asarray(y[:n], dtype=float)
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+    if branch == "first":
+        back = np.flatnonzero(np.diff(x) < 0)
+        if len(back):
+            x, y = x[: back[0] + 1], y[: back[0] + 1]
+    elif branch != "envelope":
+        raise ValueError(f"unsupported branch: {branch}")
+    previous = np.maximum.accumulate(np.concatenate(([-np.inf], x[:-1])))
+    keep = x > previous
+    return x[keep], y[keep]
+
+
+def resample_curve(
+    x: np.ndarray,
+    y: np.ndarray,
+    grid: np.ndarray,
+    branch: Literal["envelope", "first"] = "envelope",
+) -> np.ndarray:
+    """将曲线(x, y)线性插值到grid上(见monotone_branch), grid超出x范围的部分为nan"""
+    x, y = monotone_branch(x, y, branch)
+    if len(x) == 0:
+        return np.full(len(grid), np.nan)
+    return np.interp(grid, x, y, left=np.nan, right=np.nan)
+
+
+@dataclass
+class CurveSet:
+    """
+    对齐到同一横坐标上的多个任务的曲线(见TaskFolderList.curves)
+
+    Parameters
+    ---
+    names : list[str]
+        任务名
+    grid : np.ndarray
+        横坐标, 形状为(点数,)
+    values : np.ndarray
+        纵坐标, 形状为(任务数, 点数), 超出任务曲线范围(或读取失败)的部分为nan
+    x, y : str
+        横、纵坐标的量(见curve_quantity)
+    """
+
+    names: list[str]
+    grid: np.ndarray
+    values: np.ndarray
+    x: str = ""
+    y: str = ""
+    failed: dict[str, str] = field(default_factory=dict)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.values[self.names.index(name)]
+
+    def mean(self) -> np.ndarray:
+        """各横坐标处的均值(忽略nan)"""
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanmean(self.values, axis=0)
+
+    def percentile(self, q: Union[float, Sequence[float]]) -> np.ndarray:
+        """各横坐标处的百分位数(忽略nan), 如percentile([5, 95])为90%带"""
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanpercentile(self.values, q, axis=0)
+
+    def distances(self) -> np.ndarray:
+        """
+        任务两两之间的均方根距离, 形状为(任务数, 任务数)
+
+        只在两条曲线均有定义的横坐标上计算, 没有公共部分时为nan
+        """
+        mask = np.isfinite(self.values).astype(float)
+        values = np.where(mask > 0, self.values, 0)
+        square = values**2
+        count = mask @ mask.T
+        total = square @ mask.T + mask @ square.T - 2 * values @ values.T
+        with np.errstate(all="ignore"):
+            return np.sqrt(np.maximum(total, 0) / count)
+
+
+def task_curve(
+    task: "TaskFolder", x: str, y: str, branch: str = "envelope"
+) -> tuple[np.ndarray, np.ndarray]:
+    """任务的曲线(x严格递增的部分, 见monotone_branch)"""
+    channels = task.channels
+    return monotone_branch(
+        curve_quantity(channels, x, task.eccentricity, task.z_len),
+        curve_quantity(channels, y, task.eccentricity, task.z_len),
+        branch,
+    )
+
+
+class FileCache:
+    """
+    按文件缓存读取结果的LRU缓存(按字节数限制大小, 线程安全)
+
+    缓存项以(文件路径, 标签)为键, 以文件的修改时间与大小校验:
+    文件被重新写出(比如重新导出结果)后, 下一次读取会自动重新加载
+
+    Parameters
+    ---
+    max_bytes : int, default=256MB
+        缓存项的总字节数上限, 缓存项的字节数按源文件大小计算
+        (解析后的对象通常比源文件大数倍)
+
+    Examples
+    ---
+    >>> TaskFolder.cache.max_bytes = 1024**3  # 所有TaskFolder共用
+    >>> TaskFolder.cache.stats
+    {"hits": ..., "misses": ..., "evictions": ..., "entries": ..., "bytes": ..., "max_bytes": ...}
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024**2) -> None:
+        self.max_bytes = max_bytes
+        self.__entries: OrderedDict[tuple[str, str], tuple] = OrderedDict()
+        self.__lock = threading.RLock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(
+        self,
+        path: Union[str, Path],
+        loader: Callable[[Path], object] = JsonFile.load,
+        tag: str = "",
+        size: int = None,
+    ):
+        """
+        读取path(命中缓存且文件未修改时直接返回缓存)
+
+        Parameters
+        ---
+        path : str | Path
+            文件路径
+        loader : Callable[[Path], object], default=JsonFile.load
+            读取函数
+        tag : str, default=""
+            同一文件有多种读取方式(loader)时, 用于区分缓存项
+        size : int, default=None
+            缓存项的字节数, 为None时取文件大小(loader只提取少量数据时应指定)
+        """
+        path = Path(path)
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = (str(path), tag)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader(path)  # 读取文件时不持有锁
+        self.put(path, value, tag, stat.st_size if size is None else size, signature)
+        return value
+
+    def put(
+        self,
+        path: Union[str, Path],
+        value,
+        tag: str = "",
+        size: int = None,
+        signature: tuple[int, int] = None,
+    ):
+        """
+        写入缓存项(比如在其他进程中读取的文件)
+
+        Parameters
+        ---
+        signature : tuple[int, int], default=None
+            读取文件前的(st_mtime_ns, st_size), 为None时取当前文件的状态
+        """
+        path = Path(path)
+        if signature is None:
+            stat = path.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+        size = signature[1] if size is None else size
+        key = (str(path), tag)
+        with self.__lock:
+            old = self.__entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self.__entries[key] = (signature, value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes and len(self.__entries) > 1:
+                _, (_, _, size_) = self.__entries.popitem(last=False)
+                self.bytes -= size_
+                self.evictions += 1
+
+    def invalidate(self, root: Union[str, Path] = None, tag: str = None):
+        """
+        删除缓存项
+
+        Parameters
+        ---
+        root : str | Path, default=None
+            只删除该路径(文件或文件夹)下的缓存项, 为None时不限路径
+        tag : str, default=None
+            只删除该标签的缓存项, 为None时不限标签
+        """
+        root = None if root is None else str(Path(root))
+        with self.__lock:
+            for key in list(self.__entries):
+                path, tag_ = key
+                if root is not None and not (
+                    path == root or path.startswith(root.rstrip("\\/") + os.sep)
+                ):
+                    continue
+                if tag is not None and tag_ != tag:
+                    continue
+                self.bytes -= self.__entries.pop(key)[2]
+
+    def clear(self):
+        """清空缓存并重置统计"""
+        with self.__lock:
+            self.__entries.clear()
+            self.bytes = self.hits = self.misses = self.evictions = 0
+
+    @property
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.__entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def load_with_signature(
+    job: tuple[Union[str, Path], Callable[[Path], object]]
+) -> tuple[tuple[int, int], object]:
+    """job为(路径, 读取函数), 读取文件并返回读取前的(st_mtime_ns, st_size)(供进程池使用)"""
+    path, loader = job
+    stat = Path(path).stat()
+    return (stat.st_mtime_ns, stat.st_size), loader(Path(path))
+
+
+class BulkError(Exception):
+    """
+    批量操作中部分任务出错
+
+    Attributes
+    ---
+    errors : dict[str, BaseException]
+        任务名 -> 异常
+    """
+
+    def __init__(self, errors: dict[str, BaseException]) -> None:
+        self.errors = errors
+        super().__init__(
+            f"{len(errors)} task(s) failed: "
+            + ", ".join(f"{k} ({v!r})" for k, v in list(errors.items())[:10])
+            + (", ..." if len(errors) > 10 else "")
+        )
 
 
 class TaskFolder:
+    cache = FileCache()  # 所有TaskFolder共用的缓存
     circul_area_to_dia = staticmethod(lambda area: math.sqrt(area * 4 / math.pi))
 
     def __init__(self, folder_path: Union[str, Path]) -> None:
         self.path_root: Path = Path(folder_path).absolute()
-        self.__cache_data = {}
 
     def __str__(self) -> str:
         return str(self.path_root.name)
@@ -89,14 +856,14 @@ class TaskFolder:
         target_point = np.array((self.x_len * x, self.y_len * y, end_z))
 
         referpoint_displacement = (
-            self.odb_extract["top_referpoint"]
+            self.channels["top_referpoint"]
             if end == "top"
-            else self.odb_extract["bottom_referpoint"]
+            else self.channels["bottom_referpoint"]
         )
 
         key_table = ("U1", "U2", "U3", "UR1", "UR2", "UR3")
         target_displacement_data = {i: [] for i in key_table}
-        target_displacement_data["time"] = referpoint_displacement["time"]
+        target_displacement_data["time"] = referpoint_displacement["time"].tolist()
 
         to_target = target_point - referpoint
 
@@ -118,10 +885,8 @@ class TaskFolder:
         return target_displacement_data
 
     def clean_cache(self, key=None):
-        if key is None:
-            self.__cache_data.clear()
-        else:
-            self.__cache_data.pop(key)
+        """删除该任务的缓存项(key为None时删除全部), 文件修改后缓存会自动失效, 一般无需调用"""
+        self.cache.invalidate(self.path_root, key)
 
     @property
     def path_status(self) -> Path:
@@ -143,19 +908,36 @@ class TaskFolder:
     def path_odb_extract(self) -> Path:
         return self.path_results / "odb_extract.json"
 
+    @property
+    def path_channels_header(self) -> Path:
+        return self.path_results / "odb_channels.json"
+
+    @property
+    def path_channels_bin(self) -> Path:
+        return self.path_results / "odb_channels.bin"
+
+    @property
+    def path_features(self) -> Path:
+        return self.path_results / "features.json"
+
+    @property
+    def path_log(self) -> Path:
+        return self.path_root / "task_log.jsonl"
+
+    @property
+    def log_timeline(self) -> list[dict]:
+        """该任务的阶段时间线(见log_timeline), 没有日志时为空列表"""
+        if not self.path_log.exists():
+            return []
+        return log_timeline(read_log_records(self.path_log)).get(str(self), [])
+
     @property
     def status(self) -> dict:
-        key = "status"
-        if key not in self.__cache_data:
-            self.__cache_data[key] = JsonFile.load(self.path_status)
-        return self.__cache_data[key]
+        return self.cache.get(self.path_status, tag="status")
 
     @property
     def raw_task_params(self) -> dict:
-        key = "raw_task_params"
-        if key not in self.__cache_data:
-            self.__cache_data[key] = JsonFile.load(self.path_taskparams)
-        return self.__cache_data[key]
+        return self.cache.get(self.path_taskparams, tag="raw_task_params")
 
     @property
     def task_params(self) -> dict:
@@ -167,9 +949,8 @@ class TaskFolder:
 
     @property
     def task_params_abstract_1(self) -> dict:
-        key = "task_params_abstract_1"
-        if key not in self.__cache_data:
-            self.__cache_data[key] = {
+        def loader(_):
+            return {
                 "concrete": self.user_params["material_concrete"]["grade"],
                 "tubelar": self.user_params["material_tubelar"]["grade"],
                 "rod": self.user_params["material_rod"]["grade"],
@@ -197,7 +978,10 @@ class TaskFolder:
                 "name": self.user_params["meta"]["taskname"],
                 "comments": self.user_params["comments"],
             }
-        return self.__cache_data[key]
+
+        return self.cache.get(
+            self.path_taskparams, loader, tag="task_params_abstract_1", size=0
+        )
 
     @property
     def x_len(self) -> float:
@@ -213,15 +997,133 @@ class TaskFolder:
 
     @property
     def comments(self) -> dict:
-        if "comments" not in self.__cache_data:
-            self.__cache_data["comments"] = JsonFile.load(self.path_comments)
-        return self.__cache_data["comments"]
+        return self.cache.get(self.path_comments, tag="comments")
 
     @property
     def odb_extract(self) -> dict:
-        if "odb_extract" not in self.__cache_data:
-            self.__cache_data["odb_extract"] = JsonFile.load(self.path_odb_extract)
-        return self.__cache_data["odb_extract"]
+        """
+        odb_extract.json格式的计算结果, 由按通道存储的结果解码(见channels),
+        只需要部分通道时应使用channels
+        """
+        self.channels
+        return self.cache.get(
+            self.path_channels_header,
+            load_odb_extract,
+            tag="odb_extract",
+            size=self.path_channels_bin.stat().st_size,
+        )
+
+    @property
+    def eccentricity(self) -> float:
+        """加载点(顶部参考点)相对截面形心的偏心距(mm)"""
+        position = self.task_params["referpoint"]["top"]["position"]
+        return math.hypot(position[0] - self.x_len / 2, position[1] - self.y_len / 2)
+
+    @property
+    def features(self) -> dict:
+        """
+        荷载-位移曲线与弯矩-曲率曲线的特征(见curve_features)
+
+        计算结果缓存在results/features.json中, 以odb_channels.json的修改时间为键,
+        计算结果重新导出后会重新计算
+        """
+        features = self.cached_features()
+        if features is None:
+            channels = self.channels
+            features = curve_features(
+                channels["top_referpoint"],
+                channels["bottom_referpoint"],
+                self.eccentricity,
+                self.z_len,
+            )
+            self.save_features(features)
+        return features
+
+    def cached_features(self) -> Union[dict, None]:
+        """results/features.json中缓存的特征, 没有缓存或已失效(计算结果重新导出)时为None"""
+        self.channels  # 旧的结果先转换为按通道存储的格式
+        if not self.path_features.exists():
+            return None
+        cache = self.cache.get(self.path_features, tag="features")
+        if cache.get("mtime") != self.path_channels_header.stat().st_mtime or set(
+            cache.get("features", ())
+        ) != set(FEATURE_KEYS):
+            return None
+        return cache["features"]
+
+    def save_features(self, features: dict):
+        """将特征写入results/features.json(以当前odb_channels.json的修改时间为键)"""
+        JsonFile.write(
+            {"mtime": self.path_channels_header.stat().st_mtime, "features": features},
+            self.path_features,
+        )
+
+    @property
+    def phase_timing(self) -> dict[str, list[dict]]:
+        """
+        各阶段(modeling, calculating, extracting)的子阶段耗时
+
+        Returns
+        ---
+        phase_timing : dict[str, list[dict]]
+            阶段 -> 子阶段列表, 子阶段为{"name": str, "duration": float, "peak_memory": int | None}
+        """
+        return {
+            stage: self.channels.header.get(f"{stage}_msg", {})
+            .get("phase_timing", {})
+            .get("phases", [])
+            for stage in ("modeling", "calculating", "extracting")
+        }
+
+    @property
+    def channels(self) -> ResultChannels:
+        """
+        按通道惰性读取的计算结果(见ResultChannels), 只需要部分通道时应使用它代替odb_extract
+
+        旧的计算结果(没有odb_channels.json或早于odb_extract.json)会先转换为按通道存储的格式(无损压缩)
+        """
+        if self.path_odb_extract.exists() and (
+            not self.path_channels_header.exists()
+            or self.path_channels_header.stat().st_mtime
+            < self.path_odb_extract.stat().st_mtime
+        ):
+            ResultChannels.convert(
+                JsonFile.load(self.path_odb_extract),
+                self.path_channels_header,
+                self.path_channels_bin,
+            )
+        return self.cache.get(
+            self.path_channels_header,
+            lambda path: ResultChannels(path, self.path_channels_bin),
+            tag="channels",
+        )
+
+    def compact_results(self) -> dict[str, int]:
+        """
+        将计算结果压缩存储(odb_channels-2), 并删除odb_extract.json
+
+        Returns
+        ---
+        size : dict[str, int]
+            {"before": 压缩前的字节数, "after": 压缩后的字节数}
+        """
+        paths = (
+            self.path_odb_extract,
+            self.path_channels_header,
+            self.path_channels_bin,
+        )
+        before = sum(i.stat().st_size for i in paths if i.exists())
+        channels = self.channels
+        if channels.header["format"] != "odb_channels-2":
+            data = channels.to_dict()
+            del channels
+            ResultChannels.convert(
+                data, self.path_channels_header, self.path_channels_bin
+            )
+        if self.path_odb_extract.exists():
+            self.path_odb_extract.unlink()
+        after = sum(i.stat().st_size for i in paths if i.exists())
+        return {"before": before, "after": after}
 
     @property
     def is_done(self) -> bool:
@@ -232,19 +1134,43 @@ class TaskFolder:
         return True
 
 
-class TaskFolderList(list):
-    def __init__(self, item: Union[Iterable[TaskFolder], str, Path] = None):
-        if isinstance(item, (str, Path)):
-            path = Path(item).absolute()
+def iter_task_folders(
+    warehouse: Union[str, Path],
+    status: Union[str, Callable[[dict], bool]] = None,
+    include: Iterable[str] = None,
+    exclude: Iterable[str] = None,
+) -> Iterable[TaskFolder]:
+    """
+    流式产出任务仓库中的任务(按任务名排序), 参数见utils.scan_task_folders
 
-            def istask(path: Path):
-                if not path.is_dir():
-                    return False
-                if not (path / "task_params.json"):
-                    return False
-                return True
+    Examples
+    ---
+    >>> for task in iter_task_folders("tasks", status="done", include=["ecc_*"]):
+    ...     task.features
+    """
+    for path in scan_task_folders(Path(warehouse).absolute(), status, include, exclude):
+        yield TaskFolder(path)
 
-            return super().__init__(TaskFolder(i) for i in path.iterdir() if istask(i))
+
+class TaskFolderList(list):
+    def __init__(
+        self,
+        item: Union[Iterable[TaskFolder], str, Path] = None,
+        status: Union[str, Callable[[dict], bool]] = None,
+        include: Iterable[str] = None,
+        exclude: Iterable[str] = None,
+    ):
+        """
+        Parameters
+        ---
+        item : Iterable[TaskFolder] | str | Path, default=None
+            任务, 或任务仓库路径
+        status, include, exclude :
+            item为任务仓库路径时, 筛选任务的条件(见utils.scan_task_folders)
+            只需要逐个处理任务时, iter_task_folders可以不等扫描完成就开始产出
+        """
+        if isinstance(item, (str, Path)):
+            return super().__init__(iter_task_folders(item, status, include, exclude))
         elif isinstance(item, Iterable):
             super().__init__(item)
         elif item is None:
@@ -293,3 +1219,371 @@ class TaskFolderList(list):
     @property
     def done_tasks(self):
         return self.__class__(i for i in self if i.is_done)
+
+    def phase_profile(self) -> dict[str, list]:
+        """
+        统计已完成任务各子阶段的耗时, 用于定位瓶颈
+
+        Returns
+        ---
+        profile : dict[str, list]
+            列名 -> 列数据, 可直接传入utils.gene_markdown_table
+            share为该子阶段总耗时占全部子阶段总耗时的比例
+        """
+        durations: dict[tuple, list[float]] = {}
+        for task in self.done_tasks:
+            for stage, phases in task.phase_timing.items():
+                for phase in phases:
+                    durations.setdefault((stage, phase["name"]), []).append(
+                        phase["duration"]
+                    )
+        grand_total = sum(sum(i) for i in durations.values()) or 1
+        profile = {
+            k: []
+            for k in (
+                "stage",
+                "phase",
+                "count",
+                "mean",
+                "median",
+                "max",
+                "total",
+                "share",
+            )
+        }
+        for (stage, name), values in durations.items():
+            values = np.array(values)
+            profile["stage"].append(stage)
+            profile["phase"].append(name)
+            profile["count"].append(len(values))
+            profile["mean"].append(float(values.mean()))
+            profile["median"].append(float(np.median(values)))
+            profile["max"].append(float(values.max()))
+            profile["total"].append(float(values.sum()))
+            profile["share"].append(float(values.sum() / grand_total))
+        return profile
+
+    def feature_table(self, keys: Iterable[str] = FEATURE_KEYS) -> dict[str, list]:
+        """
+        已完成任务的特征表(见TaskFolder.features)
+
+        Parameters
+        ---
+        keys : Iterable[str], default=FEATURE_KEYS
+            需要的特征
+
+        Returns
+        ---
+        table : dict[str, list]
+            列名 -> 列数据, 第一列为任务名, 可直接传入utils.gene_markdown_table
+        """
+        keys = tuple(keys)
+        tasks = list(self.done_tasks)
+        features = [task.cached_features() for task in tasks]
+        stale = [i for i, item in enumerate(features) if item is None]
+        if stale:
+            # ===缓存失效的任务一次向量化计算(见batch_curve_features)
+            channels = [tasks[i].channels for i in stale]
+            computed = batch_curve_features(
+                [i["top_referpoint"] for i in channels],
+                [i["bottom_referpoint"] for i in channels],
+                [tasks[i].eccentricity for i in stale],
+                [tasks[i].z_len for i in stale],
+            )
+            for i, item in zip(stale, computed):
+                tasks[i].save_features(item)
+                features[i] = item
+
+        table = {"name": [str(task) for task in tasks]}
+        for k in keys:
+            table[k] = [item[k] for item in features]
+        return table
+
+    def curves(
+        self,
+        x: str = "shortening",
+        y: str = "load",
+        grid: Union[int, np.ndarray] = 200,
+        branch: Literal["envelope", "first"] = "envelope",
+        path_cache: Union[str, Path, bool] = None,
+        max_workers: int = None,
+    ) -> CurveSet:
+        """
+        将各任务的曲线重采样到同一横坐标上, 得到(任务数, 点数)的数组
+
+        Parameters
+        ---
+        x, y : str, default="shortening", "load"
+            横、纵坐标的量, 见CURVE_QUANTITIES与curve_quantity(比如"rotation", "moment")
+        grid : int | np.ndarray, default=200
+            横坐标; 为int时取0到各任务x最大值之间的等距点
+        branch : {"envelope", "first"}, default="envelope"
+            x不单调(卸载、snap-back)时的处理, 见monotone_branch
+        path_cache : str | Path | bool, default=None
+            缓存文件(.npz), 为None时为任务仓库下的curve_cache/{x}-{y}-{branch}.npz
+            (任务不在同一仓库时不缓存), 为False时不缓存;
+            以odb_channels.json的修改时间与大小校验, 只重新计算新增或重新导出的任务
+            (读取失败的任务连同失败原因一起缓存)
+        max_workers : int, default=None
+            读取历程数据的并发数, 见map
+
+        Returns
+        ---
+        curves : CurveSet
+            读取失败的任务(比如未完成)纵坐标均为nan, 原因见curves.failed
+        """
+        tasks = list(self)
+        names = [str(i) for i in tasks]
+        if path_cache is None:
+            parents = {i.path_root.parent for i in tasks}
+            if len(parents) == 1:
+                path_cache = parents.pop() / "curve_cache" / f"{x}-{y}-{branch}.npz"
+        path_cache = Path(path_cache) if path_cache else None
+
+        def signature(task: TaskFolder) -> tuple[int, int]:
+            try:
+                stat = task.path_channels_header.stat()
+            except FileNotFoundError:
+                return (-1, -1)
+            return (stat.st_mtime_ns, stat.st_size)
+
+        # ===读取缓存
+        cached, cached_grid = {}, None
+        if path_cache is not None and path_cache.exists():
+            with np.load(path_cache, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                # 没有failed的旧缓存不能还原失败原因, 不使用
+                if meta == {"x": x, "y": y, "branch": branch} and "failed" in data:
+                    cached_grid = data["grid"]
+                    for name, sig, x_max, row, error in zip(
+                        data["names"],
+                        data["signatures"],
+                        data["x_max"],
+                        data["values"],
+                        data["failed"],
+                    ):
+                        cached[str(name)] = (
+                            tuple(int(i) for i in sig),
+                            x_max,
+                            row,
+                            str(error),
+                        )
+
+        signatures = [signature(i) for i in tasks]
+        x_max = np.full(len(tasks), np.nan)
+        curves: dict[int, tuple] = {}
+        failed = {}
+
+        def compute(indices: list[int]):
+            results = self.__class__(tasks[i] for i in indices).map(
+                lambda task: task_curve(task, x, y, branch),
+                max_workers,
+                errors="return",
+            )
+            for i, result in zip(indices, results):
+                signatures[i] = signature(tasks[i])  # 旧的结果在读取时被转换
+                if isinstance(result, Exception):
+                    failed[names[i]] = repr(result)
+                    curves[i] = (np.empty(0), np.empty(0))
+                else:
+                    failed.pop(names[i], None)
+                    curves[i] = result
+                x_max[i] = curves[i][0].max() if len(curves[i][0]) else np.nan
+
+        unchanged = []
+        for i, name in enumerate(names):
+            if name in cached and cached[name][0] == signatures[i]:
+                unchanged.append(i)
+                x_max[i] = cached[name][1]
+                if cached[name][3]:
+                    failed[name] = cached[name][3]
+        compute([i for i in range(len(tasks)) if i not in set(unchanged)])
+
+        if isinstance(grid, (int, np.integer)):
+            upper = np.nanmax(x_max) if np.isfinite(x_max).any() else 1.0
+            grid = np.linspace(0, upper, grid)
+        grid = np.asarray(grid, dtype=float)
+        if cached_grid is None or not np.array_equal(grid, cached_grid):
+            compute(unchanged)
+            unchanged = []
+
+        values = np.full((len(tasks), len(grid)), np.nan)
+        for i in unchanged:
+            values[i] = cached[names[i]][2]
+        for i, (curve_x, curve_y) in curves.items():
+            if len(curve_x):
+                values[i] = np.interp(grid, curve_x, curve_y, left=np.nan, right=np.nan)
+
+        # ===写出缓存(先写临时文件再替换)
+        if path_cache is not None and curves:
+            path_cache.parent.mkdir(parents=True, exist_ok=True)
+            path_temp = path_cache.with_name(path_cache.name + ".tmp")
+            with open(path_temp, "wb") as f:
+                np.savez(
+                    f,
+                    meta=json.dumps({"x": x, "y": y, "branch": branch}),
+                    names=np.array(names, dtype=str),
+                    signatures=np.array(signatures, dtype=np.int64).reshape(-1, 2),
+                    x_max=x_max,
+                    grid=grid,
+                    values=values,
+                    failed=np.array([failed.get(i, "") for i in names], dtype=str),
+                )
+            os.replace(path_temp, path_cache)
+        return CurveSet(names, grid, values, x, y, failed)
+
+    MAX_WORKERS = 8  # 批量操作的默认并发数
+    LOADABLE = {
+        # 属性 -> (路径属性, 缓存标签, 读取函数)
+        "status": ("path_status", "status", JsonFile.load),
+        "raw_task_params": ("path_taskparams", "raw_task_params", JsonFile.load),
+        "comments": ("path_comments", "comments", JsonFile.load),
+        "odb_extract": ("path_channels_header", "odb_extract", load_odb_extract),
+    }
+
+    def __run(
+        self,
+        func: Callable,
+        items: list,
+        max_workers: int = None,
+        executor: Literal["thread", "process"] = "thread",
+    ) -> list:
+        """
+        并发执行func(item), 按items的顺序返回结果, 出错的任务返回异常实例
+
+        executor为"process"时, func与item需要可以pickle(比如模块级函数)
+        """
+        max_workers = max_workers or self.MAX_WORKERS
+        if executor == "thread":
+            pool = ThreadPoolExecutor(max_workers)
+        elif executor == "process":
+            pool = ProcessPoolExecutor(max_workers)
+        else:
+            raise ValueError(f"unsupported executor: {executor}")
+        with pool:
+            futures = [pool.submit(func, i) for i in items]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as error:
+                    results.append(error)
+        return results
+
+    def map(
+        self,
+        func: Callable[[TaskFolder], object],
+        max_workers: int = None,
+        executor: Literal["thread", "process"] = "thread",
+        errors: Literal["raise", "return"] = "raise",
+    ) -> list:
+        """
+        并发地对每个任务执行func, 结果与任务顺序一致
+
+        Parameters
+        ---
+        func : Callable[[TaskFolder], object]
+            比如lambda task: task.features
+        max_workers : int, default=None
+            并发数, 为None时使用TaskFolderList.MAX_WORKERS
+        executor : {"thread", "process"}, default="thread"
+            线程池适合I/O密集的操作(比如读取网络共享上的文件);
+            进程池适合CPU密集的操作, 但func需要可以pickle, 且子进程中的读取不会写入本进程的缓存
+        errors : {"raise", "return"}, default="raise"
+            - "raise" : 全部执行完毕后, 若有任务出错则抛出BulkError(包含各任务的异常)
+            - "return" : 出错任务的结果为异常实例
+        """
+        results = self.__run(func, list(self), max_workers, executor)
+        if errors == "raise":
+            failed = {
+                str(task): result
+                for task, result in zip(self, results)
+                if isinstance(result, Exception)
+            }
+            if failed:
+                raise BulkError(failed)
+        return results
+
+    def filter(
+        self,
+        predicate: Callable[[TaskFolder], bool],
+        max_workers: int = None,
+        executor: Literal["thread", "process"] = "thread",
+        errors: Literal["raise", "ignore"] = "raise",
+    ):
+        """
+        并发地按predicate筛选任务(保持顺序), 参数见map
+
+        errors为"ignore"时, predicate出错的任务视为不满足条件
+        """
+        results = self.map(
+            predicate, max_workers, executor, "raise" if errors == "raise" else "return"
+        )
+        return self.__class__(
+            task
+            for task, result in zip(self, results)
+            if not isinstance(result, Exception) and result
+        )
+
+    def load_all(
+        self,
+        attrs: Iterable[str] = ("status", "odb_extract"),
+        max_workers: int = None,
+        executor: Literal["thread", "process"] = "thread",
+        errors: Literal["raise", "ignore"] = "raise",
+    ):
+        """
+        并发地预读取任务的文件到TaskFolder.cache中, 之后按顺序访问这些属性时直接命中缓存
+
+        Parameters
+        ---
+        attrs : Iterable[str], default=("status", "odb_extract")
+            需要预读取的属性, 见TaskFolderList.LOADABLE
+        max_workers, executor :
+            见map, executor为"process"时在子进程中解析json
+        errors : {"raise", "ignore"}, default="raise"
+            - "raise" : 全部读取完毕后, 若有任务出错则抛出BulkError
+            - "ignore" : 忽略出错的任务(比如尚未导出结果的任务)
+
+        Returns
+        ---
+        self : TaskFolderList
+
+        Notes
+        ---
+        - 预读取的总量超过TaskFolder.cache.max_bytes时, 先读取的文件会被淘汰
+        - executor为"process"时, odb_extract只从按通道存储的结果读取,
+          只有odb_extract.json的旧结果需先在本进程中转换(访问TaskFolder.channels)
+        """
+        jobs = []
+        for task in self:
+            for attr in attrs:
+                path_attr, tag, loader = self.LOADABLE[attr]
+                jobs.append((task, attr, getattr(task, path_attr), tag, loader))
+
+        if executor == "process":
+            results = self.__run(
+                load_with_signature,
+                [(path, loader) for _, _, path, _, loader in jobs],
+                max_workers,
+                executor,
+            )
+            for (_, _, path, tag, _), result in zip(jobs, results):
+                if not isinstance(result, Exception):
+                    signature, value = result
+                    TaskFolder.cache.put(path, value, tag, signature=signature)
+        else:
+            # 经由属性读取(旧的计算结果会先转换为按通道存储的格式)
+            results = self.__run(
+                lambda job: getattr(job[0], job[1]), jobs, max_workers, executor
+            )
+
+        if errors == "raise":
+            failed = {
+                f"{job[0]}.{job[3]}": result
+                for job, result in zip(jobs, results)
+                if isinstance(result, Exception)
+            }
+            if failed:
+                raise BulkError(failed)
+        return self
@@ -0,0 +1,260 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Union
+import gzip
+import json
+import os
+import shutil
+import zlib
+
+from .result_reader import TaskFolder, TaskFolderList
+from .utils import format_time
+
+# 求解文件的扩展名 -> 默认处理, 见RetentionPolicy
+DEFAULT_ACTIONS = {
+    ".odb": "delete",
+    ".cae": "compress",
+    ".jnl": "keep",
+    ".dat": "compress",
+    ".msg": "compress",
+    ".prt": "delete",
+    ".com": "delete",
+    ".sim": "delete",
+    # 重启动文件(导出后不再需要)
+    ".res": "delete",
+    ".mdl": "delete",
+    ".stt": "delete",
+}
+ACTIONS = ("delete", "compress", "keep")
+
+
+class RetentionRefused(Exception):
+    """任务不处于最终状态(未导出, 或有阶段尚未执行), 或odb仍被打开, 不处理其求解文件"""
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    导出完成后对任务文件夹中求解文件的保留策略
+
+    只处理任务文件夹根目录下扩展名在actions中的文件, results/等子文件夹不受影响;
+    只处理处于最终状态的任务(task_status.json中没有"TODO", 且extracted为时间戳),
+    有.lck文件(odb被打开)的任务也不处理
+
+    Parameters
+    ---
+    actions : dict[str, str], default={}
+        扩展名 -> {"delete", "compress", "keep"}, 缺省的取DEFAULT_ACTIONS;
+        compress为gzip压缩为<文件名>.gz(可用gunzip还原)
+    odb_sample : float, default=None
+        保留odb的任务比例(0~1), 按任务名的哈希确定(同一任务每次的结果相同);
+        被抽中的任务的.odb总是保留, 其余按actions[".odb"]处理
+    compress_level : int, default=6
+        gzip压缩等级
+
+    Notes
+    ---
+    在abaqus端, 任务参数中的misc["retention"](即AbaqusData.retention, 为to_dict()的格式)
+    不为None时, abaqus_modeling.py在导出完成后按该策略处理(见Utils.apply_retention);
+    已有的任务仓库可以用sweep处理
+
+    Examples
+    ---
+    >>> policy = RetentionPolicy({".cae": "keep"}, odb_sample=0.05)
+    >>> policy.sweep("tasks")
+    {'tasks': 120, 'refused': 3, 'failed': 0, 'files': 968, 'reclaimed': 51234567890}
+    """
+
+    actions: dict[str, str] = field(default_factory=dict)
+    odb_sample: float = None
+    compress_level: int = 6
+
+    RECORD_FILE = "retention.jsonl"
+
+    def __post_init__(self):
+        actions = dict(DEFAULT_ACTIONS)
+        actions.update({k.lower(): v for k, v in self.actions.items()})
+        for extension, action in actions.items():
+            if action not in ACTIONS:
+                raise ValueError(f"{extension}: 未知的处理{action}, 可选: {ACTIONS}")
+        self.actions = actions
+        if self.odb_sample is not None and not 0 <= self.odb_sample <= 1:
+            raise ValueError(f"odb_sample须在0~1之间: {self.odb_sample}")
+
+    @classmethod
+    def from_dict(cla, data: dict) -> "RetentionPolicy":
+        return cla(**data)
+
+    def to_dict(self) -> dict:
+        return {
+            "actions": dict(self.actions),
+            "odb_sample": self.odb_sample,
+            "compress_level": self.compress_level,
+        }
+
+    def keeps_odb(self, taskname: str) -> bool:
+        """该任务是否被抽中保留odb(与abaqus_modeling.py的Utils.keeps_odb一致)"""
+        if self.odb_sample is None:
+            return False
+        digest = zlib.crc32(taskname.encode("utf-8")) & 0xFFFFFFFF
+        return digest < self.odb_sample * 2**32
+
+    @staticmethod
+    def is_final(task: TaskFolder) -> bool:
+        """任务是否处于最终状态(可以处理求解文件)"""
+        if not task.path_status.exists():
+            return False
+        status = task.status
+        if "TODO" in status.values():
+            return False
+        return isinstance(status.get("extracted"), (int, float))
+
+    def plan(self, task: TaskFolder) -> dict[str, str]:
+        """
+        Returns
+        ---
+        plan : dict[str, str]
+            文件名 -> 处理(不含keep)
+        """
+        keep_odb = self.keeps_odb(str(task))
+        plan = {}
+        for entry in sorted(os.scandir(task.path_root), key=lambda i: i.name):
+            if not entry.is_file():
+                continue
+            extension = os.path.splitext(entry.name)[1].lower()
+            action = self.actions.get(extension, "keep")
+            if extension == ".odb" and keep_odb:
+                action = "keep"
+            if action != "keep":
+                plan[entry.name] = action
+        return plan
+
+    def apply(self, task: TaskFolder, dry_run: bool = False) -> dict:
+        """
+        按策略处理一个任务的求解文件
+
+        Parameters
+        ---
+        dry_run : bool, default=False
+            只统计, 不删除或压缩(compress的after按原大小计)
+
+        逐个文件处理, 某个文件出错时记录在errors中并继续处理其余文件
+
+        Returns
+        ---
+        record : dict
+            {"taskname", "files": {文件名: [处理, 处理前字节数, 处理后字节数]},
+            "errors": {文件名: 错误信息}, "reclaimed": 字节数}
+
+        Raises
+        ---
+        RetentionRefused
+            任务不处于最终状态, 或odb仍被打开
+        """
+        if not self.is_final(task):
+            raise RetentionRefused(f"{task}: 任务状态不是最终状态")
+        if any(task.path_root.glob("*.lck")):
+            raise RetentionRefused(f"{task}: odb被打开(存在.lck文件)")
+
+        files = {}
+        errors = {}
+        for name, action in self.plan(task).items():
+            path = task.path_root / name
+            try:
+                before = path.stat().st_size
+                after = 0
+                if action == "compress":
+                    after = before if dry_run else self.__compress(path)
+                elif not dry_run:
+                    path.unlink()
+            except OSError as e:
+                errors[name] = repr(e)
+                continue
+            files[name] = [action, before, after]
+        return {
+            "taskname": str(task),
+            "files": files,
+            "errors": errors,
+            "reclaimed": sum(before - after for _, before, after in files.values()),
+        }
+
+    def __compress(self, path: Path) -> int:
+        """gzip压缩为<文件名>.gz并删除原文件, 返回压缩后的字节数"""
+        path_gz = path.with_name(path.name + ".gz")
+        path_temp = path.with_name(path.name + ".gz.tmp")
+        try:
+            with open(path, "rb") as src, gzip.open(
+                path_temp, "wb", compresslevel=self.compress_level
+            ) as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            os.replace(path_temp, path_gz)
+        finally:
+            path_temp.unlink(missing_ok=True)
+        path.unlink()
+        return path_gz.stat().st_size
+
+    def sweep(
+        self,
+        tasks: Union[TaskFolderList, str, Path],
+        dry_run: bool = False,
+        max_workers: int = None,
+    ) -> dict[str, int]:
+        """
+        按策略处理任务仓库中的所有任务, 不处于最终状态的任务被跳过
+
+        处理记录追加到各任务仓库下的retention.jsonl(dry_run时不记录)
+
+        Parameters
+        ---
+        tasks : TaskFolderList | str | Path
+            任务, 或任务仓库路径
+        dry_run : bool, default=False
+            见apply
+        max_workers : int, default=None
+            并发数, 见TaskFolderList.map
+
+        Returns
+        ---
+        summary : dict[str, int]
+            {"tasks": 处理的任务数, "refused": 跳过的任务数, "failed": 出错(含部分文件出错)的任务数,
+            "files": 处理的文件数, "reclaimed": 释放的字节数}
+        """
+        if not isinstance(tasks, TaskFolderList):
+            tasks = TaskFolderList(tasks)
+        results = tasks.map(
+            lambda task: self.apply(task, dry_run), max_workers, errors="return"
+        )
+        summary = {"tasks": 0, "refused": 0, "failed": 0, "files": 0, "reclaimed": 0}
+        records: dict[Path, list[dict]] = {}
+        for task, result in zip(tasks, results):
+            if isinstance(result, RetentionRefused):
+                summary["refused"] += 1
+                continue
+            if isinstance(result, Exception):
+                summary["failed"] += 1
+                result = {"taskname": str(task), "error": repr(result)}
+            else:
+                summary["tasks"] += 1
+                summary["failed"] += bool(result["errors"])
+                summary["files"] += len(result["files"])
+                summary["reclaimed"] += result["reclaimed"]
+                if not result["files"] and not result["errors"]:
+                    continue
+            record = {"time": format_time(with_date=True), **result}
+            records.setdefault(task.path_root.parent, []).append(record)
+
+        if not dry_run:
+            for warehouse, lines in records.items():
+                with open(warehouse / self.RECORD_FILE, "a", encoding="utf-8") as f:
+                    for record in lines:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return summary
+
+
+def read_retention_records(path_output: Union[str, Path] = "tasks") -> list[dict]:
+    """读取任务仓库中的保留策略处理记录(见RetentionPolicy.sweep)"""
+    path = Path(path_output) / RetentionPolicy.RECORD_FILE
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(i) for i in f if i.strip()]
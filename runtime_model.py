@@ -0,0 +1,395 @@
+from dataclasses import dataclass, replace
+import copy
+import itertools
+from pathlib import Path
+from typing import Iterable, Union
+import math
+import numpy as np
+
+from .result_reader import TaskFolder
+from .task_item import AbaqusData, Performance
+from .utils import JsonFile
+
+
+@dataclass
+class RuntimePrediction:
+    """
+    Parameters
+    ---
+    runtime : float
+        预测运行时间(秒), 对数正态分布的中位数
+    std : float
+        预测运行时间的标准差(秒)
+    lower, upper : float
+        95%预测区间(秒)
+    """
+
+    runtime: float
+    std: float
+    lower: float
+    upper: float
+
+
+class RuntimeModel:
+    """
+    作业运行时间的回归模型
+
+    以已完成任务(计算结果中的calculating_msg.job_running_time)为样本,
+    对ln(运行时间)作岭回归, 特征见FEATURES
+
+    Parameters
+    ---
+    ridge : float, default=1e-2
+        岭回归系数(特征标准化之后)
+
+    Examples
+    ---
+    >>> model = RuntimeModel().fit(TaskFolderList(TASK_FOLDER))
+    >>> model.predict(abadata)
+    RuntimePrediction(runtime=..., std=..., lower=..., upper=...)
+    >>> abadata.meta.time_limit = model.suggest_time_limit(abadata)
+    """
+
+    FEATURES = (
+        "log_concrete_elements",  # ln(混凝土单元数量)
+        "log_steel_elements",  # ln(钢管单元数量)
+        "concrete_strength",  # f_ck(MPa)
+        "tubelar_strength",  # f_y(MPa)
+        "e",  # 偏心率
+        "rod_layers",  # 拉杆层数(无拉杆时为0)
+        "rod_number",  # 每层拉杆数量
+        "pole_number",  # 立杆数量
+        "log_num_cpus",  # ln(CPU数量)
+        "log_num_cpus_square",  # ln(CPU数量)^2, 核数过多时的通信开销
+        "log_num_cpus_x_log_elements",  # ln(CPU数量)*ln(混凝土单元数量), 并行收益随规模变化
+        "log_num_domains",  # ln(域数量)
+        "num_gpus",  # GPU数量
+        "num_gpus_x_log_elements",  # GPU数量*ln(混凝土单元数量)
+    )
+
+    def __init__(self, ridge: float = 1e-2) -> None:
+        self.ridge = ridge
+        self.coef: np.ndarray = None
+        self.mean: np.ndarray = None
+        self.scale: np.ndarray = None
+        self.sigma: float = None
+        self.covariance: np.ndarray = None
+        self.sample_number: int = 0
+
+    @staticmethod
+    def raw_task_params(item: Union[AbaqusData, TaskFolder, dict]) -> dict:
+        """获取task_params.json格式的数据"""
+        if isinstance(item, AbaqusData):
+            return item.extract()
+        if isinstance(item, TaskFolder):
+            return item.raw_task_params
+        if isinstance(item, dict):
+            return item
+        raise TypeError(type(item))
+
+    @classmethod
+    def features(cla, item: Union[AbaqusData, TaskFolder, dict]) -> np.ndarray:
+        """
+        提取特征
+
+        Parameters
+        ---
+        item : AbaqusData | TaskFolder | dict
+            任务, dict为task_params.json格式的数据;
+            已完成的TaskFolder的计算资源特征取作业实际使用的设置(见job_performance),
+            其余取任务参数中的misc["performance"](auto时只是上限)
+
+        Returns
+        ---
+        features : np.ndarray
+            与FEATURES一一对应
+        """
+        raw = cla.raw_task_params(item)
+        user_params, task_params = raw["user_params"], raw["task_params"]
+        geometry = user_params["geometry"]
+        rod_pattern = user_params["rod_pattern"]
+        performance = task_params["misc"]["performance"]
+        if isinstance(item, TaskFolder):
+            performance = cla.job_performance(item) or performance
+
+        concrete_mesh = geometry["concrete_mesh"]
+        steel_mesh = geometry["steel_mesh"]
+        rod_number = len(rod_pattern["pattern_rod"])
+        y_len = geometry["y_len"]
+        log_elements = math.log(concrete_mesh[0] * concrete_mesh[1] * concrete_mesh[2])
+        log_cpus = math.log(max(performance["num_cpus"], 1))
+        num_domains = performance.get("num_domains") or performance["num_cpus"]
+
+        return np.array(
+            (
+                log_elements,
+                math.log(2 * (steel_mesh[0] + steel_mesh[1]) * steel_mesh[2]),
+                user_params["material_concrete"]["strength_criterion_pressure"],
+                user_params["material_tubelar"]["strength_yield"],
+                abs(user_params["referpoint_top"]["position"][1] / y_len - 1 / 2),
+                rod_pattern["number_layers"] if rod_number else 0,
+                rod_number,
+                len(rod_pattern["pattern_pole"]),
+                log_cpus,
+                log_cpus**2,
+                log_cpus * log_elements,
+                math.log(max(num_domains, 1)),
+                performance["num_gpus"],
+                performance["num_gpus"] * log_elements,
+            ),
+            dtype=float,
+        )
+
+    @staticmethod
+    def job_performance(task: TaskFolder) -> Union[dict, None]:
+        """
+        已完成任务的作业实际使用的计算资源设置(calculating_msg.performance, auto时为调优后的设置),
+        未完成或没有记录时返回None
+        """
+        if not task.is_done:
+            return None
+        calculating_msg = task.channels.header.get("calculating_msg", {})
+        return calculating_msg.get("performance")
+
+    @staticmethod
+    def job_running_time(task: TaskFolder) -> Union[float, None]:
+        """读取已完成任务的运行时间, 计算失败或未完成时返回None"""
+        if not task.is_done:
+            return None
+        calculating_msg = task.channels.header.get("calculating_msg", {})
+        if calculating_msg.get("status") != "success":
+            return None
+        return calculating_msg["job_running_time"]
+
+    def fit(self, tasks: Iterable[TaskFolder]):
+        """
+        用已完成的任务训练模型
+
+        Parameters
+        ---
+        tasks : Iterable[TaskFolder]
+            任务(未完成或计算失败的任务会被忽略)
+        """
+        x, y = [], []
+        for task in tasks:
+            runtime = self.job_running_time(task)
+            if runtime is None or runtime <= 0:
+                continue
+            x.append(self.features(task))
+            y.append(math.log(runtime))
+        if not x:
+            raise ValueError("no completed task to fit")
+        return self.fit_arrays(np.array(x), np.array(y))
+
+    def fit_arrays(self, x: np.ndarray, log_runtime: np.ndarray):
+        """
+        Parameters
+        ---
+        x : np.ndarray
+            特征矩阵(样本数 x 特征数)
+        log_runtime : np.ndarray
+            ln(运行时间)
+        """
+        self.sample_number = len(x)
+        self.mean = x.mean(axis=0)
+        self.scale = x.std(axis=0)
+        self.scale[self.scale == 0] = 1
+        design = self.__design_matrix(x)
+
+        penalty = self.ridge * np.eye(design.shape[1])
+        penalty[0, 0] = 0  # 截距不惩罚
+        self.covariance = np.linalg.pinv(design.T @ design + penalty)
+        self.coef = self.covariance @ design.T @ log_runtime
+
+        residual = log_runtime - design @ self.coef
+        dof = max(self.sample_number - design.shape[1], 1)
+        self.sigma = float(math.sqrt(residual @ residual / dof))
+        return self
+
+    def __design_matrix(self, x: np.ndarray) -> np.ndarray:
+        x = (np.atleast_2d(x) - self.mean) / self.scale
+        return np.hstack((np.ones((len(x), 1)), x))
+
+    def predict_log(self, items: Iterable[Union[AbaqusData, TaskFolder, dict]]):
+        """
+        Returns
+        ---
+        mu, s : np.ndarray
+            ln(运行时间)的预测均值与标准差
+        """
+        if self.coef is None:
+            raise RuntimeError("model not fitted")
+        design = self.__design_matrix(np.array([self.features(i) for i in items]))
+        mu = design @ self.coef
+        leverage = np.einsum("ij,jk,ik->i", design, self.covariance, design)
+        s = self.sigma * np.sqrt(1 + leverage)
+        return mu, s
+
+    def predict(self, item: Union[AbaqusData, TaskFolder, dict]) -> RuntimePrediction:
+        """预测一个任务的运行时间"""
+        return self.predict_many([item])[0]
+
+    def predict_many(
+        self, items: Iterable[Union[AbaqusData, TaskFolder, dict]]
+    ) -> list[RuntimePrediction]:
+        """预测多个任务的运行时间"""
+        mu, s = self.predict_log(items)
+        return [
+            RuntimePrediction(
+                float(math.exp(m)),
+                float(math.exp(m) * math.sqrt(math.expm1(v * v))),
+                float(math.exp(m - 1.96 * v)),
+                float(math.exp(m + 1.96 * v)),
+            )
+            for m, v in zip(mu, s)
+        ]
+
+    def suggest_time_limit(
+        self, item: Union[AbaqusData, TaskFolder, dict], z: float = 3.0
+    ) -> float:
+        """
+        建议的作业最高运行时间(TaskMeta.time_limit)
+
+        Parameters
+        ---
+        z : float, default=3.0
+            ln(运行时间)的上侧分位数(标准差倍数)
+        """
+        mu, s = self.predict_log([item])
+        return float(math.exp(mu[0] + z * s[0]))
+
+    def total_runtime(self, items: Iterable[Union[AbaqusData, TaskFolder, dict]]):
+        """
+        估计一批任务的总运行时间(秒), 用于容量规划
+
+        Returns
+        ---
+        total, std : float
+            总运行时间的期望与标准差(假设各任务相互独立)
+        """
+        mu, s = self.predict_log(items)
+        mean = np.exp(mu + s * s / 2)
+        var = np.expm1(s * s) * np.exp(2 * mu + s * s)
+        return float(mean.sum()), float(math.sqrt(var.sum()))
+
+    def save(self, path: Union[str, Path] = "runtime_model.json"):
+        JsonFile.write(
+            {
+                "features": self.FEATURES,
+                "ridge": self.ridge,
+                "coef": self.coef.tolist(),
+                "mean": self.mean.tolist(),
+                "scale": self.scale.tolist(),
+                "sigma": self.sigma,
+                "covariance": self.covariance.tolist(),
+                "sample_number": self.sample_number,
+            },
+            path,
+        )
+
+    @classmethod
+    def load(cla, path: Union[str, Path] = "runtime_model.json"):
+        data = JsonFile.load(path)
+        if tuple(data["features"]) != cla.FEATURES:
+            raise ValueError("features mismatch, please refit the model")
+        model = cla(data["ridge"])
+        model.coef = np.array(data["coef"])
+        model.mean = np.array(data["mean"])
+        model.scale = np.array(data["scale"])
+        model.sigma = data["sigma"]
+        model.covariance = np.array(data["covariance"])
+        model.sample_number = data["sample_number"]
+        return model
+
+    def best_performance(
+        self,
+        item: Union[AbaqusData, TaskFolder, dict],
+        candidates: Iterable[Performance] = None,
+    ) -> Performance:
+        """
+        在候选设置中选择预测运行时间最短的计算资源设置
+
+        Parameters
+        ---
+        item : AbaqusData | TaskFolder | dict
+            任务
+        candidates : Iterable[Performance], default=None
+            候选设置, 为None时使用performance_grid()
+        """
+        raw = self.raw_task_params(item)
+        candidates = list(performance_grid() if candidates is None else candidates)
+        items = []
+        for performance in candidates:
+            raw_ = copy.copy(raw)
+            raw_["task_params"] = copy.copy(raw["task_params"])
+            raw_["task_params"]["misc"] = dict(
+                raw["task_params"]["misc"], performance=performance.extract()
+            )
+            items.append(raw_)
+        mu, _ = self.predict_log(items)
+        return candidates[int(np.argmin(mu))]
+
+
+def performance_grid(
+    num_cpus: Iterable[int] = (1, 2, 4, 6, 8, 12, 16),
+    num_domains: Iterable[int] = (1, 2, 4, 6, 8, 12, 16, 24, 32),
+    num_gpus: Iterable[int] = (0, 1),
+    memory: float = 90,
+) -> list[Performance]:
+    """
+    计算资源设置的网格, CPU数量与域数量分别取值
+
+    只保留域数量为CPU数量整数倍的组合(abaqus的要求)
+    """
+    return [
+        Performance(memory, cpus, domains, gpus)
+        for cpus, domains, gpus in itertools.product(num_cpus, num_domains, num_gpus)
+        if domains % cpus == 0
+    ]
+
+
+def gene_performance_benchmark(
+    abadatas: Iterable[AbaqusData],
+    path_output: Union[str, Path] = "tasks",
+    candidates: Iterable[Performance] = None,
+):
+    """
+    生成计算资源设置的基准测试任务: 对每个代表性模型, 按候选设置各生成一个任务
+
+    运行完成后, 用RuntimeModel().fit(...)即可从这些任务中学习设置对运行时间的影响
+
+    Parameters
+    ---
+    abadatas : Iterable[AbaqusData]
+        代表性模型
+    path_output : str | Path, default="tasks"
+        任务文件夹输出路径
+    candidates : Iterable[Performance], default=None
+        候选设置, 为None时使用performance_grid()
+
+    Returns
+    ---
+    tasknames : list[str]
+        生成的任务名
+    """
+    candidates = list(performance_grid() if candidates is None else candidates)
+    tasknames = []
+    for abadata in abadatas:
+        for performance in candidates:
+            taskname = (
+                f"{abadata.meta.taskname}_cpu{performance.num_cpus}"
+                f"_dom{performance.num_domains or performance.num_cpus}"
+                f"_gpu{performance.num_gpus}"
+            )
+            replace(
+                abadata,
+                meta=replace(abadata.meta, taskname=taskname),
+                performance=performance,
+                comments={
+                    **abadata.comments,
+                    "benchmark": "performance",
+                    "benchmark_model": abadata.meta.taskname,
+                },
+            ).gene_task_folder(path_output)
+            tasknames.append(taskname)
+    return tasknames
@@ -0,0 +1,403 @@
+from dataclasses import dataclass
+import copy
+import itertools
+from typing import Iterable, Iterator, Union
+import numpy as np
+
+from .materlib import materials
+from .task_item import AbaqusData, RodPattern
+from .utils import format_time
+
+# 快速初始化参数模板中的材料字段 -> (材料类, from_table_property所用的属性)
+MATERIAL_FIELDS = {
+    "concrete": (materials.Concrete, "strength_criterion_pressure"),
+    "tubelar": (materials.Steel, "strength_yield"),
+    "rod": (materials.SteelBar, "strength_criterion_yield"),
+    "pole": (materials.SteelBar, "strength_criterion_yield"),
+}
+INTEGER_FIELDS = ("layer_number",)
+# 取值为RodPattern.USHAPE_PATTERN_LIBRARY的键, 同时设置pattern_rod与pattern_pole
+PATTERN_FIELD = "pattern"
+
+# Sobol序列各维的(本原多项式次数, 系数, 初始方向数)(Joe & Kuo, 2008)
+# 第1维为范德科皮特序列(方向数全为1)
+SOBOL_DIRECTIONS = (
+    (0, 0, ()),
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+)
+
+
+def latin_hypercube(
+    n: int, d: int, seed: Union[int, np.random.Generator] = None
+) -> np.ndarray:
+    """
+    拉丁超立方采样
+
+    Returns
+    ---
+    points : np.ndarray
+        [0, 1)^d中的n个点(n x d), 每一维的n个等分区间中各有一个点
+    """
+    rng = np.random.default_rng(seed)
+    strata = np.argsort(rng.random((d, n)), axis=1).T
+    return (strata + rng.random((n, d))) / n
+
+
+def halton(n: int, d: int, skip: int = 1) -> np.ndarray:
+    """
+    Halton序列(第i维以第i个质数为基的反序数)
+
+    Parameters
+    ---
+    skip : int, default=1
+        跳过序列开头的点数(第0个点为原点)
+    """
+    primes = []
+    candidate = 2
+    while len(primes) < d:
+        if all(candidate % p for p in primes):
+            primes.append(candidate)
+        candidate += 1
+
+    index = np.arange(skip, skip + n)
+    points = np.zeros((n, d))
+    for j, base in enumerate(primes):
+        i = index.copy()
+        factor = 1 / base
+        while i.any():
+            points[:, j] += (i % base) * factor
+            i //= base
+            factor /= base
+    return points
+
+
+def sobol(n: int, d: int, skip: int = 1) -> np.ndarray:
+    """
+    Sobol序列(格雷码构造, 最多len(SOBOL_DIRECTIONS)维)
+
+    Parameters
+    ---
+    skip : int, default=1
+        跳过序列开头的点数(第0个点为原点)
+    """
+    if d > len(SOBOL_DIRECTIONS):
+        raise ValueError(f"sobol supports at most {len(SOBOL_DIRECTIONS)} dimensions")
+    bits = max(int(skip + n).bit_length(), 1)
+
+    directions = np.zeros((d, bits), dtype=np.uint64)
+    for j, (degree, coef, initial) in enumerate(SOBOL_DIRECTIONS[:d]):
+        if degree == 0:
+            directions[j] = [1 << (bits - 1 - k) for k in range(bits)]
+            continue
+        m = list(initial)
+        for k in range(degree, bits):
+            value = m[k - degree] ^ (m[k - degree] << degree)
+            for i in range(1, degree):
+                if (coef >> (degree - 1 - i)) & 1:
+                    value ^= m[k - i] << i
+            m.append(value)
+        directions[j] = [m[k] << (bits - 1 - k) for k in range(bits)]
+
+    index = np.arange(skip, skip + n, dtype=np.uint64)
+    gray = index ^ (index >> np.uint64(1))
+    state = np.zeros((n, d), dtype=np.uint64)
+    for k in range(bits):
+        bit = ((gray >> np.uint64(k)) & np.uint64(1)).astype(bool)
+        state[bit] ^= directions[:, k]
+    return state / float(2**bits)
+
+
+def sparse_grid(d: int, level: int) -> np.ndarray:
+    """
+    Smolyak稀疏网格(嵌套的Clenshaw-Curtis节点)
+
+    Parameters
+    ---
+    level : int
+        层数, 1为中心点, 每增加一层各维的节点加密一倍; 点数随维数多项式增长
+
+    Returns
+    ---
+    points : np.ndarray
+        [0, 1]^d中的点
+    """
+
+    def nodes(i: int) -> np.ndarray:
+        """第i层新增的一维节点"""
+        if i == 1:
+            return np.array([0.5])
+        if i == 2:
+            return np.array([0.0, 1.0])
+        m = 2 ** (i - 1)
+        return (1 - np.cos(np.pi * np.arange(1, m, 2) / m)) / 2
+
+    points = []
+
+    def expand(prefix: tuple, budget: int):
+        if len(prefix) == d:
+            points.extend(itertools.product(*(nodes(i) for i in prefix)))
+            return
+        for i in range(1, budget + 2):
+            expand(prefix + (i,), budget - i + 1)
+
+    expand((), level - 1)
+    return np.array(points, dtype=float).reshape(-1, d)
+
+
+@dataclass
+class Constraints:
+    """
+    可行性约束(在生成AbaqusData之前, 对采样点向量化地筛选)
+
+    Parameters
+    ---
+    steel_ratio : tuple[float, float], default=(0.04, 0.2)
+        含钢率A_s/A_c的范围
+    width_thickness : float, default=60
+        宽厚比上限(max(B, D)/t <= width_thickness*sqrt(235/f_y))
+    rod_clearance : float, default=2
+        拉杆与立杆直径之和不超过核心混凝土短边的1/rod_clearance;
+        拉杆直径小于拉杆层间距
+    layer_spacing_elements : float, default=1
+        拉杆层间距不小于混凝土网格竖向尺寸的倍数
+    """
+
+    steel_ratio: tuple[float, float] = (0.04, 0.2)
+    width_thickness: float = 60
+    rod_clearance: float = 2
+    layer_spacing_elements: float = 1
+
+    def check(self, columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        """
+        Parameters
+        ---
+        columns : dict[str, np.ndarray]
+            快速初始化参数模板的字段 -> 各采样点的值(见design_columns)
+
+        Returns
+        ---
+        checks : dict[str, np.ndarray]
+            约束名 -> 各采样点是否满足
+        """
+        width = columns["width"].astype(float)
+        high = columns["high"].astype(float)
+        thickness = columns["tubelar_thickness"].astype(float)
+        length = columns["length"].astype(float)
+        has_rod = np.array([len(i) > 0 for i in columns["pattern_rod"]])
+        has_pole = np.array([len(i) > 0 for i in columns["pattern_pole"]])
+        rod_dia = np.where(has_rod, columns["rod_dia"].astype(float), 0)
+        pole_dia = np.where(has_pole, columns["pole_dia"].astype(float), 0)
+        layer_spacing = length / (columns["layer_number"].astype(float) + 1)
+        mesh_z = np.array([mesh[0][2] for mesh in columns["mesh"]], dtype=float)
+        strength = material_strength("tubelar", columns["tubelar"])
+
+        core_x, core_y = width - 2 * thickness, high - 2 * thickness
+        steel_ratio = np.divide(
+            2 * (width + high) * thickness,
+            core_x * core_y,
+            out=np.full(len(width), np.inf),
+            where=(core_x > 0) & (core_y > 0),
+        )
+        return {
+            "steel_ratio": (steel_ratio >= self.steel_ratio[0])
+            & (steel_ratio <= self.steel_ratio[1]),
+            "width_thickness": np.maximum(width, high)
+            <= thickness * self.width_thickness * np.sqrt(235 / strength),
+            "rod_fit": (
+                (rod_dia + pole_dia) * self.rod_clearance <= np.minimum(core_x, core_y)
+            )
+            & (~has_rod | (rod_dia < layer_spacing)),
+            "layer_spacing": ~has_rod
+            | (layer_spacing >= self.layer_spacing_elements * length / mesh_z),
+        }
+
+    def feasible(self, columns: dict[str, np.ndarray]) -> np.ndarray:
+        """各采样点是否满足全部约束"""
+        return np.logical_and.reduce(list(self.check(columns).values()))
+
+
+def object_array(values: Iterable) -> np.ndarray:
+    """逐个填充的object数组(避免numpy把元组展开为多维数组)"""
+    values = list(values)
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
+
+
+def material_range(field: str) -> tuple[float, float]:
+    """材料字段在材料表中的取值范围(from_table_property可接受的范围)"""
+    material, property_name = MATERIAL_FIELDS[field]
+    values = [
+        getattr(material.from_table(i), property_name) for i in material.grade_table
+    ]
+    return min(values), max(values)
+
+
+def material_strength(field: str, values: Iterable) -> np.ndarray:
+    """材料字段(牌号或属性值) -> 属性值"""
+    material, property_name = MATERIAL_FIELDS[field]
+    table = {}
+    result = []
+    for value in values:
+        if isinstance(value, str):
+            if value not in table:
+                table[value] = getattr(material.from_table(value), property_name)
+            value = table[value]
+        result.append(value)
+    return np.array(result, dtype=float)
+
+
+def design_columns(
+    space: dict[str, Union[tuple, list]], points: np.ndarray, base: dict = None
+) -> dict[str, np.ndarray]:
+    """
+    将单位超立方中的点映射为快速初始化参数模板的字段
+
+    Parameters
+    ---
+    space : dict[str, tuple | list]
+        字段 -> 取值范围, 与points的各列一一对应
+        - (low, high) : 连续字段(材料字段为属性值, 会被截断到材料表的范围内; INTEGER_FIELDS取整)
+        - [value, ...] : 离散字段(比如材料牌号, mesh)
+        - PATTERN_FIELD : [RodPattern.USHAPE_PATTERN_LIBRARY的键, ...]
+    points : np.ndarray
+        [0, 1]^d中的点(n x d)
+    base : dict, default=None
+        未采样字段的取值, 默认为AbaqusData.get_ecc_cfst_alpha_template()
+
+    Returns
+    ---
+    columns : dict[str, np.ndarray]
+        字段 -> 各点的值(离散字段为object数组)
+    """
+    base = AbaqusData.get_ecc_cfst_alpha_template() if base is None else base
+    n = len(points)
+    columns = {k: object_array([v] * n) for k, v in base.items()}
+
+    for (field, domain), u in zip(space.items(), np.asarray(points).T):
+        if isinstance(domain, tuple):
+            low, high = domain
+            if field in MATERIAL_FIELDS:
+                table_min, table_max = material_range(field)
+                low, high = max(low, table_min), min(high, table_max)
+            column = low + u * (high - low)
+            if field in INTEGER_FIELDS:
+                column = np.rint(column).astype(int)
+            columns[field] = column
+            continue
+
+        index = np.minimum((u * len(domain)).astype(int), len(domain) - 1)
+        if field == PATTERN_FIELD:
+            for key, name in (("pattern_rod", "rod"), ("pattern_pole", "pole")):
+                columns[key] = object_array(
+                    RodPattern.USHAPE_PATTERN_LIBRARY[i][name] for i in domain
+                )[index]
+        else:
+            columns[field] = object_array(domain)[index]
+    return columns
+
+
+def sample_templates(
+    space: dict[str, Union[tuple, list]],
+    n: int = None,
+    method: str = "latin_hypercube",
+    level: int = None,
+    seed: int = None,
+    base: dict = None,
+    constraints: Constraints = Constraints(),
+    name_iter: Iterator[str] = None,
+    max_rounds: int = 20,
+) -> list[dict]:
+    """
+    在参数空间中采样, 剔除不可行的点, 得到快速初始化参数模板
+
+    Parameters
+    ---
+    space : dict[str, tuple | list]
+        字段 -> 取值范围(见design_columns)
+    n : int
+        需要的可行点数量(method为"sparse_grid"时忽略)
+    method : {"latin_hypercube", "halton", "sobol", "sparse_grid"}
+        采样方法; 可行点不足n个时继续采样(序列方法接续原序列), 至多max_rounds轮
+    level : int
+        稀疏网格的层数(见sparse_grid)
+    seed : int, default=None
+        拉丁超立方采样的随机种子
+    base : dict, default=None
+        未采样字段的取值, 默认为AbaqusData.get_ecc_cfst_alpha_template()
+    constraints : Constraints | None
+        可行性约束, 为None时不筛选
+    name_iter : Iterator[str], default=None
+        任务名迭代器, 默认以"<时间>_doe_"为前缀编号
+
+    Returns
+    ---
+    templates : list[dict]
+        可直接传入AbaqusData.init_ecc_cfst_alpha
+
+    Examples
+    ---
+    >>> space = {"concrete": (20, 50), "tubelar_thickness": (4, 12), "e": (0, 0.3), "pattern": ["", "+"]}
+    >>> templates = sample_templates(space, 50, "sobol")
+    >>> abadatas = [AbaqusData.init_ecc_cfst_alpha(i) for i in templates]
+    """
+    base = AbaqusData.get_ecc_cfst_alpha_template() if base is None else base
+    name_iter = (
+        AbaqusData.name_iter(f"{format_time()}_doe_")
+        if name_iter is None
+        else name_iter
+    )
+    d = len(space)
+
+    if method == "sparse_grid":
+        rounds = [sparse_grid(d, level)]
+        n = len(rounds[0])
+    elif method == "latin_hypercube":
+        rng = np.random.default_rng(seed)
+        rounds = (latin_hypercube(n, d, rng) for _ in range(max_rounds))
+    elif method in ("halton", "sobol"):
+        sequence = halton if method == "halton" else sobol
+        rounds = (sequence(n, d, 1 + i * n) for i in range(max_rounds))
+    else:
+        raise ValueError(f"unsupported method: {method}")
+
+    templates = []
+    for points in rounds:
+        columns = design_columns(space, points, base)
+        mask = (
+            np.ones(len(points), dtype=bool)
+            if constraints is None
+            else constraints.feasible(columns)
+        )
+        for i in np.flatnonzero(mask):
+            template = copy.deepcopy(base)
+            for k, column in columns.items():
+                value = column[i]
+                template[k] = value.item() if isinstance(value, np.generic) else value
+            template["name"] = next(name_iter)
+            templates.append(template)
+            if len(templates) >= n:
+                return templates
+    return templates
+
+
+def sample_abadatas(*args, **kwargs) -> list[AbaqusData]:
+    """采样并实例化AbaqusData(参数见sample_templates), 可作为surrogate的候选任务"""
+    return [
+        AbaqusData.init_ecc_cfst_alpha(i) for i in sample_templates(*args, **kwargs)
+    ]
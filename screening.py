@@ -0,0 +1,256 @@
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Iterable, Union
+import json
+import math
+import numpy as np
+
+from .materlib.constitutive_models import ConcreteConstitutiveModels
+from .result_reader import TaskFolder
+from .surrogate import SurrogateModel
+from .task_item import AbaqusData
+from .utils import format_time
+
+ESTIMATE_KEYS = (
+    "xi",  # 钢管约束系数(紧箍系数)
+    "zeta",  # 约束拉杆约束系数
+    "theta",  # 套箍系数xi + zeta
+    "steel_ratio",  # 含钢率A_s/A_c
+    "axial_capacity",  # 轴压承载力N_0(N)
+    "moment_capacity",  # 受弯承载力M_0(N*mm)
+    "eccentricity",  # 偏心距(mm)
+    "capacity",  # 偏压承载力N_u(N), 由N-M相关关系得到
+    "capacity_ratio",  # N_u/N_0
+)
+
+
+def capacity_estimates(
+    items: Iterable[Union[AbaqusData, TaskFolder, dict]]
+) -> dict[str, np.ndarray]:
+    """
+    按规范公式批量(向量化)估计承载力, 用于在有限元计算之前筛选任务
+
+    - 轴压: 统一理论(GB 50936-2014), N_0 = A_sc*f_sc, f_sc = (1.212 + B*theta + C*theta^2)*f_ck,
+      套箍系数theta取ConcreteConstitutiveModels的xi + zeta(拉杆约束按与钢管约束等效计入)
+    - 受弯: M_0 = gamma_m*W_sc*f_sc, gamma_m = 1.04 + 0.48*ln(theta + 0.1)
+    - 偏压: N/N_0 + M/(1.5*M_0) <= 1 (N/N_0 >= 0.255), 否则-N/(2.17*N_0) + M/M_0 <= 1, M = N*e
+    - 均为短柱(不计稳定系数), 材料强度取标准值, 与有限元结果比较时仅作参考
+
+    Parameters
+    ---
+    items : Iterable[AbaqusData | TaskFolder | dict]
+        任务, dict为task_params.json或其中user_params格式的数据
+
+    Returns
+    ---
+    estimates : dict[str, np.ndarray]
+        key见ESTIMATE_KEYS, 与items一一对应
+    """
+    rows = [SurrogateModel.user_params(i) for i in items]
+    column = lambda getter: np.array([getter(i) for i in rows], dtype=float)
+    x_len = column(lambda i: i["geometry"]["x_len"])
+    y_len = column(lambda i: i["geometry"]["y_len"])
+    thickness = column(lambda i: i["geometry"]["tubelar_thickness"])
+    f_ck = column(lambda i: i["material_concrete"]["strength_criterion_pressure"])
+    f_y = column(lambda i: i["material_tubelar"]["strength_yield"])
+
+    # 与AbaqusData中核心混凝土本构模型的参数一致
+    concrete_model = ConcreteConstitutiveModels(
+        x_len,
+        y_len,
+        f_ck * 1.25,
+        f_ck,
+        2 * (x_len + y_len) * thickness,
+        f_y,
+        column(lambda i: i["rod_pattern"]["area_rod"]),
+        column(lambda i: i["material_rod"]["strength_criterion_yield"]),
+        column(lambda i: i["rod_pattern"]["layer_spacing"]),
+        column(lambda i: i["rod_pattern"]["number_layer_rods"]),
+        sqrt=np.sqrt,
+    )
+    xi, zeta = concrete_model.xi, concrete_model.zeta
+    theta = xi + zeta
+
+    # ===轴压(矩形截面的B, C系数)
+    coef_b = 0.131 * f_y / 213 + 0.723
+    coef_c = -0.070 * f_ck / 14.4 + 0.026
+    f_sc = (1.212 + coef_b * theta + coef_c * theta**2) * f_ck
+    area_sc = x_len * y_len
+    axial_capacity = area_sc * f_sc
+
+    # ===受弯(偏心沿y方向)
+    gamma_m = 1.04 + 0.48 * np.log(theta + 0.1)
+    moment_capacity = gamma_m * x_len * y_len**2 / 6 * f_sc
+
+    # ===偏压
+    eccentricity = column(
+        lambda i: abs(i["referpoint_top"]["position"][1] - i["geometry"]["y_len"] / 2)
+    )
+    capacity = 1 / (1 / axial_capacity + eccentricity / (1.5 * moment_capacity))
+    small = capacity < 0.255 * axial_capacity
+    with np.errstate(divide="ignore"):
+        capacity_small = 1 / (
+            eccentricity / moment_capacity - 1 / (2.17 * axial_capacity)
+        )
+    capacity = np.where(small, capacity_small, capacity)
+
+    return {
+        "xi": xi,
+        "zeta": zeta,
+        "theta": theta,
+        "steel_ratio": concrete_model.tube_area / concrete_model.area_concrete,
+        "axial_capacity": axial_capacity,
+        "moment_capacity": moment_capacity,
+        "eccentricity": eccentricity,
+        "capacity": capacity,
+        "capacity_ratio": capacity / axial_capacity,
+    }
+
+
+@dataclass
+class Screening:
+    """
+    任务筛选: 跳过感兴趣范围之外的任务, 降低结果已可预测的任务的优先级
+
+    Parameters
+    ---
+    ranges : dict[str, tuple[float, float]], default={}
+        感兴趣范围, 估计值(key见ESTIMATE_KEYS) -> (下限, 上限), 超出范围的任务被跳过
+    model : SurrogateModel, default=None
+        代理模型, 预测的ln(ultimate_load)标准差小于certain_std的任务被视为结果已可预测
+    certain_std : float, default=0.02
+        结果已可预测的阈值(约等于相对误差)
+    predictable_action : {"deprioritise", "skip"}
+        对结果已可预测的任务的处理
+    low_priority : float, default=-10
+        降低优先级后comments中的priority(见TaskHandler的priority排序策略)
+
+    Examples
+    ---
+    >>> screening = Screening({"theta": (0.5, 4), "capacity_ratio": (0.3, 1)}, model=model)
+    >>> screening.gene_task_folders(abadatas, TASK_FOLDER)
+    {'keep': 80, 'deprioritise': 12, 'skip': 28}
+    """
+
+    ranges: dict[str, tuple[float, float]] = field(default_factory=dict)
+    model: SurrogateModel = None
+    certain_std: float = 0.02
+    predictable_action: str = "deprioritise"
+    low_priority: float = -10
+
+    RECORD_FILE = "screening.jsonl"
+
+    def screen(self, abadatas: Iterable[AbaqusData]) -> list[dict]:
+        """
+        Returns
+        ---
+        decisions : list[dict]
+            与abadatas一一对应
+            - action : {"keep", "deprioritise", "skip"}
+            - reasons : list[str]
+            - estimate : dict, 承载力估计值(见capacity_estimates)
+        """
+        abadatas = list(abadatas)
+        if not abadatas:
+            return []
+        estimates = capacity_estimates(abadatas)
+        reasons = [[] for _ in abadatas]
+        skip = np.zeros(len(abadatas), dtype=bool)
+        for key, (low, high) in self.ranges.items():
+            values = estimates[key]
+            outside = (values < low) | (values > high)
+            skip |= outside
+            for i in np.flatnonzero(outside):
+                reasons[i].append(f"{key}={values[i]:.4g} not in [{low}, {high}]")
+
+        predictable = np.zeros(len(abadatas), dtype=bool)
+        if self.model is not None and "ultimate_load" in self.model.models:
+            mu, s = self.model.predict_log(abadatas)["ultimate_load"]
+            predictable = s < self.certain_std
+            for i in np.flatnonzero(predictable):
+                reasons[i].append(
+                    f"ultimate_load predicted {math.exp(mu[i]):.4g} "
+                    f"(std of log {s[i]:.3g} < {self.certain_std})"
+                )
+
+        decisions = []
+        for i in range(len(abadatas)):
+            if skip[i]:
+                action = "skip"
+            elif predictable[i]:
+                action = self.predictable_action
+            else:
+                action = "keep"
+            decisions.append(
+                {
+                    "action": action,
+                    "reasons": reasons[i],
+                    "estimate": {k: float(v[i]) for k, v in estimates.items()},
+                }
+            )
+        return decisions
+
+    def gene_task_folders(
+        self,
+        abadatas: Iterable[AbaqusData],
+        path_output: Union[str, Path] = "tasks",
+        calculate: bool = True,
+    ) -> dict[str, int]:
+        """
+        筛选后生成任务文件夹
+
+        被跳过与降低优先级的任务追加记录到<path_output>/screening.jsonl
+        (任务名, 处理, 原因, 估计值与user_params, 可据此重新生成任务);
+        降低优先级的任务在comments中记录screening
+
+        Returns
+        ---
+        counts : dict[str, int]
+            各处理的任务数量
+        """
+        abadatas = list(abadatas)
+        path_output = Path(path_output)
+        path_output.mkdir(parents=True, exist_ok=True)
+        counts = {"keep": 0, "deprioritise": 0, "skip": 0}
+        records = []
+        for abadata, decision in zip(abadatas, self.screen(abadatas)):
+            action = decision["action"]
+            counts[action] += 1
+            if action != "keep":
+                records.append(
+                    {
+                        "time": format_time(with_date=True),
+                        "taskname": abadata.meta.taskname,
+                        **decision,
+                        "user_params": abadata.members_dict,
+                    }
+                )
+            if action == "skip":
+                continue
+            if action == "deprioritise":
+                abadata = replace(
+                    abadata,
+                    comments={
+                        **abadata.comments,
+                        "priority": min(
+                            abadata.comments.get("priority", 0), self.low_priority
+                        ),
+                        "screening": decision["reasons"],
+                    },
+                )
+            abadata.gene_task_folder(path_output, calculate)
+
+        if records:
+            with open(path_output / self.RECORD_FILE, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return counts
+
+
+def read_screening_records(path_output: Union[str, Path] = "tasks") -> list[dict]:
+    """读取任务仓库中的筛选记录(见Screening.gene_task_folders)"""
+    path = Path(path_output) / Screening.RECORD_FILE
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(i) for i in f if i.strip()]
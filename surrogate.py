@@ -0,0 +1,510 @@
+from dataclasses import replace
+from pathlib import Path
+from typing import Iterable, Union
+import math
+import numpy as np
+
+from .result_reader import TaskFolder, TaskFolderList
+from .task_item import AbaqusData
+from .utils import task_status_match
+
+
+class GaussianProcess:
+    """
+    单输出高斯过程回归(各向同性RBF核, 输入需预先标准化)
+
+    超参数(长度尺度, 噪声比)在网格上按边际似然选取, 信号方差由闭式解给出
+
+    Parameters
+    ---
+    lengthscales : Iterable[float]
+        长度尺度的候选值
+    noises : Iterable[float]
+        噪声方差/信号方差的候选值
+    """
+
+    def __init__(
+        self,
+        lengthscales: Iterable[float] = np.geomspace(0.3, 30, 21),
+        noises: Iterable[float] = (1e-6, 1e-4, 1e-3, 1e-2, 1e-1),
+    ) -> None:
+        self.lengthscales = tuple(lengthscales)
+        self.noises = tuple(noises)
+        self.x = np.zeros((0, 0))
+        self.y_mean = 0.0
+        self.y_scale = 1.0
+        self.lengthscale = 1.0
+        self.noise = 1e-4
+        self.signal = 1.0  # 信号方差(标准化后的y)
+        self.k_inv = np.zeros((0, 0))
+        self.alpha = np.zeros(0)
+
+    def kernel(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        distance = (
+            np.sum(a * a, axis=1)[:, None]
+            + np.sum(b * b, axis=1)[None, :]
+            - 2 * a @ b.T
+        )
+        return np.exp(-np.maximum(distance, 0) / (2 * self.lengthscale**2))
+
+    def fit(self, x: np.ndarray, y: np.ndarray):
+        """
+        Parameters
+        ---
+        x : np.ndarray
+            标准化后的特征矩阵(样本数 x 特征数)
+        y : np.ndarray
+            目标值
+        """
+        self.x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        n = len(y)
+        self.y_mean = float(y.mean())
+        self.y_scale = float(y.std()) or 1.0
+        y = (y - self.y_mean) / self.y_scale
+
+        best = None
+        for lengthscale in self.lengthscales:
+            self.lengthscale = lengthscale
+            k0 = self.kernel(self.x, self.x)
+            for noise in self.noises:
+                try:
+                    chol = np.linalg.cholesky(k0 + noise * np.eye(n))
+                except np.linalg.LinAlgError:
+                    continue
+                v = np.linalg.solve(chol, y)
+                signal = max(float(v @ v) / n, 1e-12)
+                # 代入信号方差闭式解后的对数边际似然(省略常数项)
+                likelihood = -n / 2 * math.log(signal) - np.log(np.diag(chol)).sum()
+                if best is None or likelihood > best[0]:
+                    best = (likelihood, lengthscale, noise, signal, chol)
+        if best is None:
+            raise ValueError("failed to fit gaussian process")
+        _, self.lengthscale, self.noise, self.signal, chol = best
+
+        chol_inv = np.linalg.solve(chol, np.eye(n))
+        self.k_inv = chol_inv.T @ chol_inv / self.signal  # (信号方差*(K + noise*I))^-1
+        self.alpha = self.k_inv @ y
+        return self
+
+    def predict(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns
+        ---
+        mu, s : np.ndarray
+            预测均值与标准差(不含观测噪声)
+        """
+        k = self.signal * self.kernel(np.atleast_2d(x), self.x)
+        mu = k @ self.alpha
+        var = self.signal - np.einsum("ij,jk,ik->i", k, self.k_inv, k)
+        return (
+            mu * self.y_scale + self.y_mean,
+            np.sqrt(np.maximum(var, 0)) * self.y_scale,
+        )
+
+    @property
+    def loo_residuals(self) -> np.ndarray:
+        """留一法残差(闭式解)"""
+        return self.alpha / np.diag(self.k_inv) * self.y_scale
+
+    def posterior_variance(self, pool: np.ndarray):
+        """
+        候选点后验方差的逐次更新器(用于批量选点)
+
+        Returns
+        ---
+        var : np.ndarray
+            各候选点的后验方差(标准化后的y)
+        add : Callable[[int], None]
+            将第i个候选点加入条件集(方差与观测值无关, 无需真实结果), 原地更新var
+        """
+        cross = self.signal * self.kernel(pool, self.x.reshape(-1, pool.shape[1]))
+        a = cross @ self.k_inv
+        var = self.signal - np.einsum("ij,ij->i", a, cross)
+        columns = []
+        noise = self.noise * self.signal
+
+        def add(i: int):
+            covariance = self.signal * self.kernel(pool, pool[i : i + 1])[:, 0]
+            covariance -= a @ cross[i]
+            for column in columns:
+                covariance -= column * column[i]
+            column = covariance / math.sqrt(max(var[i], 0) + noise)
+            columns.append(column)
+            var[:] = var - column * column
+
+        return var, add
+
+
+class SurrogateModel:
+    """
+    代理模型: 由抽象参数预测荷载-位移曲线特征(见result_reader.FEATURE_KEYS)
+
+    以已完成任务为样本, 对每个目标的ln(值)分别作高斯过程回归, 特征见FEATURES
+
+    Parameters
+    ---
+    targets : Iterable[str], default=TARGETS
+        需要预测的特征(值需为正数)
+
+    Examples
+    ---
+    >>> model = SurrogateModel().fit(TaskFolderList(TASK_FOLDER, status="done"))
+    >>> model.loo_error()
+    {'ultimate_load': 0.021, ...}
+    >>> model.predict(abadata)
+    {'ultimate_load': (value, lower, upper), ...}
+    """
+
+    FEATURES = (
+        "concrete_strength",  # f_ck(MPa)
+        "tubelar_strength",  # f_y(MPa)
+        "rod_strength",  # 拉杆f_yk(MPa)
+        "width",  # B(mm)
+        "high",  # D(mm)
+        "length",  # H(mm)
+        "tubelar_thickness",  # t(mm)
+        "e",  # 偏心率
+        "rod_dia",  # 拉杆直径(mm), 无拉杆时为0
+        "pole_dia",  # 立杆直径(mm), 无立杆时为0
+        "layer_number",  # 拉杆层数, 无拉杆时为0
+    )
+    TARGETS = (
+        "ultimate_load",
+        "peak_displacement",
+        "initial_stiffness",
+        "ductility_index",
+    )
+
+    def __init__(self, targets: Iterable[str] = TARGETS) -> None:
+        self.targets = tuple(targets)
+        self.mean: np.ndarray = None
+        self.scale: np.ndarray = None
+        self.models: dict[str, GaussianProcess] = {}
+        self.sample_number: dict[str, int] = {}
+
+    @staticmethod
+    def user_params(item: Union[AbaqusData, TaskFolder, dict]) -> dict:
+        """获取task_params.json中user_params格式的数据"""
+        if isinstance(item, AbaqusData):
+            return item.members_dict
+        if isinstance(item, TaskFolder):
+            return item.user_params
+        if isinstance(item, dict):
+            return item["user_params"] if "user_params" in item else item
+        raise TypeError(type(item))
+
+    @classmethod
+    def features(cla, item: Union[AbaqusData, TaskFolder, dict]) -> np.ndarray:
+        """
+        提取特征
+
+        Parameters
+        ---
+        item : AbaqusData | TaskFolder | dict
+            任务, dict为task_params.json或其中user_params格式的数据
+
+        Returns
+        ---
+        features : np.ndarray
+            与FEATURES一一对应
+        """
+        user_params = cla.user_params(item)
+        geometry = user_params["geometry"]
+        rod_pattern = user_params["rod_pattern"]
+        has_rod = len(rod_pattern["pattern_rod"]) > 0
+        has_pole = len(rod_pattern["pattern_pole"]) > 0
+        circul_area_to_dia = TaskFolder.circul_area_to_dia
+
+        return np.array(
+            (
+                user_params["material_concrete"]["strength_criterion_pressure"],
+                user_params["material_tubelar"]["strength_yield"],
+                user_params["material_rod"]["strength_criterion_yield"],
+                geometry["x_len"],
+                geometry["y_len"],
+                geometry["z_len"],
+                geometry["tubelar_thickness"],
+                abs(
+                    user_params["referpoint_top"]["position"][1] / geometry["y_len"]
+                    - 1 / 2
+                ),
+                circul_area_to_dia(rod_pattern["area_rod"]) if has_rod else 0,
+                circul_area_to_dia(rod_pattern["area_pole"]) if has_pole else 0,
+                rod_pattern["number_layers"] if has_rod else 0,
+            ),
+            dtype=float,
+        )
+
+    @staticmethod
+    def task_targets(task: TaskFolder) -> Union[dict, None]:
+        """读取已完成任务的特征, 未完成或没有结果时返回None"""
+        if not task.is_done:
+            return None
+        try:
+            return task.features
+        except (KeyError, OSError):
+            return None
+
+    def fit(self, tasks: Iterable[TaskFolder]):
+        """
+        用已完成的任务训练模型
+
+        Parameters
+        ---
+        tasks : Iterable[TaskFolder]
+            任务(未完成或没有结果的任务会被忽略)
+        """
+        x, ys = [], {k: [] for k in self.targets}
+        for task in tasks:
+            features = self.task_targets(task)
+            if features is None:
+                continue
+            x.append(self.features(task))
+            for k in self.targets:
+                ys[k].append(features.get(k))
+        if not x:
+            raise ValueError("no completed task to fit")
+        return self.fit_arrays(np.array(x), ys)
+
+    def fit_arrays(self, x: np.ndarray, ys: dict[str, list]):
+        """
+        Parameters
+        ---
+        x : np.ndarray
+            特征矩阵(样本数 x 特征数)
+        ys : dict[str, list]
+            目标 -> 与x对应的值(None或非正数的样本会被该目标忽略)
+        """
+        self.mean = x.mean(axis=0)
+        self.scale = x.std(axis=0)
+        self.scale[self.scale == 0] = 1
+        x = self.standardize(x)
+        self.models, self.sample_number = {}, {}
+        for k in self.targets:
+            y = np.array([np.nan if v is None else v for v in ys[k]], dtype=float)
+            valid = np.isfinite(y) & (y > 0)
+            self.sample_number[k] = int(valid.sum())
+            if self.sample_number[k] == 0:
+                continue
+            self.models[k] = GaussianProcess().fit(x[valid], np.log(y[valid]))
+        return self
+
+    def standardize(self, x: np.ndarray) -> np.ndarray:
+        return (np.atleast_2d(x) - self.mean) / self.scale
+
+    def predict_log(
+        self, items: Iterable[Union[AbaqusData, TaskFolder, dict]]
+    ) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns
+        ---
+        predictions : dict[str, tuple[np.ndarray, np.ndarray]]
+            目标 -> ln(值)的预测均值与标准差
+        """
+        if self.mean is None:
+            raise RuntimeError("model not fitted")
+        x = self.standardize(np.array([self.features(i) for i in items]))
+        return {k: model.predict(x) for k, model in self.models.items()}
+
+    def predict(
+        self, item: Union[AbaqusData, TaskFolder, dict]
+    ) -> dict[str, tuple[float, float, float]]:
+        """
+        预测一个任务的特征
+
+        Returns
+        ---
+        predictions : dict[str, tuple[float, float, float]]
+            目标 -> (中位数, 95%区间下限, 95%区间上限)
+        """
+        return {
+            k: (
+                float(math.exp(mu[0])),
+                float(math.exp(mu[0] - 1.96 * s[0])),
+                float(math.exp(mu[0] + 1.96 * s[0])),
+            )
+            for k, (mu, s) in self.predict_log([item]).items()
+        }
+
+    def loo_error(self) -> dict[str, float]:
+        """
+        各目标的留一法误差(ln(值)残差的均方根, 约等于相对误差)
+
+        样本少于3个的目标为inf
+        """
+        return {
+            k: (
+                float(np.sqrt(np.mean(self.models[k].loo_residuals ** 2)))
+                if self.sample_number.get(k, 0) >= 3
+                else math.inf
+            )
+            for k in self.targets
+        }
+
+    def select(
+        self,
+        candidates: Iterable[Union[AbaqusData, TaskFolder, dict]],
+        batch_size: int,
+        pending: Iterable[Union[AbaqusData, TaskFolder, dict]] = (),
+    ) -> list[tuple[int, float]]:
+        """
+        在候选任务中贪心选择信息量最大的一批
+
+        信息量为各目标的0.5*ln(1 + 后验方差/噪声方差)之和; 每选出一个候选任务,
+        都将其(以及pending中已提交但未完成的任务)加入条件集后再计算下一个, 避免一批内扎堆
+
+        Parameters
+        ---
+        candidates : Iterable[AbaqusData | TaskFolder | dict]
+            候选任务
+        batch_size : int
+            选择的数量
+        pending : Iterable[AbaqusData | TaskFolder | dict], default=()
+            已提交但尚未完成的任务
+
+        Returns
+        ---
+        selected : list[tuple[int, float]]
+            (候选任务的序号, 选中时的信息量)
+        """
+        candidates = [self.features(i) for i in candidates]
+        pending = [self.features(i) for i in pending]
+        if not candidates:
+            return []
+        pool = np.array(pending + candidates)
+        if self.mean is None:  # 尚无样本: 以候选任务的分布标准化, 使用先验
+            mean, scale = pool.mean(axis=0), pool.std(axis=0)
+            scale[scale == 0] = 1
+            models = [GaussianProcess()]
+        else:
+            mean, scale = self.mean, self.scale
+            models = list(self.models.values()) or [GaussianProcess()]
+        pool = (pool - mean) / scale
+
+        trackers = []
+        for model in models:
+            var, add = model.posterior_variance(pool)
+            trackers.append((model.noise * model.signal, var, add))
+        for i in range(len(pending)):
+            for _, _, add in trackers:
+                add(i)
+
+        available = np.zeros(len(pool), dtype=bool)
+        available[len(pending) :] = True
+        selected = []
+        for _ in range(min(batch_size, len(candidates))):
+            information = sum(
+                0.5 * np.log1p(np.maximum(var, 0) / noise) for noise, var, _ in trackers
+            )
+            information[~available] = -np.inf
+            i = int(np.argmax(information))
+            selected.append((i - len(pending), float(information[i])))
+            available[i] = False
+            for _, _, add in trackers:
+                add(i)
+        return selected
+
+
+def active_learning_step(
+    task_warehouse: Union[str, Path],
+    candidates: Iterable[AbaqusData],
+    batch_size: int = 8,
+    target_error: float = 0.05,
+    targets: Iterable[str] = SurrogateModel.TARGETS,
+    calculate: bool = True,
+) -> dict:
+    """
+    主动学习的一轮: 用任务仓库中已完成的任务训练代理模型, 未达到目标精度时,
+    从候选任务中选出信息量最大的一批写入任务仓库
+
+    反复调用(每批任务完成后调用一次), 直到返回的converged为True;
+    与候选任务特征相同的已有任务(无论是否完成)不会被重复写入
+
+    Parameters
+    ---
+    task_warehouse : str | Path
+        任务仓库路径
+    candidates : Iterable[AbaqusData]
+        候选任务, 比如完整参数网格中的全部任务
+    batch_size : int, default=8
+        每轮写入的任务数量
+    target_error : float, default=0.05
+        目标精度(各目标留一法误差的最大值, 约等于相对误差)
+    targets : Iterable[str], default=SurrogateModel.TARGETS
+        需要预测的特征
+    calculate : bool, default=True
+        是否提交运算(见AbaqusData.gene_task_folder)
+
+    Returns
+    ---
+    report : dict
+        - samples : 已完成的任务数量
+        - pending : 已提交但尚未完成的任务数量
+        - loo_error : 各目标的留一法误差
+        - converged : 是否已达到目标精度
+        - tasknames : 本轮写入的任务名
+        - model : 本轮训练的SurrogateModel(没有已完成任务时为None)
+
+    Examples
+    ---
+    >>> grid = []
+    >>> for e, t in itertools.product([0, 0.1, 0.2, 0.3], [4, 6, 8]):
+    ...     params = AbaqusData.get_ecc_cfst_alpha_template()
+    ...     params["e"], params["tubelar_thickness"] = e, t
+    ...     grid.append(AbaqusData.init_ecc_cfst_alpha(params))
+    >>> active_learning_step(TASK_FOLDER, grid)["tasknames"]
+    """
+    task_warehouse = Path(task_warehouse)
+    task_warehouse.mkdir(parents=True, exist_ok=True)
+    candidates = list(candidates)
+    done = TaskFolderList(task_warehouse, status="done")
+    pending = TaskFolderList(
+        task_warehouse, status=lambda status: task_status_match(status, "todo")
+    )
+
+    model = SurrogateModel(targets)
+    samples = [i for i in done if model.task_targets(i) is not None]
+    if samples:
+        model.fit(samples)
+        loo_error = model.loo_error()
+    else:
+        model = None
+        loo_error = dict.fromkeys(targets, math.inf)
+    report = {
+        "samples": len(samples),
+        "pending": len(pending),
+        "loo_error": loo_error,
+        "converged": max(loo_error.values()) <= target_error,
+        "tasknames": [],
+        "model": model,
+    }
+    if report["converged"]:
+        return report
+
+    remaining = candidates
+    if done or pending:
+        existing = np.array([SurrogateModel.features(i) for i in (*done, *pending)])
+        features = np.array([SurrogateModel.features(i) for i in candidates])
+        duplicate = np.zeros(len(candidates), dtype=bool)
+        for row in existing:
+            duplicate |= np.all(
+                np.abs(features - row) <= 1e-9 * (1 + np.abs(row)), axis=1
+            )
+        remaining = [i for i, j in zip(candidates, duplicate) if not j]
+    selected = (model or SurrogateModel(targets)).select(remaining, batch_size, pending)
+    for i, information in selected:
+        abadata = remaining[i]
+        abadata = replace(
+            abadata,
+            comments={
+                **abadata.comments,
+                "surrogate": {
+                    "information": information,
+                    "samples": len(samples),
+                },
+            },
+        )
+        abadata.gene_task_folder(task_warehouse, calculate)
+        report["tasknames"].append(abadata.meta.taskname)
+    return report
@@ -0,0 +1,553 @@
+"""
+本地任务服务: 以HTTP提供任务, 代替共享文件夹
+
+服务端以任务仓库(与abaqus_modeling.py的任务仓库结构相同)为存储, 多台CAE主机可以共用一个任务队列:
+abaqus_modeling.py的网络模式(TaskHandler.run_mode_network)按批次领取任务,
+在本地执行后上传结果文件与任务状态
+
+接口(json)
+---
+POST /lease {"worker": str, "limit": int}
+    按排序策略(TaskServer.policy)领取任务 -> {"tasks": [{"taskname", "raw_task_params", "comments", "status"}]}
+POST /tasks {"raw_task_params": dict, "comments": dict, "calculate": bool}
+    提交任务(写入任务仓库) -> {"taskname": str}
+GET /tasks/<taskname>/status
+    任务状态(task_status.json)
+PUT /tasks/<taskname>/status {...}
+    更新任务状态(同时续期租约), 不再有"TODO"时任务完成
+POST /tasks/<taskname>/fail {"worker": str, "error": str}
+    报告任务执行出错(释放租约), 失败max_attempts次后不再分配
+POST /tasks/<taskname>/release {"worker": str}
+    归还领取的任务(释放该worker的租约, 不记为失败), 比如领取的主机磁盘空间不足
+PUT /tasks/<taskname>/files/<path>
+    上传文件(原始数据), path为"results/<文件名>"或"<文件名>"
+GET /summary
+    {"pending": int, "leased": int, "done": int, "failed": int}
+
+任务不存在时返回404, 请求体不是json对象或缺少字段时返回400
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Union
+from urllib.parse import unquote
+import json
+import math
+import os
+import re
+import threading
+import time
+import urllib.request
+
+from .task_item import AbaqusData
+from .utils import JsonFile, task_status_match
+
+
+POLICIES = ("listdir", "sjf", "priority", "deadline")
+HISTORY_FILENAME = "runtime_history.json"
+HISTORY_NEIGHBORS = 5
+FAILURES_FILENAME = "task_failures.json"
+
+
+class TaskNotFound(KeyError):
+    """任务仓库中没有该任务"""
+
+
+def count_elements(taskparams: dict) -> int:
+    """估计模型的单元数量(与abaqus_modeling.py的TaskScheduler.count_elements一致)"""
+    geometry = taskparams["geometry"]
+    rod_pattern = taskparams["rod_pattern"]
+    lens = (geometry["x_len"], geometry["y_len"], geometry["z_len"])
+    concrete = [
+        max(int(round(i / j)), 1) for i, j in zip(lens, geometry["concrete_grid_size"])
+    ]
+    steel = [
+        max(int(round(i / j)), 1) for i, j in zip(lens, geometry["steel_grid_size"])
+    ]
+    number = concrete[0] * concrete[1] * concrete[2]
+    number += 2 * (steel[0] + steel[1]) * steel[2]
+    number += (
+        int(rod_pattern["number_layers"])
+        * len(rod_pattern["pattern_rod"])
+        * max(steel[0], steel[1])
+    )
+    number += len(rod_pattern["pattern_pole"]) * steel[2]
+    return number
+
+
+def rod_complexity(taskparams: dict) -> float:
+    """拉杆布置复杂度系数(与abaqus_modeling.py的TaskScheduler.rod_complexity一致)"""
+    rod_pattern = taskparams["rod_pattern"]
+    number = int(rod_pattern["number_layers"]) * len(rod_pattern["pattern_rod"])
+    number += len(rod_pattern["pattern_pole"])
+    return 1.0 + 0.02 * number
+
+
+def parse_deadline(deadline) -> float:
+    """deadline可以是时间戳, 也可以是"%Y-%m-%d %H:%M"格式的字符串, 未设置时为inf"""
+    if deadline is None:
+        return float("inf")
+    if isinstance(deadline, (int, float)):
+        return float(deadline)
+    return time.mktime(time.strptime(str(deadline), "%Y-%m-%d %H:%M"))
+
+
+class TaskServer:
+    """
+    Parameters
+    ---
+    task_warehouse : str | Path
+        任务仓库路径
+    lease_seconds : float, default=6*3600
+        租约时长(秒), 领取任务的主机在此期间没有更新状态时, 任务会被重新分配
+    policy : {"listdir", "sjf", "priority", "deadline"}, default="sjf"
+        领取任务的排序策略, 与abaqus_modeling.py的TaskScheduler(TaskHandler.QUEUE_POLICY)相同:
+        - listdir: 按任务名
+        - sjf: 短作业优先(按估计耗时升序)
+        - priority: 按comments中的priority降序, 同优先级短作业优先
+        - deadline: 按comments中的deadline升序, 同截止时间短作业优先
+        估计耗时为「单元数量 x 复杂度系数」; 任务仓库下有runtime_history.json(TaskScheduler的历史运行记录)时,
+        参考相近历史任务换算为运行时间
+    max_attempts : int, default=3
+        任务失败(执行出错, 或租约到期仍未完成)的次数达到max_attempts后不再分配;
+        失败记录保存在任务文件夹下的task_failures.json, 删除该文件或重新提交任务后重新分配
+
+    Examples
+    ---
+    >>> server = TaskServer("tasks")
+    >>> server.serve("127.0.0.1", 8765)  # 阻塞
+    """
+
+    def __init__(
+        self,
+        task_warehouse: Union[str, Path],
+        lease_seconds: float = 6 * 3600,
+        policy: str = "sjf",
+        max_attempts: int = 3,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"{policy} not a supported policy")
+        self.task_warehouse = Path(task_warehouse).absolute()
+        self.task_warehouse.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.policy = policy
+        self.max_attempts = max_attempts
+        self.failed: set[str] = set()  # 失败次数达到max_attempts的任务
+        self.sort_info: dict[str, tuple] = {}  # 任务名 -> (task_params.json的签名, 排序信息)
+        self.history: list[dict] = []
+        self.history_mtime = None
+        self.pending: dict[str, None] = {}  # 有序集合: 尚有"TODO"的任务
+        self.leases: dict[str, tuple[str, float]] = {}  # 任务名 -> (worker, 到期时间)
+        self.done = 0  # 本次运行中完成的任务数量
+        self.known: set[str] = set()  # 已检查过的文件夹
+        self.lock = threading.RLock()
+        self.warehouse_mtime = None
+        self.refresh()
+
+    def refresh(self):
+        """任务仓库有变化时, 检查新出现的文件夹(比如直接用gene_task_folder生成的任务)"""
+        mtime = self.task_warehouse.stat().st_mtime
+        if mtime == self.warehouse_mtime:
+            return
+        with self.lock:
+            self.warehouse_mtime = mtime
+            with os.scandir(self.task_warehouse) as entries:
+                names = sorted(i.name for i in entries if i.is_dir())
+            for name in names:
+                if name in self.known:
+                    continue
+                path = self.task_warehouse / name
+                if not (path / "task_params.json").is_file():
+                    continue  # 可能尚未写完, 下次再检查
+                self.known.add(name)
+                path_status = path / "task_status.json"
+                status = JsonFile.load(path_status) if path_status.is_file() else {}
+                if not task_status_match(status, "todo"):
+                    continue
+                if len(self.failures(name)) >= self.max_attempts:
+                    self.failed.add(name)
+                else:
+                    self.pending.setdefault(name, None)
+
+    @staticmethod
+    def valid_taskname(taskname: str) -> bool:
+        """任务名只能是任务仓库下一级的文件夹名"""
+        return (
+            bool(taskname)
+            and taskname not in (".", "..")
+            and "/" not in taskname
+            and "\\" not in taskname
+        )
+
+    def task_path(self, taskname: str) -> Path:
+        path = self.task_warehouse / taskname
+        if (
+            not self.valid_taskname(taskname)
+            or not (path / "task_params.json").is_file()
+        ):
+            raise TaskNotFound(taskname)
+        return path
+
+    def failures(self, taskname: str) -> list[dict]:
+        """任务的失败记录[{"worker", "time", "error"}]"""
+        path = self.task_warehouse / taskname / FAILURES_FILENAME
+        return JsonFile.load(path) if path.is_file() else []
+
+    def fail(self, taskname: str, worker: str, error: str = ""):
+        """记录一次失败并释放租约, 失败次数达到max_attempts后不再分配"""
+        path = self.task_path(taskname) / FAILURES_FILENAME
+        with self.lock:
+            failures = self.failures(taskname)
+            failures.append({"worker": worker, "time": time.time(), "error": error})
+            JsonFile.write(failures, path)
+            self.leases.pop(taskname, None)
+            if len(failures) >= self.max_attempts and taskname in self.pending:
+                del self.pending[taskname]
+                self.failed.add(taskname)
+
+    def release(self, taskname: str, worker: str):
+        """归还任务: 释放worker持有的租约, 不记为失败, 任务立即可以重新分配"""
+        self.task_path(taskname)
+        with self.lock:
+            lease = self.leases.get(taskname)
+            if lease is not None and lease[0] == worker:
+                del self.leases[taskname]
+
+    def load_history(self):
+        """读取任务仓库下的runtime_history.json(有变化时)"""
+        path = self.task_warehouse / HISTORY_FILENAME
+        mtime = path.stat().st_mtime if path.is_file() else None
+        if mtime == self.history_mtime:
+            return
+        self.history_mtime = mtime
+        try:
+            self.history = JsonFile.load(path) if mtime is not None else []
+        except ValueError:
+            self.history = []
+
+    def estimate_cost(self, elements: int, complexity: float) -> float:
+        """估计任务耗时(与abaqus_modeling.py的TaskScheduler.estimate_cost一致)"""
+        weight = elements * complexity
+        if not self.history:
+            return float(weight)
+        neighbors = sorted(
+            self.history, key=lambda i: abs(math.log(float(i["elements"]) / elements))
+        )[:HISTORY_NEIGHBORS]
+        rates = sorted(
+            i["job_running_time"] / (i["elements"] * i["complexity"]) for i in neighbors
+        )
+        return rates[len(rates) // 2] * weight
+
+    def task_sort_info(self, taskname: str) -> tuple:
+        """
+        (单元数量, 复杂度系数, 优先级, 截止时间), 按task_params.json的修改时间与大小缓存
+
+        无法读取或解析的值: 单元数量为inf, 优先级为0, 截止时间为inf
+        """
+        path = self.task_warehouse / taskname / "task_params.json"
+        try:
+            stat = path.stat()
+        except OSError:
+            return (math.inf, 1.0, 0.0, math.inf)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self.sort_info.get(taskname)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        try:
+            taskparams = JsonFile.load(path)["task_params"]
+            elements, complexity = count_elements(taskparams), rod_complexity(
+                taskparams
+            )
+            comments = taskparams.get("comments") or {}
+        except Exception:
+            elements, complexity, comments = math.inf, 1.0, {}
+        try:
+            priority = float(comments.get("priority", 0))
+        except (TypeError, ValueError):
+            priority = 0.0
+        try:
+            deadline = parse_deadline(comments.get("deadline"))
+        except (TypeError, ValueError):
+            deadline = math.inf
+        info = (elements, complexity, priority, deadline)
+        self.sort_info[taskname] = (signature, info)
+        return info
+
+    def queue(self) -> list[str]:
+        """按排序策略排列的待执行任务(含已被领取的)"""
+        with self.lock:
+            names = list(self.pending)
+        if self.policy == "listdir":
+            return sorted(names)
+        self.load_history()
+        keys = {}
+        for taskname in names:
+            elements, complexity, priority, deadline = self.task_sort_info(taskname)
+            cost = (
+                self.estimate_cost(elements, complexity)
+                if math.isfinite(elements)
+                else math.inf
+            )
+            if self.policy == "sjf":
+                keys[taskname] = (cost,)
+            elif self.policy == "priority":
+                keys[taskname] = (-priority, cost)
+            else:
+                keys[taskname] = (deadline, cost)
+        return sorted(names, key=lambda i: keys[i] + (i,))
+
+    def lease(self, worker: str, limit: int = 1) -> list[dict]:
+        """按排序策略领取至多limit个任务"""
+        self.refresh()
+        tasks = []
+        now = time.time()
+        queue = self.queue()
+        with self.lock:
+            for taskname in queue:
+                if taskname not in self.pending:
+                    continue
+                if len(tasks) >= limit:
+                    break
+                lease = self.leases.get(taskname)
+                if lease is not None:
+                    if lease[1] > now:
+                        continue
+                    # 租约到期仍未完成, 记为一次失败
+                    self.fail(taskname, lease[0], "lease expired")
+                    if taskname not in self.pending:
+                        continue
+                path = self.task_path(taskname)
+                tasks.append(
+                    {
+                        "taskname": taskname,
+                        "raw_task_params": JsonFile.load(path / "task_params.json"),
+                        "comments": (
+                            JsonFile.load(path / "comments.json")
+                            if (path / "comments.json").is_file()
+                            else {}
+                        ),
+                        "status": self.get_status(taskname),
+                    }
+                )
+                self.leases[taskname] = (worker, now + self.lease_seconds)
+        return tasks
+
+    def get_status(self, taskname: str) -> dict:
+        path_status = self.task_path(taskname) / "task_status.json"
+        if not path_status.is_file():
+            return {"modelled": "TODO", "calculated": "TODO", "extracted": "TODO"}
+        return JsonFile.load(path_status)
+
+    def update_status(self, taskname: str, status: dict):
+        """更新任务状态, 并续期租约"""
+        JsonFile.write(status, self.task_path(taskname) / "task_status.json")
+        with self.lock:
+            if task_status_match(status, "todo"):
+                if taskname in self.leases:
+                    worker, _ = self.leases[taskname]
+                    self.leases[taskname] = (worker, time.time() + self.lease_seconds)
+                self.pending.setdefault(taskname, None)
+            else:
+                self.leases.pop(taskname, None)
+                self.sort_info.pop(taskname, None)
+                self.failed.discard(taskname)
+                if taskname in self.pending:
+                    del self.pending[taskname]
+                    self.done += 1
+
+    def store_file(self, taskname: str, relpath: str, data: bytes):
+        """保存上传的文件(只允许任务文件夹及其results文件夹下的文件)"""
+        parts = relpath.split("/")
+        if (
+            not 1 <= len(parts) <= 2
+            or (len(parts) == 2 and parts[0] != "results")
+            or parts[-1] in ("", ".", "..")
+            or "\\" in relpath
+        ):
+            raise ValueError(f"unsupported path: {relpath}")
+        path = self.task_path(taskname).joinpath(*parts)
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(data)
+
+    def submit(
+        self, raw_task_params: dict, comments: dict = None, calculate: bool = True
+    ) -> str:
+        """提交任务(与AbaqusData.gene_task_folder生成的任务文件夹相同)"""
+        taskname = raw_task_params["task_params"]["meta"]["taskname"]
+        if not self.valid_taskname(taskname):
+            raise ValueError(f"unsupported taskname: {taskname}")
+        path = self.task_warehouse / taskname
+        path.mkdir(exist_ok=True)
+        JsonFile.write(raw_task_params, path / "task_params.json")
+        JsonFile.write(comments or {}, path / "comments.json")
+        JsonFile.write(
+            {
+                "modelled": "TODO",
+                "calculated": "TODO" if calculate else "SKIP",
+                "extracted": "TODO" if calculate else "SKIP",
+            },
+            path / "task_status.json",
+        )
+        (path / FAILURES_FILENAME).unlink(missing_ok=True)
+        with self.lock:
+            self.known.add(taskname)
+            self.failed.discard(taskname)
+            self.pending.setdefault(taskname, None)
+        return taskname
+
+    def summary(self) -> dict:
+        now = time.time()
+        with self.lock:
+            leased = sum(
+                1
+                for taskname in self.pending
+                if taskname in self.leases and self.leases[taskname][1] > now
+            )
+            return {
+                "pending": len(self.pending) - leased,
+                "leased": leased,
+                "done": self.done,
+                "failed": len(self.failed),
+            }
+
+    def make_server(self, host: str = "127.0.0.1", port: int = 8765):
+        """创建HTTP服务(port为0时自动选择端口, 见server.server_address)"""
+        task_server = self
+
+        class Handler(_RequestHandler):
+            server_instance = task_server
+
+        return ThreadingHTTPServer((host, port), Handler)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8765):
+        """启动HTTP服务(阻塞)"""
+        with self.make_server(host, port) as server:
+            server.serve_forever()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 保持连接
+    server_instance: TaskServer = None
+
+    ROUTES = (
+        ("POST", re.compile(r"^/lease$"), "lease"),
+        ("POST", re.compile(r"^/tasks$"), "submit"),
+        ("GET", re.compile(r"^/summary$"), "summary"),
+        ("GET", re.compile(r"^/tasks/([^/]+)/status$"), "get_status"),
+        ("PUT", re.compile(r"^/tasks/([^/]+)/status$"), "update_status"),
+        ("POST", re.compile(r"^/tasks/([^/]+)/fail$"), "fail"),
+        ("POST", re.compile(r"^/tasks/([^/]+)/release$"), "release"),
+        ("PUT", re.compile(r"^/tasks/([^/]+)/files/(.+)$"), "store_file"),
+    )
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, code: int, item):
+        body = json.dumps(item, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    @staticmethod
+    def parse_json(body: bytes) -> dict:
+        """解析json请求体, 不是json对象时抛出ValueError"""
+        request = json.loads(body)
+        if not isinstance(request, dict):
+            raise ValueError("request body must be a json object")
+        return request
+
+    def dispatch(self, method: str):
+        path = self.path.split("?", 1)[0]
+        for method_, pattern, name in self.ROUTES:
+            match = pattern.match(path)
+            if method_ == method and match:
+                break
+        else:
+            self.read_body()
+            return self.send_json(404, {"error": f"{method} {path} not found"})
+        args = [unquote(i) for i in match.groups()]
+        server = self.server_instance
+        try:
+            body = self.read_body()
+            if name == "lease":
+                request = self.parse_json(body)
+                result = {
+                    "tasks": server.lease(request["worker"], request.get("limit", 1))
+                }
+            elif name == "submit":
+                request = self.parse_json(body)
+                result = {
+                    "taskname": server.submit(
+                        request["raw_task_params"],
+                        request.get("comments"),
+                        request.get("calculate", True),
+                    )
+                }
+            elif name == "summary":
+                result = server.summary()
+            elif name == "get_status":
+                result = server.get_status(*args)
+            elif name == "update_status":
+                server.update_status(*args, self.parse_json(body))
+                result = {"ok": True}
+            elif name == "fail":
+                request = self.parse_json(body)
+                server.fail(*args, request["worker"], request.get("error", ""))
+                result = {"ok": True}
+            elif name == "release":
+                server.release(*args, self.parse_json(body)["worker"])
+                result = {"ok": True}
+            else:
+                server.store_file(*args, body)
+                result = {"ok": True}
+        except TaskNotFound as error:
+            return self.send_json(404, {"error": f"not found: {error}"})
+        except KeyError as error:
+            return self.send_json(400, {"error": f"missing field: {error}"})
+        except (ValueError, TypeError) as error:
+            return self.send_json(400, {"error": str(error)})
+        self.send_json(200, result)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+
+def submit_task(server_url: str, abadata: AbaqusData, calculate: bool = True) -> str:
+    """
+    向任务服务提交任务
+
+    Parameters
+    ---
+    server_url : str
+        比如"http://127.0.0.1:8765"
+    abadata : AbaqusData
+        任务
+    calculate : bool
+        是否提交运算(如果为否, 则仅建模)
+    """
+    request = urllib.request.Request(
+        server_url.rstrip("/") + "/tasks",
+        data=json.dumps(
+            {
+                "raw_task_params": abadata.extract(),
+                "comments": abadata.comments,
+                "calculate": calculate,
+            },
+            ensure_ascii=False,
+        ).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())["taskname"]
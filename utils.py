@@ -1,6 +1,10 @@
 import json as _json
+import os
 import time
+from fnmatch import fnmatchcase
 from itertools import zip_longest
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Union
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -51,6 +55,7 @@ def format_time(with_date=False):
     time_str = f"{time_struct.tm_hour}-{time_struct.tm_min}-{time_struct.tm_sec}"
     return f"{date_str}--{time_str}" if with_date else f"{time_str}"
 
+
 def gene_markdown_table(data: dict):
     index_arr, value_arr = zip(*data.items())
 
@@ -59,4 +64,77 @@ def gene_markdown_table(data: dict):
 
     for values in zip_longest(*value_arr, fillvalue=""):
         text += f"""|{"|".join(map(str, values))}|\n"""
-    return text
\ No newline at end of file
+    return text
+
+
+def task_status_match(
+    status: dict, condition: Union[str, Callable[[dict], bool]]
+) -> bool:
+    """
+    判断task_status.json的内容是否满足条件
+
+    Parameters
+    ---
+    status : dict
+        task_status.json的内容, 没有该文件时为{}
+    condition : {"todo", "done"} | Callable[[dict], bool]
+        - "todo" : 尚有未执行的项(值为"TODO"), 或没有task_status.json
+        - "done" : 已导出数据(extracted为时间戳)
+    """
+    if callable(condition):
+        return condition(status)
+    if condition == "todo":
+        return not status or "TODO" in status.values()
+    if condition == "done":
+        return isinstance(status.get("extracted"), (int, float))
+    raise ValueError(f"unsupported status condition: {condition}")
+
+
+def scan_task_folders(
+    warehouse: Union[str, Path],
+    status: Union[str, Callable[[dict], bool]] = None,
+    include: Iterable[str] = None,
+    exclude: Iterable[str] = None,
+    sort: bool = True,
+) -> Iterator[Path]:
+    """
+    流式扫描任务仓库, 逐个产出任务文件夹(含有task_params.json的文件夹)
+
+    先用os.scandir列出文件夹名(不访问文件夹内容), 再逐个检查, 第一个任务可以立刻产出
+
+    Parameters
+    ---
+    warehouse : str | Path
+        任务仓库路径
+    status : {None, "todo", "done"} | Callable[[dict], bool], default=None
+        按task_status.json筛选(见task_status_match), 为None时不筛选
+    include, exclude : Iterable[str], default=None
+        按任务名(文件夹名)筛选的通配符(fnmatch, 区分大小写),
+        满足include中任意一个且不满足exclude中任何一个的任务才会产出
+    sort : bool, default=True
+        按任务名排序, 保证顺序稳定(否则为文件系统返回的顺序)
+
+    Yields
+    ---
+    task_folder : Path
+    """
+    include = tuple(include) if include is not None else None
+    exclude = tuple(exclude or ())
+    with os.scandir(warehouse) as entries:
+        names = [i.name for i in entries if i.is_dir()]
+    if sort:
+        names.sort()
+    for name in names:
+        if include is not None and not any(fnmatchcase(name, i) for i in include):
+            continue
+        if any(fnmatchcase(name, i) for i in exclude):
+            continue
+        path = Path(warehouse) / name
+        if not (path / "task_params.json").is_file():
+            continue
+        if status is not None:
+            path_status = path / "task_status.json"
+            task_status = JsonFile.load(path_status) if path_status.is_file() else {}
+            if not task_status_match(task_status, status):
+                continue
+        yield path